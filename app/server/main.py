@@ -1,5 +1,8 @@
-from fastapi import FastAPI
+import asyncio, os
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from pathlib import Path
 
 from routes.text import router as text_router
@@ -7,15 +10,45 @@ from routes.audio import router as audio_router
 from routes.feedback import router as feedback_router
 from routes.analytics import router as analytics_router
 from routes.health import router as health_router
-from utils.db import Base, engine
+from routes.metrics import router as metrics_router
+from routes.models import router as models_router
+from routes.stream import router as stream_router
+from utils.db import engine
+from utils.migrations import run_migrations
+from utils.executor import executor, QueueFull
+from utils.rollups import compactor
+from utils.write_behind import write_behind
+from utils.warmup import warm_up, init_worker, readiness
+from utils.timing import TimingMiddleware
 
 # Ensure data folder exists (for SQLite file)
 Path("data").mkdir(parents=True, exist_ok=True)
 
-# Create tables on startup (simple prototype)
-Base.metadata.create_all(bind=engine)
+# Bring the schema up to date (creates tables on a fresh database)
+run_migrations(engine)
 
-app = FastAPI(title="Emotion AI Backend", version="0.1.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    compactor.start()
+    # Load + warm the models in the inference workers in the background: /api/livez
+    # answers right away, /api/readyz only once warm-up is done
+    warm_task = None
+    if os.getenv("WARMUP_ON_STARTUP", "1") == "1":
+        executor.worker_init = init_worker
+        warm_task = asyncio.create_task(warm_up())
+    else:
+        readiness.set("ready")
+    yield
+    readiness.set("draining")
+    if warm_task is not None and not warm_task.done():
+        warm_task.cancel()
+    # commit rows still queued in write-behind mode before the process exits
+    write_behind.stop()
+    compactor.stop()
+    # let in-flight inference finish, then stop the worker pools
+    executor.shutdown(wait=True)
+
+app = FastAPI(title="Emotion AI Backend", version="0.1.0", lifespan=lifespan)
 
 # CORS: loosen for prototype
 app.add_middleware(
@@ -25,6 +58,15 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Per-stage latency histograms + optional Server-Timing header (utils/timing.py).
+# Added last = outermost, so the timings cover CORS handling too.
+app.add_middleware(TimingMiddleware)
+
+# A full inference queue (TEXT_/AUDIO_INFER_QUEUE_MAX) sheds load instead of queueing without bound
+@app.exception_handler(QueueFull)
+async def queue_full_handler(request: Request, exc: QueueFull):
+    return JSONResponse({"detail": {"code": exc.code, "message": exc.message}}, status_code=exc.status_code,
+                        headers={"Retry-After": "1"})
 
 # Prefix everything with /api (no versioning per decision)
 app.include_router(health_router, prefix="/api")
@@ -32,3 +74,6 @@ app.include_router(text_router, prefix="/api")
 app.include_router(audio_router, prefix="/api")
 app.include_router(feedback_router, prefix="/api")
 app.include_router(analytics_router, prefix="/api")
+app.include_router(metrics_router, prefix="/api")
+app.include_router(models_router, prefix="/api")
+app.include_router(stream_router, prefix="/api")
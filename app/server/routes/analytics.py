@@ -1,38 +1,60 @@
 # routes/analytics.py
 from typing import Optional
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request, Response
 from sqlalchemy.orm import Session
 
-from utils.db import get_db
+from utils.db import get_read_db
 from utils.analytics import compute_analytics
+from utils.analytics_cache import analytics_cache
 from utils.schemas import AnalyticsResponse
 
 router = APIRouter()
 
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    tags = [t.strip() for t in header.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
 @router.get(
     "/analytics",
     response_model=AnalyticsResponse,
     summary="Aggregate + compare text vs audio using feedback-derived accuracy"
 )
 def get_analytics(
+    request: Request,
     days: int = Query(30, ge=0, le=365, description="Look-back window in days (0=all)"),
     modality: Optional[str] = Query(None, pattern="^(text|audio)$", description="Optional filter"),
     correct_gte: int = Query(4, ge=1, le=5, description="Stars ≥ this = Correct"),
     incorrect_lte: int = Query(2, ge=1, le=5, description="Stars ≤ this = Incorrect"),
     high_conf_thr: float = Query(0.80, ge=0.0, le=1.0, description="Confidence threshold for 'high'"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """
     Accuracy by feedback definition:
       Correct if stars >= correct_gte
       Incorrect if stars <= incorrect_lte
       3-star or missing = Neutral (excluded from denominator)
+
+    Responses are cached per parameter set (see utils/analytics_cache.py) and
+    carry an ETag; a matching If-None-Match gets an empty 304.
     """
-    return compute_analytics(
-        db,
-        since_days=(days if days > 0 else None),
-        modality=modality,
-        correct_gte=correct_gte,
-        incorrect_lte=incorrect_lte,
-        high_conf_thr=high_conf_thr,
-    )
+    key = (days, modality, correct_gte, incorrect_lte, round(high_conf_thr, 4))
+
+    def compute(session: Session) -> dict:
+        payload = compute_analytics(
+            session,
+            since_days=(days if days > 0 else None),
+            modality=modality,
+            correct_gte=correct_gte,
+            incorrect_lte=incorrect_lte,
+            high_conf_thr=key[4],
+        )
+        return AnalyticsResponse.model_validate(payload).model_dump(mode="json")
+
+    ent = analytics_cache.get(key, compute, db)
+    headers = {"ETag": ent.etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), ent.etag):
+        analytics_cache.note_not_modified()
+        return Response(status_code=304, headers=headers)
+    return Response(content=ent.body, media_type="application/json", headers=headers)
@@ -1,14 +1,19 @@
-import os, tempfile, subprocess
 from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
 from utils.db import get_db
 from utils.schemas import AudioPredictionResponse, ErrorEnvelope
-from utils.model_adapters import predict_audio, get_audio_meta
-from utils.audio_utils import wav_duration_seconds, sniff_wav
+from utils.model_adapters import run_audio_inference, peek_audio_meta
+from utils.audio_utils import decode_wav, wav_duration_seconds
+from utils.transcode import transcoder, TranscodeError
 from utils.models import Prediction
 from utils.id import new_uuid, sha256_of
-from utils.timing import timed_ms
+from utils.result_cache import result_cache
+from utils.analytics_cache import mark_analytics_dirty
+from utils.write_behind import write_behind
+from utils.score_codec import score_storage
+from utils.timing import timed_ms, stage
 
 router = APIRouter()
 
@@ -20,19 +25,12 @@ TRANSCODE_CT = {
 }
 MAX_BYTES = 15 * 1024 * 1024  # 15 MB
 
-def _ffmpeg_to_wav(in_path: str, out_path: str) -> None:
-    # Convert to mono PCM WAV, no resample here (adapter handles sample rate)
-    # -y overwrite, -ac 1 = mono; omit -ar to preserve original rate
-    cmd = ["ffmpeg", "-y", "-i", in_path, "-ac", "1", out_path]
-    proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    if proc.returncode != 0 or not os.path.exists(out_path):
-        tail = proc.stderr.decode(errors="ignore")[-400:]
-        raise HTTPException(
-            status_code=415,
-            detail={"code": "TRANSCODE_FAILED", "message": tail},
-        )
+def _save(db: Session, row: dict) -> None:
+    with stage("db_commit", "audio"):
+        db.add(Prediction(**row)); db.commit()
+    mark_analytics_dirty()
 
-@router.post("/audio", response_model=AudioPredictionResponse, responses={415: {"model": ErrorEnvelope}})
+@router.post("/audio", response_model=AudioPredictionResponse, responses={415: {"model": ErrorEnvelope}, 503: {"model": ErrorEnvelope}, 504: {"model": ErrorEnvelope}})
 async def post_audio(file: UploadFile = File(...), db: Session = Depends(get_db)):
     ctype = (file.content_type or "").lower()
     if ctype not in WAV_CT and ctype not in TRANSCODE_CT:
@@ -42,64 +40,81 @@ async def post_audio(file: UploadFile = File(...), db: Session = Depends(get_db)
                     "message": "Send WAV or common mobile formats (m4a/mp4, 3gpp, aac, caf, mp3)."}
         )
 
-    blob = await file.read()
+    # the multipart body is already spooled by now; this reads it back into memory
+    with stage("upload_read", "audio"):
+        blob = await file.read()
     if len(blob) == 0:
         raise HTTPException(status_code=422, detail={"code":"EMPTY_FILE","message":"Audio file is empty."})
     if len(blob) > MAX_BYTES:
         raise HTTPException(status_code=413, detail={"code":"FILE_TOO_LARGE","message": f"Max {MAX_BYTES//(1024*1024)} MB."})
 
-    with tempfile.TemporaryDirectory() as td:
-        in_path = os.path.join(td, file.filename or "in.bin")
-        with open(in_path, "wb") as f:
-            f.write(blob)
+    input_hash = await run_in_threadpool(sha256_of, blob)
+    expected = peek_audio_meta(input_hash)  # sticky per input while several versions are weighted
+    is_wav = ctype in WAV_CT or (file.filename or "").lower().endswith(".wav")
 
+    async def compute():
         # If not WAV, transcode to WAV (mono). Leave SR as-is.
-        if ctype in WAV_CT or in_path.lower().endswith(".wav"):
-            wav_path = in_path
+        if is_wav:
+            wav_bytes = blob
         else:
-            wav_path = os.path.join(td, "converted.wav")
-            _ffmpeg_to_wav(in_path, wav_path)
+            # Async ffmpeg over pipes: the event loop keeps serving while this runs
+            try:
+                with stage("transcode", "audio"):
+                    wav_bytes = await transcoder.to_wav(blob, ctype)
+            except TranscodeError as e:
+                raise HTTPException(status_code=e.status_code, detail={"code": e.code, "message": e.message})
 
-        if not sniff_wav(wav_path):
+        # One in-memory parse: header validation, duration and sample rate, PCM view
+        with stage("sniff", "audio"):
+            decoded = decode_wav(wav_bytes)
+        if decoded is None:
             raise HTTPException(status_code=422, detail={"code":"BAD_WAV","message":"File is not a valid PCM WAV."})
 
-        duration, sample_rate = wav_duration_seconds(wav_path)
+        duration, sample_rate = wav_duration_seconds(decoded)
         if duration <= 0:
             raise HTTPException(status_code=422, detail={"code":"BAD_AUDIO","message":"Cannot determine audio duration."})
 
-        with timed_ms() as t:
-            scores = predict_audio(audio_path=wav_path, duration=duration, sample_rate=sample_rate)
-        processing_ms = t.ms
+        # Resample/mel/forward run in the audio inference pool, off the event loop
+        scores, meta, model_ms = await run_audio_inference(decoded, duration, sample_rate, expected["version"])
+        return scores, meta, model_ms, duration, sample_rate
 
-        top_label = max(scores, key=scores.get)
-        confidence = float(scores[top_label])
+    # A repeated upload skips transcode, decode and inference entirely
+    with timed_ms() as t:
+        (scores, meta, model_ms, duration, sample_rate), hit = await result_cache.get_or_compute(
+            ("audio", input_hash, expected["name"], expected["version"]), compute,
+            cacheable=lambda v: v[1] == expected)
+    processing_ms = t.ms if hit else model_ms
 
-        pid = new_uuid()
-        meta = get_audio_meta()
-        rec = Prediction(
-            prediction_id=pid,
-            modality="audio",
-            text_len=None,
-            lang=None,
-            duration_sec=float(duration),
-            sample_rate=int(sample_rate),
-            model_name=meta["name"],
-            model_version=meta["version"],
-            top_label=top_label,
-            confidence=confidence,
-            scores=scores,
-            processing_ms=processing_ms,
-            input_hash=sha256_of(blob),
-        )
-        db.add(rec); db.commit()
+    top_label = max(scores, key=scores.get)
+    confidence = float(scores[top_label])
+
+    pid = new_uuid()
+    row = dict(
+        prediction_id=pid,
+        modality="audio",
+        text_len=None,
+        lang=None,
+        duration_sec=float(duration),
+        sample_rate=int(sample_rate),
+        model_name=meta["name"],
+        model_version=meta["version"],
+        top_label=top_label,
+        confidence=confidence,
+        **score_storage.columns(scores, meta),
+        processing_ms=processing_ms,
+        input_hash=input_hash,
+    )
+    # write-behind mode: queued for the next group commit, off the response path
+    if not (write_behind.enabled and write_behind.add_predictions([row])):
+        await run_in_threadpool(_save, db, row)
 
-        return {
-            "prediction_id": pid,
-            "top_label": top_label,
-            "confidence": confidence,
-            "scores": scores,
-            "model_name": meta["name"],
-            "model_version": meta["version"],
-            "processing_ms": processing_ms,
-            "input": {"duration_sec": duration, "sample_rate": sample_rate},
-        }
+    return {
+        "prediction_id": pid,
+        "top_label": top_label,
+        "confidence": confidence,
+        "scores": scores,
+        "model_name": meta["name"],
+        "model_version": meta["version"],
+        "processing_ms": processing_ms,
+        "input": {"duration_sec": duration, "sample_rate": sample_rate},
+    }
@@ -1,23 +1,96 @@
+from typing import List
 from fastapi import APIRouter, HTTPException, Depends
 from sqlalchemy.orm import Session
 from sqlalchemy import select
 
 from utils.db import get_db
-from utils.schemas import FeedbackRequest, FeedbackResponse, ErrorEnvelope
+from utils.schemas import FeedbackRequest, FeedbackResponse, FeedbackBatchItemResult, ErrorEnvelope
 from utils.models import Prediction, Feedback
+from utils.analytics_cache import mark_analytics_dirty
+from utils.write_behind import write_behind, insert_feedback_rows
+from utils.timing import stage
 
 router = APIRouter()
 
+MAX_BATCH_ITEMS = 500
+EXISTS_CHUNK = 500  # prediction ids per IN (...) lookup, well below SQLite's bound-parameter limit
+
 @router.post("/feedback", response_model=FeedbackResponse, responses={404: {"model": ErrorEnvelope}})
 def post_feedback(req: FeedbackRequest, db: Session = Depends(get_db)):
-    # Ensure prediction exists
-    pred = db.scalar(select(Prediction).where(Prediction.prediction_id == req.prediction_id))
-    if not pred:
-        raise HTTPException(status_code=404, detail={"code": "PREDICTION_NOT_FOUND", "message": "Unknown prediction_id."})
+    # Ensure prediction exists. Queued (write-behind) predictions count; they
+    # leave the queue only after their batch has committed, so check it first.
+    if not write_behind.is_pending(req.prediction_id):
+        pred = db.scalar(select(Prediction.id).where(Prediction.prediction_id == req.prediction_id))
+        if not pred:
+            raise HTTPException(status_code=404, detail={"code": "PREDICTION_NOT_FOUND", "message": "Unknown prediction_id."})
+
+    if write_behind.enabled:
+        # committed together with the queued predictions; wait for the real id
+        fut = write_behind.add_feedback(dict(prediction_id=req.prediction_id, stars=req.stars, comment=req.comment))
+        if fut is not None:
+            return {"ok": True, "feedback_id": fut.result()}
 
     fb = Feedback(prediction_id=req.prediction_id, stars=req.stars, comment=req.comment)
     db.add(fb)
-    db.commit()
-    db.refresh(fb)
+    with stage("db_commit"):
+        db.flush()  # the INSERT hands back the id; reading it after commit would reload the row
+        feedback_id = fb.id
+        db.commit()
+    mark_analytics_dirty()
+
+    return {"ok": True, "feedback_id": feedback_id}
+
+def _existing_predictions(db: Session, prediction_ids: set[str]) -> set[str]:
+    # pending first, for the same reason as in post_feedback
+    found = write_behind.pending_among(prediction_ids)
+    todo = sorted(prediction_ids - found)
+    for start in range(0, len(todo), EXISTS_CHUNK):
+        chunk = todo[start:start + EXISTS_CHUNK]
+        found.update(db.scalars(select(Prediction.prediction_id).where(Prediction.prediction_id.in_(chunk))))
+    return found
+
+def _insert_feedback(db: Session, rows: list[dict]) -> list:
+    """New feedback ids in row order; an Exception in place of a row that couldn't be stored."""
+    if write_behind.enabled:
+        futs = write_behind.add_feedback_many(rows)
+        if futs is not None:
+            # a failed group commit is retried row by row: the other rows may be stored
+            return [fut.exception() or fut.result() for fut in futs]
+    with stage("db_commit"):
+        ids = insert_feedback_rows(db, rows)
+        db.commit()
+    mark_analytics_dirty()
+    return ids
+
+@router.post(
+    "/feedback/batch",
+    response_model=List[FeedbackBatchItemResult],
+    responses={413: {"model": ErrorEnvelope}, 422: {"model": ErrorEnvelope}},
+    summary="Store many ratings at once (e.g. an offline queue); results come back in input order",
+)
+def post_feedback_batch(reqs: List[FeedbackRequest], db: Session = Depends(get_db)):
+    if not reqs:
+        raise HTTPException(status_code=422, detail={"code": "EMPTY_BATCH", "message": "Provide at least one item."})
+    if len(reqs) > MAX_BATCH_ITEMS:
+        raise HTTPException(status_code=413, detail={"code": "BATCH_TOO_LARGE", "message": f"Max {MAX_BATCH_ITEMS} items."})
+
+    existing = _existing_predictions(db, {req.prediction_id for req in reqs})
+    results = [None] * len(reqs)
+    rows, indexes = [], []
+    for i, req in enumerate(reqs):
+        if req.prediction_id not in existing:
+            results[i] = {"index": i, "ok": False,
+                          "error": {"code": "PREDICTION_NOT_FOUND", "message": "Unknown prediction_id."}}
+            continue
+        rows.append(dict(prediction_id=req.prediction_id, stars=req.stars, comment=req.comment))
+        indexes.append(i)
+
+    if rows:
+        for i, feedback_id in zip(indexes, _insert_feedback(db, rows)):
+            if isinstance(feedback_id, Exception):
+                results[i] = {"index": i, "ok": False,
+                              "error": {"code": "WRITE_FAILED", "message": str(feedback_id).split("\n", 1)[0][:200]}}
+            else:
+                results[i] = {"index": i, "ok": True, "feedback_id": feedback_id}
 
-    return {"ok": True, "feedback_id": fb.id}
+    return results
@@ -1,23 +1,36 @@
 from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
 from sqlalchemy import text as sqltext
 from sqlalchemy.orm import Session
-from utils.db import get_db
-from utils.model_adapters import get_text_meta, get_audio_meta, MODE as ADAPTER_MODE
+from utils.db import get_read_db
+from utils.model_adapters import peek_text_meta, peek_audio_meta, MODE as ADAPTER_MODE
+from utils.warmup import readiness
 
 router = APIRouter()
 
+@router.get("/livez", summary="Liveness: the process is up and the event loop answers")
+def livez():
+    return {"status": "ok"}
+
+@router.get("/readyz", summary="Readiness: models loaded and warmed up (503 until then)")
+def readyz():
+    body = readiness.stats()
+    return JSONResponse(body, status_code=200 if body["ready"] else 503)
+
 @router.get("/healthz")
-def healthz(db: Session = Depends(get_db)):
+def healthz(db: Session = Depends(get_read_db)):
     try:
         db.execute(sqltext("SELECT 1"))
         db_ok = True
     except Exception:
         db_ok = False
 
-    counts = {"predictions": 0, "feedback": 0}
+    # MAX(id) is one B-tree seek on the rowid, COUNT(*) scans the table. It's an
+    # upper bound: deleted rows (the app never deletes any) are still counted.
+    approx_rows = {"predictions": 0, "feedback": 0}
     try:
-        counts["predictions"] = db.execute(sqltext("SELECT COUNT(*) FROM predictions")).scalar()
-        counts["feedback"]    = db.execute(sqltext("SELECT COUNT(*) FROM feedback")).scalar()
+        approx_rows["predictions"] = db.execute(sqltext("SELECT MAX(id) FROM predictions")).scalar() or 0
+        approx_rows["feedback"]    = db.execute(sqltext("SELECT MAX(id) FROM feedback")).scalar() or 0
     except Exception:
         pass
 
@@ -25,6 +38,8 @@ def healthz(db: Session = Depends(get_db)):
         "status": "ok" if db_ok else "degraded",
         "db_ok": db_ok,
         "mode_env": ADAPTER_MODE,
-        "counts": counts,
-        "models": {"text": get_text_meta(), "audio": get_audio_meta()},
+        "ready": readiness.ready,
+        "approx_rows": approx_rows,
+        # what the next request will be served with; never triggers a model load
+        "models": {"text": peek_text_meta(), "audio": peek_audio_meta()},
     }
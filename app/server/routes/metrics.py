@@ -0,0 +1,15 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from utils.metrics import snapshot, histogram_stats, render_prometheus
+
+router = APIRouter()
+
+@router.get("/metrics", summary="In-process runtime stats (batching, queues, caches, stage latency)")
+def get_metrics():
+    return {**snapshot(), "latency": histogram_stats()}
+
+@router.get("/metrics/prometheus", summary="The same stats plus latency histograms, Prometheus text format",
+            response_class=PlainTextResponse)
+def get_metrics_prometheus():
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8")
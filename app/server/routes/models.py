@@ -0,0 +1,71 @@
+import hmac, os
+from fastapi import APIRouter, HTTPException, Depends, Header
+
+from utils.schemas import ModelLoadRequest, ModelRoutesRequest, ErrorEnvelope
+from utils.model_adapters import REGISTRIES
+from utils.model_registry import ModelRegistry, ModelRegistryError
+from utils.executor import executor
+
+router = APIRouter()
+
+def _registry(modality: str) -> ModelRegistry:
+    reg = REGISTRIES.get(modality)
+    if reg is None:
+        raise HTTPException(status_code=404, detail={"code": "UNKNOWN_MODALITY", "message": "Use text or audio."})
+    return reg
+
+def require_admin(x_admin_token: str | None = Header(default=None)):
+    # Changing what serves traffic needs MODEL_ADMIN_TOKEN; without it these routes stay off
+    token = os.getenv("MODEL_ADMIN_TOKEN")
+    if not token:
+        raise HTTPException(status_code=403, detail={"code": "ADMIN_DISABLED", "message": "Set MODEL_ADMIN_TOKEN to enable model admin."})
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, token):
+        raise HTTPException(status_code=401, detail={"code": "BAD_ADMIN_TOKEN", "message": "Send a valid X-Admin-Token header."})
+    if executor.kind == "process":
+        # each inference process has its own registry, out of reach of this one
+        raise HTTPException(status_code=409, detail={"code": "NOT_SUPPORTED", "message": "Model admin needs INFER_EXECUTOR=thread."})
+
+def _registry_error(e: ModelRegistryError) -> HTTPException:
+    return HTTPException(status_code=e.status_code, detail={"code": e.code, "message": e.message})
+
+@router.get("/models", summary="Resident model versions, routing weights, memory budget and recent loads")
+def get_models():
+    return {m: reg.stats() for m, reg in REGISTRIES.items()}
+
+@router.post("/models/{modality}/load", status_code=202, dependencies=[Depends(require_admin)],
+             responses={401: {"model": ErrorEnvelope}, 403: {"model": ErrorEnvelope}, 404: {"model": ErrorEnvelope}},
+             summary="Load (and warm) a model version in the background; poll the returned job")
+def load_model(modality: str, req: ModelLoadRequest):
+    reg = _registry(modality)
+    source = {"model_dir": req.model_dir, "labels_path": req.labels_path}
+    if modality == "text":
+        source["backend"] = req.backend
+    else:
+        source["variant"] = req.variant
+    return reg.load(source, activate=req.activate)
+
+@router.get("/models/{modality}/loads/{job_id}", responses={404: {"model": ErrorEnvelope}})
+def get_load_job(modality: str, job_id: str):
+    job = _registry(modality).job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail={"code": "JOB_NOT_FOUND", "message": "Unknown or expired load job."})
+    return job
+
+@router.put("/models/{modality}/routes", dependencies=[Depends(require_admin)],
+            responses={404: {"model": ErrorEnvelope}, 422: {"model": ErrorEnvelope}},
+            summary="Replace the routing weights atomically (one version at 1 = switch, several = A/B)")
+def put_routes(modality: str, req: ModelRoutesRequest):
+    try:
+        return {"routes": _registry(modality).set_routes(req.weights)}
+    except ModelRegistryError as e:
+        raise _registry_error(e)
+
+@router.delete("/models/{modality}/versions/{version}", dependencies=[Depends(require_admin)],
+               responses={404: {"model": ErrorEnvelope}, 409: {"model": ErrorEnvelope}},
+               summary="Unload an unrouted version once its in-flight requests finish")
+def delete_version(modality: str, version: str):
+    try:
+        _registry(modality).unload(version)
+    except ModelRegistryError as e:
+        raise _registry_error(e)
+    return {"ok": True}
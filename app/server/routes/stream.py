@@ -0,0 +1,182 @@
+import asyncio, json, os
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+
+from utils.audio_stream import (
+    ENCODINGS, PcmDecoder, StreamingLogMel, StreamingSamples, EmaScores, shared_features, stream_stats,
+)
+from utils.model_adapters import run_audio_window_inference, peek_audio_meta, MODE
+
+router = APIRouter()
+
+MAX_CONNECTIONS = int(os.getenv("STREAM_MAX_CONNECTIONS", "16"))
+MAX_CHUNK_BYTES = int(os.getenv("STREAM_MAX_CHUNK_BYTES", str(256 * 1024)))
+IDLE_TIMEOUT_S = float(os.getenv("STREAM_IDLE_TIMEOUT_S", "30"))
+DEFAULT_WINDOW_S = float(os.getenv("STREAM_WINDOW_S", "2.0"))
+DEFAULT_HOP_S = float(os.getenv("STREAM_HOP_S", "0.5"))
+EMA_ALPHA = float(os.getenv("STREAM_EMA_ALPHA", "0.3"))
+
+def _config_error(cfg) -> str | None:
+    if not isinstance(cfg, dict):
+        return "First message must be a JSON config object."
+    if cfg.get("encoding", "s16le") not in ENCODINGS:
+        return f"encoding must be one of {sorted(ENCODINGS)}."
+    try:
+        sr = int(cfg.get("sample_rate", 0))
+        ch = int(cfg.get("channels", 1))
+        win = float(cfg.get("window_s", DEFAULT_WINDOW_S))
+        hop = float(cfg.get("hop_s", DEFAULT_HOP_S))
+    except (TypeError, ValueError):
+        return "sample_rate/channels/window_s/hop_s must be numbers."
+    if not 8000 <= sr <= 48000:
+        return "sample_rate must be 8000..48000."
+    if ch not in (1, 2):
+        return "channels must be 1 or 2."
+    if not 0.5 <= win <= 10.0 or not 0.1 <= hop <= win:
+        return "Need 0.5 <= window_s <= 10 and 0.1 <= hop_s <= window_s."
+    return None
+
+@router.websocket("/audio/stream")
+async def audio_stream(ws: WebSocket):
+    """
+    Live emotion scores over a WebSocket.
+
+    1. Client sends a JSON config:
+       {"sample_rate": 16000, "encoding": "s16le"|"f32le", "channels": 1, "window_s": 2.0, "hop_s": 0.5}
+       Server answers {"type": "ready", ...}.
+    2. Client sends binary frames of raw interleaved PCM, any size up to STREAM_MAX_CHUNK_BYTES.
+    3. Every hop_s of audio the server scores the last window_s and sends
+       {"type": "window", "index", "t_start", "t_end", "scores", "top_label", "confidence",
+        "smoothed", "smoothed_top_label", "model_ms", "dropped"}.
+       At most one window per connection is being scored at a time; if the model
+       falls behind, the newest window is scored and the skipped ones are counted
+       in "dropped", so latency stays bounded.
+    4. Client sends {"type": "end"} (or just disconnects); the server flushes the
+       pending window, sends {"type": "summary", ...} and closes.
+
+    Per-connection memory is one window of mel frames (or samples) plus a
+    partial frame, regardless of how long the stream runs.
+    """
+    if stream_stats.active >= MAX_CONNECTIONS:
+        stream_stats.add("rejected")
+        await ws.close(code=1013, reason="Too many live streams; retry shortly.")
+        return
+    await ws.accept()
+    stream_stats.opened()
+    send_lock = asyncio.Lock()
+    inflight: asyncio.Task | None = None
+
+    async def send(msg: dict):
+        async with send_lock:
+            await ws.send_text(json.dumps(msg))
+
+    async def fail(code: str, message: str, close_code: int = 1008):
+        await send({"type": "error", "code": code, "message": message})
+        await ws.close(code=close_code)
+
+    try:
+        try:
+            cfg = json.loads(await asyncio.wait_for(ws.receive_text(), IDLE_TIMEOUT_S))
+        except (asyncio.TimeoutError, ValueError, KeyError):
+            return await fail("BAD_CONFIG", "Send a JSON config message first.")
+        err = _config_error(cfg)
+        if err:
+            return await fail("BAD_CONFIG", err)
+
+        sr = int(cfg["sample_rate"])
+        window_s = float(cfg.get("window_s", DEFAULT_WINDOW_S))
+        hop_s = float(cfg.get("hop_s", DEFAULT_HOP_S))
+        decode = PcmDecoder(cfg.get("encoding", "s16le"), int(cfg.get("channels", 1)))
+        if MODE == "REAL":
+            buf = StreamingLogMel(shared_features(), sr, window_s, hop_s)
+        else:
+            buf = StreamingSamples(sr, window_s, hop_s)
+        ema = EmaScores(EMA_ALPHA)
+        totals = {"windows": 0, "dropped": 0}
+
+        # every window of a stream goes to the same model version, so the smoothing stays consistent
+        model = peek_audio_meta()
+        await send({"type": "ready", "model": model, "sample_rate": sr,
+                    "window_s": window_s, "hop_s": hop_s, "ema_alpha": ema.alpha})
+
+        async def score(index: int, window, bounds: tuple[float, float], dropped: int):
+            try:
+                scores, meta, model_ms = await run_audio_window_inference(window, model["version"])
+            except Exception as e:
+                try:
+                    await send({"type": "error", "code": getattr(e, "code", "INFERENCE_FAILED"), "message": str(e)[:200],
+                                "index": index})
+                except Exception:
+                    pass  # client already gone
+                return
+            stream_stats.add("windows_scored")
+            smoothed = ema.update(scores)
+            top = max(scores, key=scores.get)
+            smoothed_top = max(smoothed, key=smoothed.get)
+            await send({
+                "type": "window", "index": index,
+                "t_start": round(bounds[0], 3), "t_end": round(bounds[1], 3),
+                "scores": scores, "top_label": top, "confidence": float(scores[top]),
+                "smoothed": smoothed, "smoothed_top_label": smoothed_top,
+                "model": {"name": meta["name"], "version": meta["version"]},
+                "model_ms": model_ms, "dropped": dropped,
+            })
+
+        def ingest(data: bytes):
+            samples = decode(data)
+            if samples.size:
+                buf.push(samples)  # mel frames for this chunk only
+
+        def maybe_start():
+            # one window in flight per connection; later windows wait and the newest wins
+            nonlocal inflight
+            if not buf.due() or (inflight is not None and not inflight.done()):
+                return
+            dropped = buf.take()
+            totals["dropped"] += dropped
+            stream_stats.add("windows_dropped", dropped)
+            idx = totals["windows"]
+            totals["windows"] += 1
+            inflight = asyncio.create_task(score(idx, buf.snapshot(), buf.window_bounds(), dropped))
+
+        while True:
+            try:
+                msg = await asyncio.wait_for(ws.receive(), IDLE_TIMEOUT_S)
+            except asyncio.TimeoutError:
+                return await fail("IDLE_TIMEOUT", f"No audio for {IDLE_TIMEOUT_S:.0f}s.", close_code=1000)
+            if msg["type"] == "websocket.disconnect":
+                return
+            data = msg.get("bytes")
+            if data is not None:
+                if len(data) > MAX_CHUNK_BYTES:
+                    return await fail("CHUNK_TOO_LARGE", f"Max {MAX_CHUNK_BYTES} bytes per message.", close_code=1009)
+                stream_stats.add("bytes_in", len(data))
+                # resampling + STFT off the loop so one busy stream doesn't stall the others;
+                # awaited before the next receive, so decode/buf are never used concurrently
+                await run_in_threadpool(ingest, data)
+                maybe_start()
+                continue
+            try:
+                ctrl = json.loads(msg.get("text") or "{}")
+            except ValueError:
+                ctrl = None
+            if not isinstance(ctrl, dict):
+                return await fail("BAD_MESSAGE", "Text messages must be JSON objects, e.g. {\"type\": \"end\"}.")
+            if ctrl.get("type") == "end":
+                if inflight is not None:
+                    await inflight
+                maybe_start()  # the window that was waiting behind the last one
+                if inflight is not None:
+                    await inflight
+                await send({"type": "summary", "windows": totals["windows"], "dropped": totals["dropped"],
+                            "seconds": round(buf.window_bounds()[1], 3),
+                            "smoothed": ema.value,
+                            "smoothed_top_label": max(ema.value, key=ema.value.get) if ema.value else None})
+                await ws.close(code=1000)
+                return
+    except WebSocketDisconnect:
+        pass
+    finally:
+        if inflight is not None and not inflight.done():
+            inflight.cancel()
+        stream_stats.closed()
@@ -1,60 +1,161 @@
+import asyncio
+from typing import List
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 
 from utils.db import get_db
-from utils.schemas import TextRequest, PredictionResponse, ErrorEnvelope
-from utils.model_adapters import predict_text, get_text_meta
+from utils.schemas import TextRequest, PredictionResponse, TextBatchItemResult, ErrorEnvelope
+from utils.model_adapters import run_text_inference, run_text_batch_inference, peek_text_meta
 from utils.models import Prediction
 from utils.id import new_uuid, sha256_of
-from utils.timing import timed_ms
+from utils.result_cache import result_cache
+from utils.analytics_cache import mark_analytics_dirty
+from utils.write_behind import write_behind
+from utils.score_codec import score_storage
+from utils.timing import timed_ms, stage
 
 router = APIRouter()
 
 MAX_TEXT_LEN = 512
+MAX_BATCH_ITEMS = 256
 
-@router.post("/text", response_model=PredictionResponse, responses={422: {"model": ErrorEnvelope}})
-def post_text(req: TextRequest, db: Session = Depends(get_db)):
-    text = (req.text or "").strip()
+def _text_error(text: str) -> dict | None:
     if not text:
-        raise HTTPException(status_code=422, detail={"code": "EMPTY_TEXT", "message": "Provide non-empty text."})
+        return {"code": "EMPTY_TEXT", "message": "Provide non-empty text."}
     if len(text) > MAX_TEXT_LEN:
-        raise HTTPException(status_code=413, detail={"code": "TEXT_TOO_LONG", "message": f"Max {MAX_TEXT_LEN} chars."})
+        return {"code": "TEXT_TOO_LONG", "message": f"Max {MAX_TEXT_LEN} chars."}
+    return None
 
-    with timed_ms() as t:
-        scores = predict_text(text=text, lang=req.lang)
-    processing_ms = t.ms
+def _cache_key(input_hash: str, lang: str | None, meta: dict) -> tuple:
+    # lang is passed to the model and changes its scores
+    return ("text", input_hash, lang or "und", meta["name"], meta["version"])
 
+def _prediction_row(text: str, lang: str | None, scores: dict, processing_ms: int, meta: dict, input_hash: str) -> dict:
     # derive top label/conf
     top_label = max(scores, key=scores.get)
-    confidence = float(scores[top_label])
-
-    pid = new_uuid()
-    meta = get_text_meta()
-    rec = Prediction(
-        prediction_id=pid,
-        modality="text",
-        text_len=len(text),
-        lang=req.lang or "und",
-        duration_sec=None,
-        sample_rate=None,
-        model_name=meta["name"],
-        model_version=meta["version"],
-        top_label=top_label,
-        confidence=confidence,
-        scores=scores,
-        processing_ms=processing_ms,
-        input_hash=sha256_of(text),
-    )
-    db.add(rec)
-    db.commit()
-
     return {
-        "prediction_id": pid,
-        "top_label": top_label,
-        "confidence": confidence,
-        "scores": scores,
+        "prediction_id": new_uuid(),
+        "modality": "text",
+        "text_len": len(text),
+        "lang": lang or "und",
+        "duration_sec": None,
+        "sample_rate": None,
         "model_name": meta["name"],
         "model_version": meta["version"],
+        "top_label": top_label,
+        "confidence": float(scores[top_label]),
+        **score_storage.columns(scores, meta),
         "processing_ms": processing_ms,
-        "input": {"text_len": len(text), "lang": rec.lang},
+        "input_hash": input_hash,
     }
+
+def _save_rows(db: Session, rows: list[dict]) -> None:
+    # one multi-row INSERT, one transaction
+    with stage("db_commit", "text"):
+        db.execute(insert(Prediction), rows)
+        db.commit()
+    mark_analytics_dirty()
+
+async def _persist(db: Session, rows: list[dict]) -> None:
+    # write-behind mode: queued for the next group commit, off the response path
+    if not (write_behind.enabled and write_behind.add_predictions(rows)):
+        await run_in_threadpool(_save_rows, db, rows)
+
+def _response(row: dict, scores: dict) -> dict:
+    return {
+        "prediction_id": row["prediction_id"],
+        "top_label": row["top_label"],
+        "confidence": row["confidence"],
+        "scores": scores,
+        "model_name": row["model_name"],
+        "model_version": row["model_version"],
+        "processing_ms": row["processing_ms"],
+        "input": {"text_len": row["text_len"], "lang": row["lang"]},
+    }
+
+@router.post("/text", response_model=PredictionResponse, responses={422: {"model": ErrorEnvelope}, 503: {"model": ErrorEnvelope}})
+async def post_text(req: TextRequest, db: Session = Depends(get_db)):
+    text = (req.text or "").strip()
+    err = _text_error(text)
+    if err:
+        raise HTTPException(status_code=422 if err["code"] == "EMPTY_TEXT" else 413, detail=err)
+
+    input_hash = sha256_of(text)
+    # the version this input routes to (sticky per input while several are weighted)
+    expected = peek_text_meta(input_hash)
+
+    async def compute():
+        # Model work runs in the text inference pool, never on the event loop
+        return await run_text_inference(text, req.lang, expected["version"])
+
+    # Repeated inputs are served from the result cache; identical concurrent
+    # requests share one inference. Every request still gets its own row.
+    with timed_ms() as t:
+        (scores, meta, model_ms), hit = await result_cache.get_or_compute(
+            _cache_key(input_hash, req.lang, expected), compute, cacheable=lambda v: v[1] == expected)
+
+    row = _prediction_row(text, req.lang, scores, t.ms if hit else model_ms, meta, input_hash)
+    await _persist(db, [row])
+
+    return _response(row, scores)
+
+@router.post(
+    "/text/batch",
+    response_model=List[TextBatchItemResult],
+    responses={413: {"model": ErrorEnvelope}, 422: {"model": ErrorEnvelope}, 503: {"model": ErrorEnvelope}},
+    summary="Score many texts at once; results come back in input order",
+)
+async def post_text_batch(reqs: List[TextRequest], db: Session = Depends(get_db)):
+    if not reqs:
+        raise HTTPException(status_code=422, detail={"code": "EMPTY_BATCH", "message": "Provide at least one item."})
+    if len(reqs) > MAX_BATCH_ITEMS:
+        raise HTTPException(status_code=413, detail={"code": "BATCH_TOO_LARGE", "message": f"Max {MAX_BATCH_ITEMS} items."})
+
+    results = [None] * len(reqs)
+    rows = []
+    misses: dict[str, list] = {}  # routed version -> [(index, text, lang, input_hash)]
+    expected_by_version = {}
+    for i, req in enumerate(reqs):
+        text = (req.text or "").strip()
+        err = _text_error(text)
+        if err:
+            results[i] = {"index": i, "ok": False, "error": err}
+            continue
+        input_hash = sha256_of(text)
+        expected = peek_text_meta(input_hash)
+        cached = result_cache.get(_cache_key(input_hash, req.lang, expected))
+        if cached is not None:
+            (scores, meta, _), _ = cached
+            row = _prediction_row(text, req.lang, scores, 0, meta, input_hash)
+            rows.append(row)
+            results[i] = {"index": i, "ok": True, "prediction": _response(row, scores)}
+        else:
+            misses.setdefault(expected["version"], []).append((i, text, req.lang, input_hash))
+            expected_by_version[expected["version"]] = expected
+
+    # one batched call per routed version (a single one unless versions are weighted)
+    groups = list(misses.items())
+    scored_groups = await asyncio.gather(*(
+        run_text_batch_inference([m[1] for m in group], [m[2] for m in group], version)
+        for version, group in groups))
+    for (version, group), (scored, meta, model_ms) in zip(groups, scored_groups):
+        expected = expected_by_version[version]
+        # processing_ms is the amortized per-item share of the batched model time
+        per_item_ms = model_ms // len(group)
+        for (i, text, lang, input_hash), scores in zip(group, scored):
+            if isinstance(scores, Exception):
+                results[i] = {"index": i, "ok": False,
+                              "error": {"code": "INFERENCE_FAILED", "message": str(scores)[:200]}}
+                continue
+            if meta == expected:
+                result_cache.put(_cache_key(input_hash, lang, meta), (scores, meta, per_item_ms), per_item_ms)
+            row = _prediction_row(text, lang, scores, per_item_ms, meta, input_hash)
+            rows.append(row)
+            results[i] = {"index": i, "ok": True, "prediction": _response(row, scores)}
+
+    if rows:
+        await _persist(db, rows)
+
+    return results
@@ -0,0 +1,84 @@
+"""Shared helpers for the benchmark / tooling scripts in this folder."""
+import io, json, os, platform, subprocess, sys, time, wave
+from pathlib import Path
+import numpy as np
+
+SERVER_DIR = Path(__file__).resolve().parents[1]
+# where the script was started; use_server_imports() moves the cwd away from it
+INVOKE_DIR = Path.cwd()
+
+def use_server_imports():
+    # Scripts live in server/scripts; make `utils.*`/`routes.*` importable
+    # and resolve relative paths (data/app.db, .env) like the app does.
+    if str(SERVER_DIR) not in sys.path:
+        sys.path.insert(0, str(SERVER_DIR))
+    os.chdir(SERVER_DIR)
+
+def percentile(sorted_vals, p):
+    if not sorted_vals:
+        return None
+    k = (len(sorted_vals) - 1) * p / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_vals) - 1)
+    return sorted_vals[lo] + (sorted_vals[hi] - sorted_vals[lo]) * (k - lo)
+
+def summarize_ms(samples_ms):
+    v = sorted(samples_ms)
+    return {
+        "n": len(v),
+        "mean": (sum(v) / len(v)) if v else None,
+        "p50": percentile(v, 50),
+        "p95": percentile(v, 95),
+        "p99": percentile(v, 99),
+        "min": v[0] if v else None,
+        "max": v[-1] if v else None,
+    }
+
+def time_calls(fn, iters: int, warmup: int = 3):
+    for _ in range(warmup):
+        fn()
+    out = []
+    for _ in range(iters):
+        t0 = time.perf_counter()
+        fn()
+        out.append((time.perf_counter() - t0) * 1000.0)
+    return summarize_ms(out)
+
+def git_commit() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=SERVER_DIR,
+                             capture_output=True, text=True, timeout=5)
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+def wav_bytes(seconds: float, sr: int = 16000, seed: int = 0, channels: int = 1) -> bytes:
+    """Synthetic 16-bit PCM WAV (speech-level noise) for benchmarks."""
+    rng = np.random.default_rng(seed)
+    pcm = (rng.standard_normal(int(seconds * sr) * channels) * 3000).clip(-32768, 32767).astype("<i2")
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(channels)
+        w.setsampwidth(2)
+        w.setframerate(sr)
+        w.writeframes(pcm.tobytes())
+    return buf.getvalue()
+
+def machine_info() -> dict:
+    return {
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+def write_report(report: dict, out: str | None):
+    report = {"machine": machine_info(), **report}
+    text = json.dumps(report, indent=2, default=str)
+    if out:
+        path = INVOKE_DIR / out  # a relative --out is relative to where the script was run
+        path.write_text(text)
+        print(f"Saved: {path}")
+    else:
+        print(text)
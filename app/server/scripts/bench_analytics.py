@@ -0,0 +1,128 @@
+"""
+Times every query helper in utils/analytics.py and the full compute_analytics
+(raw-table and rollup paths) per window and modality filter, against the
+configured database, or with --scales against freshly seeded databases of
+each size (scripts/seed_synthetic.py, one subprocess per scale).
+
+    python scripts/bench_analytics.py --out analytics.json                  # DATABASE_URL / data/app.db
+    python scripts/bench_analytics.py --scales 1e5,1e6 --out analytics_scale.json
+    python scripts/bench_analytics.py --scales 1e7 --skip-raw --iters 1     # raw path takes minutes at 1e7
+"""
+import argparse, json, os, subprocess, sys, tempfile, time
+from datetime import datetime, timedelta
+from _bench import use_server_imports, time_calls, write_report
+
+def _grid(args):
+    days = [None if d == "all" else int(d) for d in args.days.split(",")]
+    mods = [None if m == "all" else m for m in args.modalities.split(",")]
+    return [(d, m) for d in days for m in mods]
+
+def bench_db(args) -> dict:
+    use_server_imports()
+    from sqlalchemy import select, func
+    from utils import analytics as a
+    from utils.db import engine, ReadSessionLocal
+    from utils.migrations import run_migrations
+    from utils.models import Prediction, Feedback
+    from utils.rollups import refresh_rollups, load_facts
+
+    run_migrations(engine)
+    t0 = time.perf_counter()
+    refresh_rollups()  # bring rollups up to date once; timed below only as the no-op check
+    catch_up_s = time.perf_counter() - t0
+    cg, il, hc = 4, 2, 0.8
+
+    with ReadSessionLocal() as db:
+        info = {
+            "predictions": db.scalar(select(func.count(Prediction.id))),
+            "feedback": db.scalar(select(func.count(Feedback.id))),
+            "rollup_catch_up_s": catch_up_s,
+        }
+        if engine.dialect.name == "sqlite":
+            pages = db.connection().exec_driver_sql("PRAGMA page_count").scalar()
+            size = db.connection().exec_driver_sql("PRAGMA page_size").scalar()
+            info["db_mb"] = pages * size / 2**20
+        print(f"{info['predictions']} predictions, {info['feedback']} feedback")
+
+        results = []
+        for since_days, modality in _grid(args):
+            cutoff = datetime.utcnow() - timedelta(days=since_days) if since_days else None
+            calls = {}
+            if not args.skip_raw:
+                calls.update({
+                    "_stars_dist": lambda: a._stars_dist(db, cutoff, modality),
+                    "_with_feedback_count": lambda: a._with_feedback_count(db, cutoff, modality),
+                    "_accuracy_by_feedback": lambda: a._accuracy_by_feedback(db, cutoff, modality, cg, il),
+                    **{f"_modality_summary[{m}]": (lambda m=m: a._modality_summary(db, cutoff, m, hc, cg, il))
+                       for m in ("text", "audio") if modality in (None, m)},
+                    "_per_emotion_breakdown": lambda: a._per_emotion_breakdown(db, cutoff, modality, cg, il),
+                    "_timeseries": lambda: a._timeseries(db, cutoff, modality),
+                    "_language_stats": lambda: a._language_stats(db, cutoff),
+                    "_audio_summary": lambda: a._audio_summary(db, cutoff),
+                    "_parts_from_raw": lambda: a._parts_from_raw(db, cutoff, modality, cg, il, hc),
+                    "compute_analytics[raw]": lambda: a.compute_analytics(db, since_days, modality, use_rollups=False),
+                })
+            calls.update({
+                "_duplicates_summary": lambda: a._duplicates_summary(db, cutoff, modality),
+                "refresh_rollups[no-op]": refresh_rollups,
+                "load_facts": lambda: load_facts(db, cutoff),
+                "_parts_from_rollups": lambda: a._parts_from_rollups(db, cutoff, modality, cg, il, hc),
+                "compute_analytics[rollups]": lambda: a.compute_analytics(db, since_days, modality, use_rollups=True),
+            })
+            timings = {name: time_calls(fn, args.iters, args.warmup) for name, fn in calls.items()}
+            label = f"days={since_days or 'all'} modality={modality or 'all'}"
+            for name, t in timings.items():
+                print(f"  {label:<28} {name:<30} p50={t['p50']:9.2f}ms")
+            results.append({"since_days": since_days, "modality": modality, "timings_ms": timings})
+    return {"db": info, "results": results}
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--days", default="7,30,all", help="comma-separated windows; 'all' = no cutoff")
+    ap.add_argument("--modalities", default="all,text,audio")
+    ap.add_argument("--iters", type=int, default=3)
+    ap.add_argument("--warmup", type=int, default=1)
+    ap.add_argument("--skip-raw", action="store_true", help="only the rollup path (+ the raw duplicates query)")
+    ap.add_argument("--scales", default=None, help="e.g. 1e5,1e6: seed a temporary database per scale")
+    ap.add_argument("--seed-args", default="", help="extra arguments for seed_synthetic.py")
+    ap.add_argument("--out", default=None)
+    ap.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        print(json.dumps(bench_db(args), default=str))
+        return
+    if not args.scales:
+        write_report({"benchmark": "analytics", "config": vars(args), **bench_db(args)}, args.out)
+        return
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    scales = []
+    for scale in args.scales.split(","):
+        with tempfile.TemporaryDirectory() as td:
+            env = {**os.environ, "DATABASE_URL": f"sqlite:///{td}/analytics.db"}
+            seed = subprocess.run([sys.executable, os.path.join(here, "seed_synthetic.py"), "--rows", scale,
+                                   *args.seed_args.split()], env=env, capture_output=True, text=True)
+            if seed.returncode != 0:
+                print(seed.stderr, file=sys.stderr)
+                raise SystemExit(f"seeding {scale} failed")
+            seeded = json.loads(seed.stdout[seed.stdout.rindex("{\n"):])
+            print(f"scale {scale}: seeded in {seeded['load_s']}s, rollups built in {seeded['rollup_build_s']}s")
+            cmd = [sys.executable, os.path.abspath(__file__), "--child", "--days", args.days,
+                   "--modalities", args.modalities, "--iters", str(args.iters), "--warmup", str(args.warmup)]
+            if args.skip_raw:
+                cmd.append("--skip-raw")
+            out = subprocess.run(cmd, env=env, capture_output=True, text=True)
+            if out.returncode != 0:
+                print(out.stderr, file=sys.stderr)
+                raise SystemExit(f"scale {scale} failed")
+            res = json.loads(out.stdout.strip().splitlines()[-1])
+            scales.append({"scale": int(float(scale)), "seed": seeded, **res})
+            full = {r["modality"] or "all": r["timings_ms"]["compute_analytics[rollups]"]["p50"]
+                    for r in res["results"] if r["since_days"] is None}
+            print(f"scale {scale}: compute_analytics[rollups] p50 (all days) {full}")
+
+    write_report({"benchmark": "analytics", "config": vars(args), "scales": scales}, args.out)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Micro-benchmark: per-request audio feature time, legacy pipeline vs cached
+AudioFeatureExtractor. Also checks the two produce bit-identical features.
+
+    python scripts/bench_audio_features.py --seconds 4 --iters 50 --out bench_features.json
+"""
+import argparse, os
+from _bench import use_server_imports, time_calls, write_report
+
+use_server_imports()
+import torch, torchaudio
+from utils.audio_features import AudioFeatureExtractor
+
+def legacy_features(wav, sr, target_sr):
+    # The pre-cache pipeline: every transform and env read happens per request
+    if wav.ndim == 2 and wav.size(0) > 1:
+        wav = wav.mean(dim=0, keepdim=True)
+    if sr != target_sr:
+        wav = torchaudio.transforms.Resample(orig_freq=sr, new_freq=target_sr)(wav)
+        sr = target_sr
+    wav = wav.squeeze(0)
+    n_mels = int(os.getenv("AUDIO_N_MELS", "80"))
+    win_ms = float(os.getenv("AUDIO_WIN_MS", "25"))
+    hop_ms = float(os.getenv("AUDIO_HOP_MS", "10"))
+    n_fft  = int(os.getenv("AUDIO_N_FFT", "512"))
+    melspec = torchaudio.transforms.MelSpectrogram(
+        sample_rate=sr, n_fft=n_fft,
+        win_length=int(sr * win_ms / 1000.0), hop_length=int(sr * hop_ms / 1000.0),
+        n_mels=n_mels, center=True, power=2.0
+    )
+    mel = torchaudio.transforms.AmplitudeToDB(top_db=80)(melspec(wav))
+    return mel.transpose(0, 1).unsqueeze(0).contiguous()
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--seconds", type=float, default=4.0)
+    ap.add_argument("--iters", type=int, default=50)
+    ap.add_argument("--rates", default="16000,8000,22050,44100,48000")
+    ap.add_argument("--channels", type=int, default=1)
+    ap.add_argument("--out", default=None)
+    args = ap.parse_args()
+
+    torch.manual_seed(0)
+    extractor = AudioFeatureExtractor.from_env()
+    results = []
+    for sr in [int(x) for x in args.rates.split(",")]:
+        wav = torch.rand(args.channels, int(sr * args.seconds)) * 2 - 1
+        identical = torch.equal(legacy_features(wav, sr, extractor.target_sr), extractor(wav, sr))
+        before = time_calls(lambda: legacy_features(wav, sr, extractor.target_sr), args.iters)
+        after = time_calls(lambda: extractor(wav, sr), args.iters)
+        results.append({
+            "input_sr": sr,
+            "bit_identical": identical,
+            "legacy_ms": before,
+            "cached_ms": after,
+            "speedup_p50": (before["p50"] / after["p50"]) if after["p50"] else None,
+        })
+        print(f"sr={sr:>6}  identical={identical}  legacy p50={before['p50']:.2f}ms  cached p50={after['p50']:.2f}ms")
+
+    write_report({
+        "benchmark": "audio_features",
+        "seconds": args.seconds,
+        "iters": args.iters,
+        "torch": torch.__version__,
+        "results": results,
+    }, args.out)
+    if not all(r["bit_identical"] for r in results):
+        raise SystemExit("Feature mismatch between legacy and cached pipelines")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Concurrency benchmark for the SQLite storage profile: writer threads insert
+predictions (+ some feedback) one commit each, like the routes do, while reader
+threads run compute_analytics. Each DB_PROFILE runs in a fresh subprocess on
+a fresh, seeded database file so both profiles see the same workload.
+
+    python scripts/bench_db_concurrency.py --profiles tuned,default --duration 10 --out db_bench.json
+"""
+import argparse, json, os, random, subprocess, sys, tempfile, threading, time
+from datetime import datetime, timedelta
+from uuid import uuid4
+from _bench import use_server_imports, summarize_ms, write_report
+
+def _row(rnd: random.Random, created_at: datetime | None = None) -> dict:
+    m = rnd.choice(("text", "audio"))
+    row = {
+        "prediction_id": str(uuid4()),
+        "modality": m,
+        "text_len": rnd.randint(1, 200) if m == "text" else None,
+        "lang": rnd.choice(("en", "de", "und")) if m == "text" else None,
+        "duration_sec": rnd.uniform(0.5, 10.0) if m == "audio" else None,
+        "sample_rate": rnd.choice((16000, 44100, 48000)) if m == "audio" else None,
+        "model_name": f"{m}-bench",
+        "model_version": "v1",
+        "top_label": rnd.choice(("anger", "joy", "sadness", "neutral", "fear", "surprise")),
+        "confidence": rnd.random(),
+        "scores": {},
+        "processing_ms": rnd.randint(5, 300),
+        "input_hash": f"{rnd.randrange(1 << 32):08x}",
+    }
+    if created_at is not None:
+        row["created_at"] = created_at
+    return row
+
+def _seed(n: int, days: int):
+    from sqlalchemy import insert
+    from utils.db import SessionLocal
+    from utils.models import Prediction, Feedback
+
+    rnd = random.Random(0)
+    now = datetime.utcnow()
+    with SessionLocal() as db:
+        for start in range(0, n, 5000):
+            rows = [_row(rnd, now - timedelta(seconds=rnd.randrange(days * 86400))) for _ in range(min(5000, n - start))]
+            db.execute(insert(Prediction), rows)
+            fbs = [{"prediction_id": r["prediction_id"], "stars": rnd.randint(0, 5)} for r in rows if rnd.random() < 0.3]
+            if fbs:
+                db.execute(insert(Feedback), fbs)
+        db.commit()
+
+def run_child(args) -> dict:
+    use_server_imports()
+    from sqlalchemy import insert
+    from sqlalchemy.exc import OperationalError
+    from utils.db import engine, SessionLocal, ReadSessionLocal, DB_PROFILE
+    from utils.migrations import run_migrations
+    from utils.models import Prediction, Feedback
+    from utils.analytics import compute_analytics
+
+    run_migrations(engine)
+    _seed(args.seed_rows, args.days)
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    write_ms, read_ms = [], []
+    errors = {"locked": 0, "other": 0}
+
+    def record(bucket, ms):
+        with lock:
+            bucket.append(ms)
+
+    def fail(e):
+        with lock:
+            errors["locked" if "locked" in str(e) else "other"] += 1
+
+    def writer(i):
+        rnd = random.Random(1000 + i)
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            try:
+                with SessionLocal() as db:
+                    row = _row(rnd)
+                    db.execute(insert(Prediction), [row])
+                    if rnd.random() < 0.25:
+                        db.execute(insert(Feedback), [{"prediction_id": row["prediction_id"], "stars": rnd.randint(0, 5)}])
+                    db.commit()
+                record(write_ms, (time.perf_counter() - t0) * 1000.0)
+            except OperationalError as e:
+                fail(e)
+
+    def reader(i):
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            try:
+                with ReadSessionLocal() as db:
+                    compute_analytics(db, since_days=args.days)
+                record(read_ms, (time.perf_counter() - t0) * 1000.0)
+            except OperationalError as e:
+                fail(e)
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(args.writers)]
+    threads += [threading.Thread(target=reader, args=(i,)) for i in range(args.readers)]
+    for t in threads:
+        t.start()
+    time.sleep(args.duration)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    return {
+        "profile": DB_PROFILE,
+        "writes_per_s": len(write_ms) / args.duration,
+        "reads_per_s": len(read_ms) / args.duration,
+        "write_ms": summarize_ms(write_ms),
+        "analytics_ms": summarize_ms(read_ms),
+        "errors": errors,
+    }
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--profiles", default="tuned,default", help="comma-separated DB_PROFILE values")
+    ap.add_argument("--writers", type=int, default=8)
+    ap.add_argument("--readers", type=int, default=2)
+    ap.add_argument("--duration", type=float, default=10.0, help="seconds per profile")
+    ap.add_argument("--seed-rows", type=int, default=50000)
+    ap.add_argument("--days", type=int, default=30, help="seeded history span and analytics window")
+    ap.add_argument("--out", default=None)
+    ap.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(args)))
+        return
+
+    results = []
+    for profile in args.profiles.split(","):
+        with tempfile.TemporaryDirectory() as td:
+            env = {
+                **os.environ,
+                "DB_PROFILE": profile,
+                "DATABASE_URL": f"sqlite:///{td}/bench.db",
+                "ANALYTICS_USE_ROLLUPS": os.getenv("ANALYTICS_USE_ROLLUPS", "1"),
+            }
+            cmd = [sys.executable, os.path.abspath(__file__), "--child",
+                   "--writers", str(args.writers), "--readers", str(args.readers),
+                   "--duration", str(args.duration), "--seed-rows", str(args.seed_rows), "--days", str(args.days)]
+            out = subprocess.run(cmd, env=env, capture_output=True, text=True)
+            if out.returncode != 0:
+                print(out.stderr, file=sys.stderr)
+                raise SystemExit(f"profile {profile} failed")
+            res = json.loads(out.stdout.strip().splitlines()[-1])
+            print(f"{profile:>8}: {res['writes_per_s']:.0f} writes/s (p99 {res['write_ms']['p99'] or 0:.1f} ms), "
+                  f"{res['reads_per_s']:.1f} analytics/s (p99 {res['analytics_ms']['p99'] or 0:.1f} ms), errors {res['errors']}")
+            results.append(res)
+
+    write_report({
+        "config": {k: v for k, v in vars(args).items() if k != "child"},
+        "results": results,
+    }, args.out)
+
+if __name__ == "__main__":
+    main()
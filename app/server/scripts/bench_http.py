@@ -0,0 +1,125 @@
+"""
+HTTP load generator for /api/text, /api/audio and /api/feedback with the
+FastAPI app in-process: httpx over ASGITransport, lifespan (warm-up, write-
+behind, executor) run as under uvicorn, no sockets and no network. For each
+endpoint and concurrency level, N client coroutines send requests back to
+back for --duration seconds. Every request carries a unique input, so the
+result cache never answers.
+
+Client and server share one event loop, so the numbers include the client's
+own overhead. They are meant for comparing commits on the same machine, not
+as absolute capacity. Each run uses a throwaway SQLite database unless --db
+is given.
+
+    python scripts/bench_http.py --out bench_http.json
+    python scripts/bench_http.py --endpoints text --concurrency 1,8,32 --duration 10 --out text.json
+    MODE=REAL python scripts/bench_http.py --endpoints audio --concurrency 1,4
+"""
+import argparse, asyncio, itertools, os, tempfile, time
+from collections import Counter
+from _bench import use_server_imports, summarize_ms, wav_bytes, write_report
+
+TEXT = "The meeting was moved again and nobody told me, which is honestly frustrating"
+
+def _payloads(endpoint: str, clip: bytes, prediction_ids: list[str]):
+    if endpoint == "text":
+        return lambda i: {"json": {"text": f"{TEXT} #{i}", "lang": "en"}}
+    if endpoint == "audio":
+        # same clip, last sample replaced by the counter: a new input_hash every time
+        return lambda i: {"files": {"file": ("bench.wav", clip[:-4] + i.to_bytes(4, "little"), "audio/wav")}}
+    return lambda i: {"json": {"prediction_id": prediction_ids[i % len(prediction_ids)], "stars": 1 + i % 5}}
+
+async def _level(client, endpoint: str, concurrency: int, duration: float, payload, counter) -> dict:
+    lat_ms, status = [], Counter()
+    stop_at = time.perf_counter() + duration
+
+    async def worker():
+        while time.perf_counter() < stop_at:
+            kwargs = payload(next(counter))
+            t0 = time.perf_counter()
+            try:
+                r = await client.post(f"/api/{endpoint}", **kwargs)
+                status[r.status_code] += 1
+            except Exception as e:
+                status[type(e).__name__] += 1
+                continue
+            if r.status_code == 200:
+                lat_ms.append((time.perf_counter() - t0) * 1000.0)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - t0
+    total = sum(status.values())
+    return {
+        "endpoint": endpoint,
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": total - status[200],
+        "status": {str(k): v for k, v in status.items()},
+        "throughput_rps": len(lat_ms) / elapsed,
+        "latency_ms": summarize_ms(lat_ms),
+    }
+
+async def run(args) -> dict:
+    import httpx
+    import main
+
+    app = main.app
+    clip = wav_bytes(args.audio_seconds, args.sample_rate)
+    results = []
+    counter = itertools.count()  # shared by all levels: inputs never repeat within a run
+    async with app.router.lifespan_context(app):
+        from utils.warmup import readiness
+        while readiness.stats()["state"] in ("starting", "warming"):
+            await asyncio.sleep(0.05)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+            # predictions for /api/feedback to point at
+            prediction_ids = []
+            for i in range(args.seed_predictions):
+                r = await client.post("/api/text", json={"text": f"seed {i}"})
+                r.raise_for_status()
+                prediction_ids.append(r.json()["prediction_id"])
+
+            for endpoint in args.endpoints.split(","):
+                payload = _payloads(endpoint, clip, prediction_ids)
+                for i in range(args.warmup_requests):
+                    await client.post(f"/api/{endpoint}", **payload(next(counter)))
+                for c in [int(x) for x in args.concurrency.split(",")]:
+                    res = await _level(client, endpoint, c, args.duration, payload, counter)
+                    lat = res["latency_ms"]
+                    if lat["n"]:
+                        print(f"{endpoint:>8} c={c:<4} {res['throughput_rps']:8.1f} req/s  p50={lat['p50']:.1f}ms  "
+                              f"p95={lat['p95']:.1f}ms  p99={lat['p99']:.1f}ms  errors={res['errors']}")
+                    else:
+                        print(f"{endpoint:>8} c={c:<4} no successful requests: {res['status']}")
+                    results.append(res)
+
+            # server-side view of the same run: per-stage histograms (utils/timing.py)
+            server_latency = (await client.get("/api/metrics")).json().get("latency", {})
+        readiness_info = readiness.stats()
+    return {"results": results, "server_latency": server_latency, "readiness": readiness_info}
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--endpoints", default="text,audio,feedback")
+    ap.add_argument("--concurrency", default="1,4,16")
+    ap.add_argument("--duration", type=float, default=5.0, help="seconds per endpoint and concurrency level")
+    ap.add_argument("--warmup-requests", type=int, default=10)
+    ap.add_argument("--seed-predictions", type=int, default=200)
+    ap.add_argument("--audio-seconds", type=float, default=3.0)
+    ap.add_argument("--sample-rate", type=int, default=16000)
+    ap.add_argument("--db", default=None, help="DATABASE_URL to use (default: a temporary SQLite file)")
+    ap.add_argument("--out", default=None)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as td:
+        os.environ["DATABASE_URL"] = args.db or f"sqlite:///{td}/bench.db"
+        os.environ.setdefault("MODE", "MOCK")
+        use_server_imports()
+        report = asyncio.run(run(args))
+    write_report({"benchmark": "http", "mode": os.environ["MODE"],
+                  "config": {k: v for k, v in vars(args).items() if k != "db"}, **report}, args.out)
+
+if __name__ == "__main__":
+    main()
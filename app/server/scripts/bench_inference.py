@@ -0,0 +1,115 @@
+"""
+Micro-benchmarks of the inference hot path, called directly (no HTTP, no
+executor): predict_text / predict_text_batch, WAV parsing, predict_audio,
+log-mel feature extraction and sha256_of. Each MODE runs in a fresh
+subprocess, because the adapters read MODE at import time. In REAL mode a
+modality whose model fails to load is reported, not silently mocked.
+
+    python scripts/bench_inference.py --modes MOCK --out bench_inference.json
+    python scripts/bench_inference.py --modes MOCK,REAL --iters 100 --out bench_inference.json
+"""
+import argparse, json, os, subprocess, sys
+from _bench import use_server_imports, time_calls, wav_bytes, write_report
+
+TEXTS = {
+    "short": "ok, thanks",
+    "medium": "I can't believe how well this turned out, thank you so much!",
+    "long": "The meeting was moved again and nobody told me, which is honestly frustrating. " * 6,
+}
+CLIPS = {"1s_16k": (1.0, 16000), "4s_16k": (4.0, 16000), "4s_44k": (4.0, 44100)}
+HASH_SIZES = {"1KB": 1 << 10, "1MB": 1 << 20, "15MB": 15 << 20}
+
+def run_child(args) -> dict:
+    use_server_imports()
+    from utils import model_adapters as adapters
+    from utils.audio_utils import decode_wav
+    from utils.id import sha256_of
+
+    out = {"mode": adapters.MODE, "text": {}, "audio": {}, "features": {}, "sha256_of": {}}
+    it, warm = args.iters, args.warmup
+
+    adapters._ensure_text_loaded()
+    state = adapters.model_state("text")
+    out["text"]["model"] = state["model"]
+    if adapters.MODE == "REAL" and not state["real"]:
+        out["text"]["error"] = state["error"]
+    else:
+        for name, text in TEXTS.items():
+            out["text"][f"predict_text_{name}"] = time_calls(lambda: adapters.predict_text(text, "en"), it, warm)
+        batch = [TEXTS[k] for k in ("short", "medium", "long")] * (args.batch // 3 + 1)
+        batch = batch[:args.batch]
+        res = time_calls(lambda: adapters.predict_text_batch(batch, ["en"] * len(batch)), max(1, it // 4), warm)
+        res["per_item_ms"] = res["p50"] / len(batch)
+        out["text"][f"predict_text_batch_{len(batch)}"] = res
+
+    clips = {name: wav_bytes(s, sr, seed=i) for i, (name, (s, sr)) in enumerate(CLIPS.items())}
+    decoded = {name: decode_wav(b) for name, b in clips.items()}
+    for name, blob in clips.items():
+        out["audio"][f"decode_wav_{name}"] = time_calls(lambda: decode_wav(blob), it, warm)
+
+    adapters._ensure_audio_loaded()
+    state = adapters.model_state("audio")
+    out["audio"]["model"] = state["model"]
+    if adapters.MODE == "REAL" and not state["real"]:
+        out["audio"]["error"] = state["error"]
+    else:
+        for name, wav in decoded.items():
+            out["audio"][f"predict_audio_{name}"] = time_calls(
+                lambda: adapters.predict_audio(wav=wav, duration=wav.duration, sample_rate=wav.sample_rate), it, warm)
+
+    try:
+        import torch
+        from utils.audio_features import AudioFeatureExtractor
+    except ImportError as e:
+        out["features"]["skipped"] = f"{e} (install torch + torchaudio)"
+    else:
+        extractor = AudioFeatureExtractor.from_env()
+        for name, wav in decoded.items():
+            t = torch.from_numpy(wav.to_float32())
+            out["features"][f"log_mel_{name}"] = time_calls(lambda: extractor(t, wav.sample_rate), it, warm)
+
+    for name, size in HASH_SIZES.items():
+        data = os.urandom(size)
+        res = time_calls(lambda: sha256_of(data), max(3, it // 4 if size > (1 << 20) else it), warm)
+        res["mb_per_s"] = (size / 2**20) / (res["p50"] / 1000.0) if res["p50"] else None
+        out["sha256_of"][name] = res
+    return out
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--modes", default="MOCK", help="comma-separated: MOCK,REAL")
+    ap.add_argument("--iters", type=int, default=50)
+    ap.add_argument("--warmup", type=int, default=3)
+    ap.add_argument("--batch", type=int, default=32, help="texts per predict_text_batch call")
+    ap.add_argument("--out", default=None)
+    ap.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(args)))
+        return
+
+    results = {}
+    for mode in args.modes.upper().split(","):
+        # no background micro-batching window in the single-caller path
+        env = {**os.environ, "MODE": mode, "TEXT_BATCH_MAX_SIZE": os.getenv("TEXT_BATCH_MAX_SIZE", "1")}
+        cmd = [sys.executable, os.path.abspath(__file__), "--child", "--iters", str(args.iters),
+               "--warmup", str(args.warmup), "--batch", str(args.batch)]
+        out = subprocess.run(cmd, env=env, capture_output=True, text=True)
+        if out.returncode != 0:
+            print(out.stderr, file=sys.stderr)
+            raise SystemExit(f"mode {mode} failed")
+        res = json.loads(out.stdout.strip().splitlines()[-1])
+        for group in ("text", "audio", "features", "sha256_of"):
+            for name, r in res[group].items():
+                if isinstance(r, dict) and "p50" in r:
+                    print(f"{mode:>4} {group + '.' + name:<38} p50={r['p50']:.3f}ms  p95={r['p95']:.3f}ms")
+                elif name in ("error", "skipped"):
+                    print(f"{mode:>4} {group}: {name}: {r}")
+        results[mode] = res
+
+    write_report({"benchmark": "inference", "config": {k: v for k, v in vars(args).items() if k != "child"},
+                  "results": results}, args.out)
+
+if __name__ == "__main__":
+    main()
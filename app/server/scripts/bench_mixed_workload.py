@@ -0,0 +1,176 @@
+"""
+Text latency under an audio flood, per executor configuration. For each
+config, starts the API under uvicorn in a subprocess (so the load generator
+doesn't compete with it for the GIL) and runs two phases:
+
+    text-only   --text-concurrency clients send /api/text back to back
+    mixed       the same text load while --audio-concurrency clients flood
+                /api/audio with --audio-seconds clips
+
+and reports text p50/p99 in both, the p99 ratio, audio throughput and how
+many audio requests were shed with 503 QUEUE_FULL.
+
+Built-in configs: "baseline" (no pinning, torch default threads, unbounded
+queues), "isolated" (text and audio pinned to disjoint core sets, audio
+niced and its queue bounded) and "isolated-process" (the same with process
+pools, where each pool also gets its own torch thread budget; in thread mode
+torch's thread count is process-wide). Override or add keys for a config
+with --set isolated:AUDIO_INFER_NICE=15.
+
+    MODE=REAL python scripts/bench_mixed_workload.py --duration 20 --out mixed.json
+
+In MOCK mode audio inference is cheap and the pools barely compete: run with
+MODE=REAL for numbers that mean something.
+"""
+import argparse, asyncio, itertools, os, signal, socket, subprocess, sys, tempfile, time
+from collections import Counter
+from _bench import SERVER_DIR, summarize_ms, wav_bytes, write_report
+
+TEXT = "The meeting was moved again and nobody told me, which is honestly frustrating"
+POOL_KEYS = [f"{m}_{k}" for m in ("TEXT", "AUDIO")
+             for k in ("INFER_CPUS", "TORCH_THREADS", "INFER_NICE", "INFER_QUEUE_MAX")]
+
+def _span(cpus: list[int]) -> str:
+    return ",".join(str(c) for c in cpus)
+
+def builtin_configs(text_share: float, audio_workers: int) -> dict[str, dict]:
+    cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else list(range(os.cpu_count() or 1))
+    n_text = max(1, min(len(cpus) - 1, round(len(cpus) * text_share))) if len(cpus) > 1 else 1
+    text_cpus, audio_cpus = cpus[:n_text], (cpus[n_text:] or cpus)
+    isolated = {
+        "INFER_EXECUTOR": "thread",
+        "TEXT_INFER_CPUS": _span(text_cpus),
+        "AUDIO_INFER_CPUS": _span(audio_cpus),
+        "AUDIO_INFER_NICE": "10",
+        "AUDIO_INFER_QUEUE_MAX": str(2 * audio_workers),
+    }
+    return {
+        "baseline": {**{k: "" for k in POOL_KEYS}, "INFER_EXECUTOR": "thread"},
+        "isolated": isolated,
+        "isolated-process": {**isolated, "INFER_EXECUTOR": "process"},
+    }
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+async def _load(client, path: str, concurrency: int, stop_at: float, payload, counter) -> dict:
+    lat_ms, status = [], Counter()
+
+    async def worker():
+        while time.perf_counter() < stop_at:
+            kwargs = payload(next(counter))
+            t0 = time.perf_counter()
+            try:
+                r = await client.post(path, **kwargs)
+                status[r.status_code] += 1
+            except Exception as e:
+                status[type(e).__name__] += 1
+                continue
+            if r.status_code == 200:
+                lat_ms.append((time.perf_counter() - t0) * 1000.0)
+            elif r.status_code == 503:
+                await asyncio.sleep(0.05)  # shed: back off like a client honoring Retry-After
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return {"concurrency": concurrency, "status": {str(k): v for k, v in status.items()},
+            "throughput_rps": len(lat_ms) / (time.perf_counter() - t0), "latency_ms": summarize_ms(lat_ms)}
+
+async def _phases(base: str, args) -> dict:
+    import httpx
+
+    clip = wav_bytes(args.audio_seconds, args.sample_rate)
+    counter = itertools.count()  # unique inputs: the result cache never answers
+    text = lambda i: {"json": {"text": f"{TEXT} #{i}", "lang": "en"}}
+    audio = lambda i: {"files": {"file": ("bench.wav", clip[:-4] + i.to_bytes(4, "little"), "audio/wav")}}
+    limits = httpx.Limits(max_connections=args.text_concurrency + args.audio_concurrency + 4)
+    async with httpx.AsyncClient(base_url=base, timeout=300, limits=limits) as client:
+        for i in range(args.warmup_requests):
+            await client.post("/api/text", **text(next(counter)))
+            await client.post("/api/audio", **audio(next(counter)))
+
+        alone = await _load(client, "/api/text", args.text_concurrency, time.perf_counter() + args.duration, text, counter)
+        stop_at = time.perf_counter() + args.duration
+        mixed, flood = await asyncio.gather(
+            _load(client, "/api/text", args.text_concurrency, stop_at, text, counter),
+            _load(client, "/api/audio", args.audio_concurrency, stop_at, audio, counter))
+        pools = (await client.get("/api/metrics")).json()["executor"]
+    return {"text_alone": alone, "text_mixed": mixed, "audio_mixed": flood, "executor": pools}
+
+def run_config(name: str, overrides: dict, args) -> dict:
+    port = _free_port()
+    with tempfile.TemporaryDirectory() as td:
+        env = {**os.environ, **overrides, "DATABASE_URL": f"sqlite:///{td}/bench.db",
+               "AUDIO_INFER_WORKERS": str(args.audio_workers), "TEXT_INFER_WORKERS": str(args.text_workers)}
+        env.setdefault("MODE", "MOCK")
+        proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+                                 "--log-level", "warning"], cwd=SERVER_DIR, env=env,
+                                stderr=None if args.verbose else subprocess.DEVNULL)
+        try:
+            import httpx
+            deadline = time.time() + args.ready_timeout
+            while True:
+                if proc.poll() is not None:
+                    raise SystemExit(f"{name}: server exited with {proc.returncode}")
+                try:
+                    if httpx.get(f"http://127.0.0.1:{port}/api/readyz", timeout=2).status_code == 200:
+                        break
+                except httpx.HTTPError:
+                    pass
+                if time.time() > deadline:
+                    raise SystemExit(f"{name}: not ready after {args.ready_timeout}s")
+                time.sleep(0.1)
+            res = asyncio.run(_phases(f"http://127.0.0.1:{port}", args))
+        finally:
+            proc.send_signal(signal.SIGTERM)
+            try:
+                proc.wait(timeout=60)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+    a, m = res["text_alone"]["latency_ms"], res["text_mixed"]["latency_ms"]
+    res["text_p99_ratio"] = (m["p99"] / a["p99"]) if a["p99"] and m["p99"] else None
+    return {"config": name, "env": {k: v for k, v in overrides.items() if v}, **res}
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--configs", default="baseline,isolated,isolated-process")
+    ap.add_argument("--set", action="append", default=[], metavar="CONFIG:KEY=VALUE",
+                    help="env override for one config (new config names are allowed)")
+    ap.add_argument("--text-share", type=float, default=0.5, help="share of the cores pinned to text in 'isolated'")
+    ap.add_argument("--text-workers", type=int, default=4)
+    ap.add_argument("--audio-workers", type=int, default=2)
+    ap.add_argument("--text-concurrency", type=int, default=4)
+    ap.add_argument("--audio-concurrency", type=int, default=16)
+    ap.add_argument("--audio-seconds", type=float, default=10.0)
+    ap.add_argument("--sample-rate", type=int, default=16000)
+    ap.add_argument("--duration", type=float, default=10.0, help="seconds per phase")
+    ap.add_argument("--warmup-requests", type=int, default=5)
+    ap.add_argument("--ready-timeout", type=float, default=300.0)
+    ap.add_argument("--verbose", action="store_true", help="show the server's stderr")
+    ap.add_argument("--out", default=None)
+    args = ap.parse_args()
+
+    configs = builtin_configs(args.text_share, args.audio_workers)
+    for item in args.set:
+        name, _, kv = item.partition(":")
+        key, _, value = kv.partition("=")
+        configs.setdefault(name, {})[key] = value
+
+    results = []
+    for name in args.configs.split(","):
+        res = run_config(name, configs.get(name, {}), args)
+        a, m = res["text_alone"]["latency_ms"], res["text_mixed"]["latency_ms"]
+        flood = res["audio_mixed"]
+        ratio = f"{res['text_p99_ratio']:.2f}x" if res["text_p99_ratio"] else "n/a"
+        print(f"{name:>10}: text p99 {a['p99'] or 0:.1f} -> {m['p99'] or 0:.1f} ms under audio load ({ratio}), "
+              f"p50 {a['p50'] or 0:.1f} -> {m['p50'] or 0:.1f} ms; audio {flood['throughput_rps']:.1f} req/s, "
+              f"shed {flood['status'].get('503', 0)}")
+        results.append(res)
+    write_report({"benchmark": "mixed_workload", "mode": os.getenv("MODE", "MOCK"),
+                  "config": {k: v for k, v in vars(args).items() if k != "set"}, "results": results}, args.out)
+
+if __name__ == "__main__":
+    main()
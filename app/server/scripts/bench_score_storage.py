@@ -0,0 +1,113 @@
+"""
+Size and throughput of the score storage forms (SCORES_STORAGE=json|packed|topk).
+Each form runs in a fresh subprocess on its own database: inserts --rows
+predictions with GoEmotions-sized (28 labels) or audio-sized (8) score vectors
+in --batch-row transactions, then reads them back as a [N, L] matrix through
+utils.score_codec.score_matrices.
+
+    python scripts/bench_score_storage.py --rows 100000 --out score_storage.json
+"""
+import argparse, json, os, random, subprocess, sys, tempfile, time
+from datetime import datetime, timedelta
+from uuid import uuid4
+from _bench import use_server_imports, write_report
+
+TEXT_LABELS = [f"text_label_{i}" for i in range(28)]
+AUDIO_LABELS = [f"audio_label_{i}" for i in range(8)]
+
+def run_child(args) -> dict:
+    use_server_imports()
+    import numpy as np
+    from sqlalchemy import insert, func, select
+    from utils.db import engine, SessionLocal, ReadSessionLocal
+    from utils.migrations import run_migrations
+    from utils.models import Prediction
+    from utils.score_codec import score_storage, score_matrices
+
+    run_migrations(engine)
+    rnd = random.Random(0)
+    now = datetime.utcnow()
+
+    def row():
+        m = "text" if rnd.random() < 0.7 else "audio"
+        labels = TEXT_LABELS if m == "text" else AUDIO_LABELS
+        v = np.random.default_rng(rnd.randrange(1 << 30)).dirichlet(np.ones(len(labels)))
+        scores = {lbl: float(x) for lbl, x in zip(labels, v)}
+        top = max(scores, key=scores.get)
+        meta = {"name": f"{m}-bench", "version": "v1"}
+        return {
+            "prediction_id": str(uuid4()), "created_at": now - timedelta(seconds=rnd.randrange(86400)),
+            "modality": m, "text_len": 40 if m == "text" else None, "lang": "en" if m == "text" else None,
+            "duration_sec": 3.0 if m == "audio" else None, "sample_rate": 16000 if m == "audio" else None,
+            "model_name": meta["name"], "model_version": meta["version"], "top_label": top,
+            "confidence": scores[top], **score_storage.columns(scores, meta), "processing_ms": 10,
+            "input_hash": f"{rnd.randrange(1 << 32):08x}",
+        }
+
+    build_s = insert_s = 0.0
+    for start in range(0, args.rows, args.batch):
+        t0 = time.perf_counter()
+        rows = [row() for _ in range(min(args.batch, args.rows - start))]
+        t1 = time.perf_counter()
+        with SessionLocal() as db:
+            db.execute(insert(Prediction), rows)
+            db.commit()
+        build_s += t1 - t0
+        insert_s += time.perf_counter() - t1
+
+    with engine.connect() as conn:
+        conn.exec_driver_sql("VACUUM")
+        pages = conn.exec_driver_sql("PRAGMA page_count").scalar()
+        page_size = conn.exec_driver_sql("PRAGMA page_size").scalar()
+    with ReadSessionLocal() as db:
+        score_bytes = db.scalar(select(func.sum(func.coalesce(func.length(Prediction.scores_blob), 0)
+                                                + func.coalesce(func.length(Prediction.scores), 0))))
+        t0 = time.perf_counter()
+        groups = score_matrices(db)
+        read_s = time.perf_counter() - t0
+
+    return {
+        "storage": score_storage.mode,
+        "top_k": score_storage.top_k if score_storage.mode == "topk" else None,
+        "score_bytes_per_row": score_bytes / args.rows,
+        "db_mb": pages * page_size / 2**20,
+        "encode_rows_per_s": args.rows / build_s,
+        "insert_rows_per_s": args.rows / insert_s,
+        "matrix_read_rows_per_s": args.rows / read_s,
+        "matrix_shapes": [list(g["scores"].shape) for g in groups],
+    }
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--storages", default="json,packed,topk")
+    ap.add_argument("--rows", type=int, default=50000)
+    ap.add_argument("--batch", type=int, default=500, help="rows per INSERT transaction")
+    ap.add_argument("--top-k", type=int, default=5)
+    ap.add_argument("--out", default=None)
+    ap.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(args)))
+        return
+
+    results = []
+    for storage in args.storages.split(","):
+        with tempfile.TemporaryDirectory() as td:
+            env = {**os.environ, "SCORES_STORAGE": storage, "SCORES_TOP_K": str(args.top_k),
+                   "DATABASE_URL": f"sqlite:///{td}/scores.db"}
+            cmd = [sys.executable, os.path.abspath(__file__), "--child",
+                   "--rows", str(args.rows), "--batch", str(args.batch)]
+            out = subprocess.run(cmd, env=env, capture_output=True, text=True)
+            if out.returncode != 0:
+                print(out.stderr, file=sys.stderr)
+                raise SystemExit(f"storage {storage} failed")
+            res = json.loads(out.stdout.strip().splitlines()[-1])
+            print(f"{storage:>7}: {res['score_bytes_per_row']:.0f} B/row scores, DB {res['db_mb']:.1f} MB, "
+                  f"insert {res['insert_rows_per_s']:.0f} rows/s, matrix read {res['matrix_read_rows_per_s']:.0f} rows/s")
+            results.append(res)
+
+    write_report({"config": {k: v for k, v in vars(args).items() if k != "child"}, "results": results}, args.out)
+
+if __name__ == "__main__":
+    main()
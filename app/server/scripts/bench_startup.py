@@ -0,0 +1,83 @@
+"""
+Startup cost of the app per MODE: wall time and RSS to `import main` in a fresh
+interpreter, plus (REAL) the time and RSS to load the text and audio models.
+--eager-ml imports torch/torchaudio/transformers before main, which is what
+every process paid when the adapters imported them at module level.
+
+    python scripts/bench_startup.py --modes MOCK,REAL --repeat 5 --out startup.json
+    python scripts/bench_startup.py --modes MOCK --eager-ml      # the old import cost, for comparison
+"""
+import argparse, json, os, subprocess, sys, tempfile
+from _bench import SERVER_DIR, summarize_ms, write_report
+
+HEAVY = ("torch", "torchaudio", "transformers", "onnxruntime")
+
+CHILD = r"""
+import json, sys, time
+
+def rss_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024.0
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+out = {"rss_start_mb": rss_mb()}
+t0 = time.perf_counter()
+if EAGER_ML:
+    import torch, torchaudio, transformers
+import main
+out["import_ms"] = (time.perf_counter() - t0) * 1000.0
+out["rss_import_mb"] = rss_mb()
+out["heavy_modules"] = sorted(m for m in HEAVY if m in sys.modules)
+if LOAD_MODELS:
+    from utils.model_adapters import get_text_meta, get_audio_meta
+    t0 = time.perf_counter()
+    out["text_model"] = get_text_meta()
+    out["audio_model"] = get_audio_meta()
+    out["load_models_ms"] = (time.perf_counter() - t0) * 1000.0
+    out["rss_loaded_mb"] = rss_mb()
+print(json.dumps(out))
+"""
+
+def run_once(mode: str, eager_ml: bool, load_models: bool) -> dict:
+    code = f"HEAVY = {HEAVY!r}\nEAGER_ML = {eager_ml}\nLOAD_MODELS = {load_models}\n" + CHILD
+    with tempfile.TemporaryDirectory() as td:
+        env = {**os.environ, "MODE": mode, "DATABASE_URL": f"sqlite:///{td}/startup.db"}
+        out = subprocess.run([sys.executable, "-c", code], cwd=SERVER_DIR, env=env, capture_output=True, text=True)
+    if out.returncode != 0:
+        print(out.stderr, file=sys.stderr)
+        raise SystemExit(f"MODE={mode} child failed")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--modes", default="MOCK,REAL")
+    ap.add_argument("--repeat", type=int, default=5, help="fresh interpreters per mode")
+    ap.add_argument("--eager-ml", action="store_true", help="import the ML stacks before main (old behaviour)")
+    ap.add_argument("--out", default=None)
+    args = ap.parse_args()
+
+    results = []
+    for mode in args.modes.split(","):
+        runs = [run_once(mode, args.eager_ml, mode == "REAL") for _ in range(args.repeat)]
+        row = {
+            "mode": mode,
+            "import_ms": summarize_ms([r["import_ms"] for r in runs]),
+            "rss_import_mb": max(r["rss_import_mb"] for r in runs),
+            "heavy_modules_after_import": runs[-1]["heavy_modules"],
+        }
+        if mode == "REAL":
+            row["load_models_ms"] = summarize_ms([r["load_models_ms"] for r in runs])
+            row["rss_loaded_mb"] = max(r["rss_loaded_mb"] for r in runs)
+            row["models"] = {"text": runs[-1]["text_model"], "audio": runs[-1]["audio_model"]}
+        results.append(row)
+        extra = (f", load models p50 {row['load_models_ms']['p50']:.0f} ms, RSS {row['rss_loaded_mb']:.0f} MB"
+                 if mode == "REAL" else "")
+        print(f"{mode:>5}: import main p50 {row['import_ms']['p50']:.0f} ms, RSS {row['rss_import_mb']:.0f} MB{extra}")
+
+    write_report({"config": vars(args), "results": results}, args.out)
+
+if __name__ == "__main__":
+    main()
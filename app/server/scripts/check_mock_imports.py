@@ -0,0 +1,52 @@
+"""
+Guard: in MOCK mode the app must not import the ML stacks. Imports main (all
+routes), runs one mock text, bulk-text, audio and stream-window prediction,
+then fails if torch / torchaudio / transformers / onnxruntime ended up in
+sys.modules. Runs in a fresh interpreter on a throwaway database.
+
+    python scripts/check_mock_imports.py
+"""
+import json, os, subprocess, sys, tempfile
+from _bench import SERVER_DIR
+
+HEAVY = ("torch", "torchaudio", "transformers", "onnxruntime")
+
+CHILD = r"""
+import io, json, sys, wave
+import numpy as np
+import main
+from utils.audio_utils import decode_wav
+from utils.model_adapters import (
+    predict_text, predict_text_batch, predict_audio, predict_audio_window, peek_text_meta, peek_audio_meta,
+)
+
+peek_text_meta(); peek_audio_meta()
+predict_text("what a lovely day", "en")
+predict_text_batch(["good", "bad"], ["en", None])
+buf = io.BytesIO()
+with wave.open(buf, "wb") as w:
+    w.setnchannels(1); w.setsampwidth(2); w.setframerate(16000)
+    w.writeframes(np.zeros(16000, dtype="<i2").tobytes())
+wav = decode_wav(buf.getvalue())
+predict_audio(wav=wav, duration=wav.duration, sample_rate=wav.sample_rate)
+predict_audio_window(np.zeros(32000, dtype=np.float32))
+print(json.dumps(sorted(m for m in HEAVY if m in sys.modules)))
+"""
+
+def main():
+    with tempfile.TemporaryDirectory() as td:
+        env = {**os.environ, "MODE": "MOCK", "DATABASE_URL": f"sqlite:///{td}/check.db"}
+        out = subprocess.run([sys.executable, "-c", f"HEAVY = {HEAVY!r}\n" + CHILD],
+                             cwd=SERVER_DIR, env=env, capture_output=True, text=True)
+    if out.returncode != 0:
+        print(out.stderr, file=sys.stderr)
+        raise SystemExit("MOCK-mode import check crashed")
+    loaded = json.loads(out.stdout.strip().splitlines()[-1])
+    if loaded:
+        print(f"FAIL: MOCK mode imported {', '.join(loaded)}")
+        print(f"Find the importer with: MODE=MOCK python -X importtime -c 'import main' 2>&1 | grep -E '{'|'.join(loaded)}'")
+        raise SystemExit(1)
+    print(f"ok: MOCK mode imports none of {', '.join(HEAVY)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Runs compute_analytics (raw and rollup paths) for a few parameter sets,
+captures every SELECT it issues and prints SQLite's EXPLAIN QUERY PLAN for
+each. Exits non-zero if a query reads the predictions or feedback table by a
+full table scan instead of an index.
+
+    python scripts/check_query_plans.py              # uses DATABASE_URL / data/app.db
+    python scripts/check_query_plans.py --verbose    # print every plan
+"""
+import argparse, re
+from _bench import use_server_imports
+
+use_server_imports()
+from sqlalchemy import event
+from utils.db import engine, read_engine, ReadSessionLocal
+from utils.migrations import run_migrations
+from utils.analytics import compute_analytics
+
+# "SCAN predictions" / "SCAN feedback AS f" without "USING [COVERING] INDEX"
+FULL_SCAN = re.compile(r"\bSCAN (predictions|feedback)\b(?: AS \w+)?$")
+
+def capture(fn):
+    statements = []
+
+    def before(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and not executemany:
+            statements.append((statement, parameters))
+
+    engines = {engine, read_engine}
+    for e in engines:
+        event.listen(e, "before_cursor_execute", before)
+    try:
+        fn()
+    finally:
+        for e in engines:
+            event.remove(e, "before_cursor_execute", before)
+    return statements
+
+def explain(statement, parameters) -> list[str]:
+    with read_engine.connect() as conn:
+        rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+    return [r[-1] for r in rows]
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--verbose", action="store_true")
+    args = ap.parse_args()
+    if engine.dialect.name != "sqlite":
+        raise SystemExit("EXPLAIN QUERY PLAN check is SQLite-only")
+    run_migrations(engine)
+
+    grid = [
+        dict(since_days=d, modality=m, use_rollups=r)
+        for d in (None, 7, 30)
+        for m in (None, "text", "audio")
+        for r in (False, True)
+    ]
+    seen, offenders = set(), []
+    for params in grid:
+        def run():
+            with ReadSessionLocal() as db:
+                compute_analytics(db, **params)
+        for statement, parameters in capture(run):
+            if statement in seen:
+                continue
+            seen.add(statement)
+            plan = explain(statement, parameters)
+            scans = [line for line in plan if FULL_SCAN.search(line)]
+            if scans:
+                offenders.append((params, statement, plan))
+            if args.verbose or scans:
+                print("-" * 80)
+                print(("FULL SCAN  " if scans else "ok  ") + " ".join(statement.split())[:300])
+                for line in plan:
+                    print("    " + line)
+
+    print(f"{len(seen) - len(offenders)}/{len(seen)} distinct analytics queries use indexes")
+    raise SystemExit(1 if offenders else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Accuracy + latency check for the text backends (TEXT_BACKEND) on the GoEmotions
+test split. Scores are computed the way the training notebook evaluated the
+model (normalize_text, max_length=128, sigmoid, per-class thresholds from
+ai/models/text/eval_test/inference_config.json), so the torch row should land
+on eval_test/metrics_overall.json. Exits non-zero if a backend's micro- or
+macro-F1 falls more than --max-f1-drop below torch FP32.
+
+    python scripts/check_text_parity.py --data goemotions/test.tsv
+    python scripts/check_text_parity.py --data <save_to_disk dir> --backends torch,torch-int8,onnx --out parity.json
+
+--data: GoEmotions test.tsv (text <tab> comma-separated label ids <tab> id),
+a .jsonl with {"text", "labels": [ids]}, or a `datasets` save_to_disk dir
+(its "test" split). The split itself is not shipped with the repo.
+"""
+import argparse, json, os, re, time
+from pathlib import Path
+from _bench import use_server_imports, summarize_ms, write_report
+
+use_server_imports()
+import numpy as np
+from utils.model_adapters import build_text_logits, _resolve_path, TEXT_BACKENDS
+
+EVAL_DIR = Path(__file__).resolve().parents[3] / "ai" / "models" / "text" / "eval_test"
+
+def normalize_text(text: str) -> str:
+    # as in ai/notebooks/text_emotion_data_prep.ipynb
+    text = text.lower()
+    text = re.sub(r"[^a-zA-Z0-9\s]", "", text)
+    return text.strip()
+
+def load_split(path: str, num_labels: int) -> tuple[list[str], np.ndarray]:
+    texts, label_ids = [], []
+    p = Path(path)
+    if p.is_dir():
+        from datasets import load_from_disk
+        ds = load_from_disk(str(p))
+        ds = ds["test"] if "test" in ds else ds
+        texts, label_ids = list(ds["text"]), list(ds["labels"])
+    elif p.suffix == ".jsonl":
+        for line in p.read_text().splitlines():
+            if line.strip():
+                d = json.loads(line)
+                texts.append(d["text"])
+                label_ids.append(d["labels"])
+    else:
+        for line in p.read_text().splitlines():
+            parts = line.split("\t")
+            if len(parts) >= 2:
+                texts.append(parts[0])
+                label_ids.append([int(x) for x in parts[1].split(",") if x])
+    y = np.zeros((len(texts), num_labels), dtype=bool)
+    for i, ids in enumerate(label_ids):
+        y[i, ids] = True
+    return [normalize_text(t) for t in texts], y
+
+def thresholds() -> np.ndarray:
+    cfg = json.loads((EVAL_DIR / "inference_config.json").read_text())
+    if cfg.get("use_per_class"):
+        thr = np.asarray(cfg["per_class_thresholds"], dtype=np.float32)
+    else:
+        num_labels = len(json.loads((EVAL_DIR.parent / "labels.json").read_text()))
+        thr = np.full(num_labels, cfg["threshold"], dtype=np.float32)
+    return np.maximum(thr, cfg.get("prob_floor", 0.0))
+
+def f1_metrics(y: np.ndarray, pred: np.ndarray) -> dict:
+    tp = (y & pred).sum(axis=0).astype(float)
+    fp = (~y & pred).sum(axis=0).astype(float)
+    fn = (y & ~pred).sum(axis=0).astype(float)
+    micro = 2 * tp.sum() / max(1.0, 2 * tp.sum() + fp.sum() + fn.sum())
+    denom = 2 * tp + fp + fn
+    macro = float(np.mean(np.where(denom > 0, 2 * tp / np.maximum(denom, 1), 0.0)))
+    return {"micro/f1": float(micro), "macro/f1": macro,
+            "subset_accuracy": float((y == pred).all(axis=1).mean())}
+
+def run_backend(model_dir: str, backend: str, texts: list[str], batch_size: int):
+    logits_fn = build_text_logits(model_dir, backend, max_length=128)
+    logits_fn(texts[:batch_size])  # warm-up
+    chunks, batch_ms = [], []
+    for i in range(0, len(texts), batch_size):
+        t0 = time.perf_counter()
+        chunks.append(logits_fn(texts[i:i + batch_size]))
+        batch_ms.append((time.perf_counter() - t0) * 1000.0)
+    single_ms = []
+    for t in texts[:100]:
+        t0 = time.perf_counter()
+        logits_fn([t])
+        single_ms.append((time.perf_counter() - t0) * 1000.0)
+    return np.concatenate(chunks), summarize_ms(batch_ms), summarize_ms(single_ms)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--data", required=True, help="test split: .tsv, .jsonl or save_to_disk dir")
+    ap.add_argument("--model-dir", default=os.getenv("TEXT_MODEL_DIR"))
+    ap.add_argument("--backends", default="torch,torch-int8,onnx")
+    ap.add_argument("--batch-size", type=int, default=32)
+    ap.add_argument("--limit", type=int, default=0, help="only the first N examples (0 = all)")
+    ap.add_argument("--max-f1-drop", type=float, default=0.01)
+    ap.add_argument("--out", default=None)
+    args = ap.parse_args()
+
+    model_dir = _resolve_path(args.model_dir)
+    if not (model_dir and os.path.isdir(model_dir)):
+        raise SystemExit(f"--model-dir / TEXT_MODEL_DIR invalid: {model_dir}")
+    backends = args.backends.split(",")
+    unknown = [b for b in backends if b not in TEXT_BACKENDS]
+    if unknown:
+        raise SystemExit(f"unknown backends {unknown}; use {sorted(TEXT_BACKENDS)}")
+    if "torch" not in backends:
+        backends.insert(0, "torch")  # the FP32 reference
+
+    thr = thresholds()
+    texts, y = load_split(args.data, len(thr))
+    if args.limit:
+        texts, y = texts[:args.limit], y[:args.limit]
+    recorded = json.loads((EVAL_DIR / "metrics_overall.json").read_text())
+
+    results, ref_probs, ref_metrics = [], None, None
+    for backend in backends:
+        logits, batch_ms, single_ms = run_backend(model_dir, backend, texts, args.batch_size)
+        probs = 1.0 / (1.0 + np.exp(-logits))
+        metrics = f1_metrics(y, probs >= thr)
+        row = {"backend": backend, **metrics, "batch_ms": batch_ms, "single_ms": single_ms}
+        if ref_probs is None:
+            ref_probs, ref_metrics = probs, metrics
+            row["vs_recorded"] = {k: metrics[k] - recorded[k] for k in metrics}
+        else:
+            row["argmax_agreement"] = float((probs.argmax(1) == ref_probs.argmax(1)).mean())
+            row["max_prob_diff"] = float(np.abs(probs - ref_probs).max())
+            row["f1_drop"] = {k: ref_metrics[k] - metrics[k] for k in ("micro/f1", "macro/f1")}
+        results.append(row)
+        print(f"{backend:>10}: micro-F1 {metrics['micro/f1']:.4f}  macro-F1 {metrics['macro/f1']:.4f}  "
+              f"subset-acc {metrics['subset_accuracy']:.4f}  single p50 {single_ms['p50']:.1f} ms  "
+              f"batch{args.batch_size} p50 {batch_ms['p50']:.1f} ms")
+
+    failed = [r["backend"] for r in results if max(r.get("f1_drop", {}).values(), default=0.0) > args.max_f1_drop]
+    write_report({
+        "config": vars(args),
+        "num_samples": len(texts),
+        "recorded": {k: recorded[k] for k in ("micro/f1", "macro/f1", "subset_accuracy")},
+        "results": results,
+        "failed": failed,
+    }, args.out)
+    if failed:
+        print(f"F1 drop above {args.max_f1_drop} for: {', '.join(failed)}")
+    raise SystemExit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
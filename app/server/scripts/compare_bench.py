@@ -0,0 +1,71 @@
+"""
+Compares two JSON reports of the same benchmark script (e.g. from two
+commits): every latency summary (a dict with p50/p95) found at the same path
+in both, with the relative change. Exits 1 if any p50 got slower by more
+than --fail-above percent, so it can gate a CI job.
+
+    python scripts/bench_http.py --out base.json        # on main
+    python scripts/bench_http.py --out head.json        # on the branch
+    python scripts/compare_bench.py base.json head.json --fail-above 15
+"""
+import argparse, json
+
+# fields that identify an entry in a list of results, in path order
+LIST_KEYS = ("scale", "endpoint", "concurrency", "storage", "profile", "input_sr", "mode", "since_days", "modality")
+
+def _summaries(node, path: str, out: dict):
+    if isinstance(node, dict):
+        if "p50" in node and "p95" in node:
+            out[path] = node
+            return
+        if "p50_ms" in node:  # /api/metrics "latency" histograms
+            out[path] = {"p50": node["p50_ms"], "p95": node["p95_ms"]}
+            return
+        for k, v in node.items():
+            if k != "machine":
+                _summaries(v, f"{path}.{k}" if path else k, out)
+    elif isinstance(node, list):
+        for i, v in enumerate(node):
+            key = "/".join(f"{k}={v[k]}" for k in LIST_KEYS if isinstance(v, dict) and k in v) or str(i)
+            _summaries(v, f"{path}[{key}]", out)
+
+def _pct(old, new):
+    if old in (None, 0) or new is None:
+        return None
+    return (new - old) / old * 100.0
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("base")
+    ap.add_argument("head")
+    ap.add_argument("--fail-above", type=float, default=None, help="max allowed p50 slowdown in percent")
+    args = ap.parse_args()
+
+    reports = []
+    for p in (args.base, args.head):
+        with open(p) as f:
+            reports.append(json.load(f))
+    base, head = {}, {}
+    _summaries(reports[0], "", base)
+    _summaries(reports[1], "", head)
+
+    print(f"base {reports[0].get('machine', {}).get('git_commit')}  ->  head {reports[1].get('machine', {}).get('git_commit')}")
+    regressions = []
+    for path in sorted(base.keys() & head.keys()):
+        b, h = base[path], head[path]
+        d50, d95 = _pct(b["p50"], h["p50"]), _pct(b["p95"], h["p95"])
+        if d50 is None:
+            continue
+        p95 = f"p95 {b['p95']:9.3f} -> {h['p95']:9.3f} ms ({d95:+6.1f}%)" if d95 is not None else ""
+        print(f"{path:<60} p50 {b['p50']:9.3f} -> {h['p50']:9.3f} ms ({d50:+6.1f}%)   {p95}")
+        # server-side histogram quantiles are bucket interpolations: shown, never gated
+        if args.fail_above is not None and d50 > args.fail_above and not path.startswith("server_latency"):
+            regressions.append(path)
+    for path in sorted(base.keys() ^ head.keys()):
+        print(f"{path:<60} only in {'base' if path in base else 'head'}")
+
+    if regressions:
+        raise SystemExit(f"{len(regressions)} p50 regression(s) above {args.fail_above}%: " + ", ".join(regressions))
+
+if __name__ == "__main__":
+    main()
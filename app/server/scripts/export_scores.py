@@ -0,0 +1,47 @@
+"""
+Exports stored score vectors as NumPy arrays, one group per label set
+(model version + label order), whatever form the rows are stored in.
+
+    python scripts/export_scores.py --out scores.npz
+    python scripts/export_scores.py --modality text --days 30 --out text_30d.npz
+
+In the .npz, group i is scores_i [N, L] float32, ids_i [N], labels_i [L],
+and meta_i = "model_name model_version".
+"""
+import argparse
+from datetime import datetime, timedelta
+from _bench import use_server_imports
+
+use_server_imports()
+import numpy as np
+from utils.db import ReadSessionLocal
+from utils.models import Prediction
+from utils.score_codec import score_matrices
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--modality", choices=("text", "audio"), default=None)
+    ap.add_argument("--days", type=int, default=None)
+    ap.add_argument("--out", required=True)
+    args = ap.parse_args()
+
+    where = []
+    if args.modality:
+        where.append(Prediction.modality == args.modality)
+    if args.days:
+        where.append(Prediction.created_at >= datetime.utcnow() - timedelta(days=args.days))
+    with ReadSessionLocal() as db:
+        groups = score_matrices(db, *where)
+
+    arrays = {}
+    for i, g in enumerate(groups):
+        arrays[f"scores_{i}"] = g["scores"]
+        arrays[f"ids_{i}"] = np.asarray(g["prediction_ids"])
+        arrays[f"labels_{i}"] = np.asarray(g["labels"])
+        arrays[f"meta_{i}"] = np.asarray(f"{g['model_name']} {g['model_version']}")
+        print(f"{g['model_name']} {g['model_version']}: {g['scores'].shape[0]} rows x {g['scores'].shape[1]} labels")
+    np.savez_compressed(args.out, **arrays)
+    print(f"Saved: {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Exports the BERT text model (TEXT_MODEL_DIR) to ONNX for TEXT_BACKEND=onnx.
+Batch and sequence axes are dynamic, so the server's padded micro-batches run
+as-is. --quantize additionally writes a dynamically int8-quantized graph.
+Needs `pip install onnx onnxruntime` on top of requirements.txt.
+
+    python scripts/export_text_onnx.py                     # -> $TEXT_MODEL_DIR/model.onnx
+    python scripts/export_text_onnx.py --quantize          # + model.int8.onnx
+    TEXT_BACKEND=onnx TEXT_ONNX_PATH=<...>/model.int8.onnx uvicorn main:app
+"""
+import argparse, os
+from pathlib import Path
+from _bench import use_server_imports
+
+use_server_imports()
+import numpy as np
+import torch
+from dotenv import load_dotenv
+from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+def main():
+    load_dotenv()
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--model-dir", default=os.getenv("TEXT_MODEL_DIR"))
+    ap.add_argument("--out", default=None, help="default: <model-dir>/model.onnx")
+    ap.add_argument("--opset", type=int, default=17)
+    ap.add_argument("--quantize", action="store_true", help="also write <out>.int8.onnx (onnxruntime dynamic int8)")
+    args = ap.parse_args()
+
+    from utils.model_adapters import _resolve_path
+    model_dir = _resolve_path(args.model_dir)
+    if not (model_dir and os.path.isdir(model_dir)):
+        raise SystemExit(f"--model-dir / TEXT_MODEL_DIR invalid: {model_dir}")
+    out = Path(args.out or Path(model_dir) / "model.onnx")
+
+    tok = AutoTokenizer.from_pretrained(model_dir)
+    mdl = AutoModelForSequenceClassification.from_pretrained(model_dir)
+    mdl.eval()
+    mdl.config.return_dict = False  # plain tuple outputs trace cleanly
+
+    sample = tok(["I am so happy for you!", "ok"], return_tensors="pt", padding=True)
+    input_names = [k for k in ("input_ids", "attention_mask", "token_type_ids") if k in sample]
+    dynamic = {k: {0: "batch", 1: "seq"} for k in input_names}
+    dynamic["logits"] = {0: "batch"}
+    with torch.no_grad():
+        torch.onnx.export(
+            mdl, tuple(sample[k] for k in input_names), str(out),
+            input_names=input_names, output_names=["logits"], dynamic_axes=dynamic,
+            opset_version=args.opset, do_constant_folding=True,
+        )
+    print(f"Saved: {out}")
+
+    # sanity: ONNX Runtime must reproduce the PyTorch logits on the sample batch
+    import onnxruntime as ort
+    sess = ort.InferenceSession(str(out), providers=["CPUExecutionProvider"])
+    with torch.no_grad():
+        ref = mdl(**sample)[0].numpy()
+    got = sess.run(None, {k: sample[k].numpy().astype(np.int64) for k in input_names})[0]
+    print(f"max |logit diff| vs PyTorch: {float(np.abs(ref - got).max()):.2e}")
+
+    if args.quantize:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        q_out = out.with_suffix(".int8.onnx")
+        quantize_dynamic(str(out), str(q_out), weight_type=QuantType.QInt8)
+        print(f"Saved: {q_out}")
+    print("Check accuracy before serving: python scripts/check_text_parity.py --data <test split>")
+
+if __name__ == "__main__":
+    main()
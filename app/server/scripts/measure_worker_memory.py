@@ -0,0 +1,150 @@
+"""
+Per-worker memory of the multi-worker server, with and without model sharing.
+Starts serve.py with --workers N twice: preloaded before fork (weights shared
+copy-on-write) and with --no-preload (each worker loads its own copy). Once
+every worker reports ready and has served some traffic, it reads
+/proc/<pid>/smaps_rollup for the parent and each worker:
+
+    rss      resident pages, shared ones counted in full in every process
+    private  pages only this process maps (USS): what one more worker costs
+    pss      shared pages split between the processes mapping them;
+             summed over all processes = what the server really uses
+
+    MODE=REAL python scripts/measure_worker_memory.py --workers 4 --out worker_memory.json
+
+Linux only. Uses MODE and the model env from the environment / .env.
+"""
+import argparse, json, os, signal, socket, subprocess, sys, time, urllib.request
+from _bench import SERVER_DIR, wav_bytes, write_report
+
+FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty")
+
+def smaps(pid: int) -> dict:
+    vals = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            if key in FIELDS:
+                vals[key] = int(rest.split()[0]) / 1024.0  # kB -> MB
+    return {
+        "pid": pid,
+        "rss_mb": round(vals["Rss"], 1),
+        "pss_mb": round(vals["Pss"], 1),
+        "private_mb": round(vals["Private_Clean"] + vals["Private_Dirty"], 1),
+        "shared_mb": round(vals["Shared_Clean"] + vals["Shared_Dirty"], 1),
+    }
+
+def children_of(pid: int) -> list[int]:
+    out = []
+    for tid in os.listdir(f"/proc/{pid}/task"):
+        try:
+            with open(f"/proc/{pid}/task/{tid}/children") as f:
+                out += [int(x) for x in f.read().split()]
+        except FileNotFoundError:
+            pass
+    return sorted(out)
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def _get(url: str, timeout: float = 5.0):
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as r:
+            return r.status, json.loads(r.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read() or b"{}")
+    except (OSError, ValueError):
+        return None, None
+
+def _post(url: str, body: bytes, content_type: str):
+    req = urllib.request.Request(url, data=body, headers={"Content-Type": content_type}, method="POST")
+    with urllib.request.urlopen(req, timeout=120) as r:
+        r.read()
+
+def _multipart(blob: bytes) -> tuple[bytes, str]:
+    boundary = "benchboundary"
+    body = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"a.wav\"\r\n"
+            f"Content-Type: audio/wav\r\n\r\n").encode() + blob + f"\r\n--{boundary}--\r\n".encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+def run_config(name: str, preload: bool, args) -> dict:
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}/api"
+    cmd = [sys.executable, str(SERVER_DIR / "serve.py"), "--workers", str(args.workers), "--host", "127.0.0.1",
+           "--port", str(port), "--log-level", "warning"]
+    if not preload:
+        cmd.append("--no-preload")
+    env = {**os.environ, "INFER_EXECUTOR": "thread"}
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(cmd, cwd=SERVER_DIR, env=env, stderr=subprocess.DEVNULL if not args.verbose else None)
+    try:
+        # ready = every worker pid has answered /readyz with 200 at least once
+        ready_pids, deadline = set(), time.time() + args.ready_timeout
+        while time.time() < deadline:
+            if proc.poll() is not None:
+                raise SystemExit(f"{name}: server exited with {proc.returncode}")
+            status, body = _get(f"{base}/readyz")
+            if status == 200:
+                ready_pids |= {m.get("pid") for m in body.get("models", {}).values()}
+                if len(ready_pids & set(children_of(proc.pid))) >= args.workers:
+                    break
+            time.sleep(0.05)
+        else:
+            print(f"{name}: only {len(ready_pids)} of {args.workers} workers seen ready; measuring anyway", file=sys.stderr)
+        ready_s = time.perf_counter() - t0
+
+        # some traffic, so per-worker activations and caches are allocated
+        clip, ctype = _multipart(wav_bytes(3.0, 16000))
+        for i in range(args.requests):
+            _post(f"{base}/text", json.dumps({"text": f"memory probe {i}"}).encode(), "application/json")
+            _post(f"{base}/audio", clip[:-40] + i.to_bytes(4, "little") + clip[-36:], ctype)
+        time.sleep(args.settle)
+
+        parent = smaps(proc.pid)
+        workers = [smaps(pid) for pid in children_of(proc.pid)]
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        try:
+            proc.wait(timeout=60)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+    total_pss = parent["pss_mb"] + sum(w["pss_mb"] for w in workers)
+    return {
+        "config": name,
+        "workers": len(workers),
+        "ready_s": round(ready_s, 2),
+        "parent": parent,
+        "per_worker": workers,
+        "avg_worker_private_mb": round(sum(w["private_mb"] for w in workers) / max(1, len(workers)), 1),
+        "avg_worker_rss_mb": round(sum(w["rss_mb"] for w in workers) / max(1, len(workers)), 1),
+        "total_pss_mb": round(total_pss, 1),
+    }
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--configs", default="shared,per-worker")
+    ap.add_argument("--requests", type=int, default=20, help="text + audio requests sent before measuring")
+    ap.add_argument("--settle", type=float, default=2.0, help="seconds to wait after the traffic")
+    ap.add_argument("--ready-timeout", type=float, default=600.0)
+    ap.add_argument("--verbose", action="store_true", help="show the server's stderr")
+    ap.add_argument("--out", default=None)
+    args = ap.parse_args()
+    if not os.path.exists("/proc/self/smaps_rollup"):
+        raise SystemExit("needs Linux /proc/<pid>/smaps_rollup")
+
+    results = []
+    for name in args.configs.split(","):
+        res = run_config(name, preload=(name == "shared"), args=args)
+        print(f"{name:>10}: {res['workers']} workers, private {res['avg_worker_private_mb']:.0f} MB/worker, "
+              f"RSS {res['avg_worker_rss_mb']:.0f} MB/worker, total PSS {res['total_pss_mb']:.0f} MB "
+              f"(ready in {res['ready_s']:.1f}s)")
+        results.append(res)
+    write_report({"benchmark": "worker_memory", "mode": os.getenv("MODE", "MOCK"), "workers": args.workers,
+                  "results": results}, args.out)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Converts stored predictions from JSON `scores` to the compact blob form
+(utils/score_codec.py), in id-ordered batches with one transaction each, so it
+can run against a live database and be resumed. Every converted row is
+decoded again and compared with its JSON before the JSON is dropped.
+
+    python scripts/migrate_scores.py --dry-run               # count rows + JSON size only
+    python scripts/migrate_scores.py --storage packed        # convert (default: packed)
+    python scripts/migrate_scores.py --storage topk --top-k 5 --vacuum
+"""
+import argparse, json, os, time
+import numpy as np
+from _bench import use_server_imports
+
+use_server_imports()
+from sqlalchemy import select, update, func, bindparam
+from utils.db import engine, SessionLocal
+from utils.migrations import run_migrations
+from utils.models import Prediction
+from utils.score_codec import ScoreStorage, decode
+
+def _db_bytes() -> int | None:
+    if engine.dialect.name != "sqlite":
+        return None
+    with engine.connect() as conn:
+        pages = conn.exec_driver_sql("PRAGMA page_count").scalar()
+        size = conn.exec_driver_sql("PRAGMA page_size").scalar()
+        free = conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+    return (pages - free) * size
+
+def main():
+    ap = argparse.ArgumentParser()
+    # not SCORES_STORAGE: that defaults to json, which this script can't convert to
+    ap.add_argument("--storage", default="packed", choices=("packed", "topk"))
+    ap.add_argument("--top-k", type=int, default=int(os.getenv("SCORES_TOP_K", "5")))
+    ap.add_argument("--batch", type=int, default=5000)
+    ap.add_argument("--dry-run", action="store_true")
+    ap.add_argument("--vacuum", action="store_true", help="SQLite: reclaim the freed pages afterwards")
+    args = ap.parse_args()
+
+    run_migrations(engine)
+    storage = ScoreStorage(args.storage, args.top_k)
+    with SessionLocal() as db:
+        todo = db.scalar(select(func.count()).where(Prediction.scores.is_not(None), Prediction.scores_blob.is_(None)))
+        json_bytes = db.scalar(select(func.coalesce(func.sum(func.length(Prediction.scores)), 0))
+                               .where(Prediction.scores.is_not(None)))
+    print(f"{todo} rows with JSON scores ({json_bytes / 2**20:.2f} MB of JSON)")
+    if args.dry_run or not todo:
+        return
+
+    bytes_before = _db_bytes()
+    table = Prediction.__table__
+    stmt = (update(table).where(table.c.id == bindparam("_id"))
+            .values(scores=None, scores_blob=bindparam("_blob"), label_set_id=bindparam("_ls")))
+    done, blob_bytes, max_err, last_id = 0, 0, 0.0, 0
+    t0 = time.perf_counter()
+    while True:
+        with SessionLocal() as db:
+            rows = db.execute(
+                select(Prediction.id, Prediction.model_name, Prediction.model_version, Prediction.scores)
+                .where(Prediction.id > last_id, Prediction.scores.is_not(None), Prediction.scores_blob.is_(None))
+                .order_by(Prediction.id).limit(args.batch)
+            ).all()
+            if not rows:
+                break
+            params = []
+            for rid, name, version, scores in rows:
+                cols = storage.columns(scores, {"name": name, "version": version})
+                got = decode(cols["scores_blob"], len(scores))
+                want = np.fromiter(scores.values(), dtype=np.float64, count=len(scores))
+                if storage.mode == "packed":
+                    max_err = max(max_err, float(np.abs(got - want).max()))
+                elif not np.isclose(got.max(), want.max(), atol=1e-6):
+                    raise SystemExit(f"row {rid}: top score mismatch after encoding; aborting")
+                params.append({"_id": rid, "_blob": cols["scores_blob"], "_ls": cols["label_set_id"]})
+                blob_bytes += len(cols["scores_blob"])
+            db.connection().execute(stmt, params)  # executemany, one transaction per batch
+            db.commit()
+            last_id = rows[-1][0]
+            done += len(rows)
+        rate = done / (time.perf_counter() - t0)
+        print(f"  {done}/{todo} rows  ({rate:.0f} rows/s)")
+
+    if args.vacuum and engine.dialect.name == "sqlite":
+        with engine.connect() as conn:
+            conn.exec_driver_sql("VACUUM")
+    bytes_after = _db_bytes()
+    print(json.dumps({
+        "converted": done,
+        "storage": storage.mode,
+        "json_mb": round(json_bytes / 2**20, 3),
+        "blob_mb": round(blob_bytes / 2**20, 3),
+        "max_abs_error_packed": max_err if storage.mode == "packed" else None,
+        "db_used_mb_before": round(bytes_before / 2**20, 3) if bytes_before else None,
+        "db_used_mb_after": round(bytes_after / 2**20, 3) if bytes_after else None,
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
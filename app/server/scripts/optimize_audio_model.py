@@ -0,0 +1,170 @@
+"""
+Builds CPU-optimized variants of the TorchScript audio model next to the
+original file and reports latency + accuracy for each one:
+
+    frozen  torch.jit.freeze: weights/attributes inlined as constants
+    opt     torch.jit.optimize_for_inference on the frozen graph (conv/bn folding, fused ops)
+    int8    dynamic int8 quantization of the Linear layers (quantize_dynamic_jit), then frozen
+
+The server picks the first existing variant from AUDIO_MODEL_VARIANT
+(default "opt,frozen,base"); int8 is only used if listed explicitly.
+
+    python scripts/optimize_audio_model.py                               # build + latency only
+    python scripts/optimize_audio_model.py --test-csv ravdess/meta/test.csv --out audio_variants.json
+
+--test-csv is the SpeechBrain test split from the data prep notebook (ID,wav,duration,emotion);
+--audio-root rewrites the directory part of the `wav` paths if the clips moved.
+Accuracy is compared with ai/models/audio/eval_test/metrics_overall.json.
+"""
+import argparse, csv, json, os, time
+from pathlib import Path
+from _bench import use_server_imports, summarize_ms, write_report
+
+use_server_imports()
+import numpy as np
+import torch, torchaudio
+from dotenv import load_dotenv
+from utils.audio_features import AudioFeatureExtractor
+from utils.model_adapters import _resolve_path, find_audio_ts, audio_variant_path, AUDIO_VARIANTS
+
+EVAL_DIR = Path(__file__).resolve().parents[3] / "ai" / "models" / "audio" / "eval_test"
+
+def build_variants(base_path: str, only: list[str]) -> dict:
+    """Writes each requested variant; returns {variant: error} for the ones that failed."""
+    errors = {}
+    base = torch.jit.load(base_path, map_location="cpu").eval()
+    builders = {
+        "frozen": lambda: torch.jit.freeze(base),
+        "opt": lambda: torch.jit.optimize_for_inference(torch.jit.freeze(base)),
+        "int8": lambda: torch.jit.freeze(_quantize_int8(base_path)),
+    }
+    for v in only:
+        path = audio_variant_path(base_path, v)
+        try:
+            torch.jit.save(builders[v](), path)
+            print(f"Saved: {path}")
+        except Exception as e:
+            errors[v] = str(e)[:300]
+            print(f"{v}: failed ({errors[v]})")
+    return errors
+
+def _quantize_int8(base_path: str):
+    # quantize_dynamic_jit rewrites a scripted (unfrozen) module in place, so start from a fresh copy
+    from torch.ao.quantization import quantize_dynamic_jit, default_dynamic_qconfig
+    m = torch.jit.load(base_path, map_location="cpu").eval()
+    return quantize_dynamic_jit(m, {"": default_dynamic_qconfig})
+
+def load_test_set(path: str, audio_root: str | None, labels: list[str], features) -> tuple[list, list[int]]:
+    feats, y = [], []
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            wav_path = row["wav"]
+            if audio_root:
+                wav_path = str(Path(audio_root) / Path(wav_path).parent.name / Path(wav_path).name)
+            wav, sr = torchaudio.load(wav_path)
+            feats.append(features(wav, sr))
+            y.append(labels.index(row["emotion"]))
+    return feats, y
+
+def macro_f1(y: np.ndarray, pred: np.ndarray, n: int) -> float:
+    f1 = []
+    for c in range(n):
+        tp = int(((pred == c) & (y == c)).sum())
+        denom = int((pred == c).sum()) + int((y == c).sum())
+        f1.append(2 * tp / denom if denom else 0.0)
+    return float(np.mean(f1))
+
+def evaluate(path: str, feats: list, iters: int) -> tuple[np.ndarray, dict, float]:
+    t0 = time.perf_counter()
+    model = torch.jit.load(path, map_location="cpu").eval()
+    load_ms = (time.perf_counter() - t0) * 1000.0
+    lens = torch.tensor([1.0], dtype=torch.float32)
+    preds, times = [], []
+    with torch.inference_mode():
+        for _ in range(3):  # warm-up: the profiling executor specializes on the first calls
+            model(feats[0], lens)
+        for i in range(max(iters, len(feats))):
+            x = feats[i % len(feats)]
+            t0 = time.perf_counter()
+            out = model(x, lens)
+            times.append((time.perf_counter() - t0) * 1000.0)
+            if i < len(feats):
+                out = out[0] if isinstance(out, (list, tuple)) else out
+                preds.append(torch.as_tensor(out).float().reshape(-1).cpu().numpy())
+    return np.stack(preds[:len(feats)]), summarize_ms(times), load_ms
+
+def main():
+    load_dotenv()
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--model-dir", default=os.getenv("AUDIO_MODEL_DIR"))
+    ap.add_argument("--labels", default=os.getenv("AUDIO_LABELS_PATH"))
+    ap.add_argument("--variants", default="frozen,opt,int8")
+    ap.add_argument("--skip-build", action="store_true", help="only evaluate existing variant files")
+    ap.add_argument("--test-csv", default=None, help="SpeechBrain test split (ID,wav,duration,emotion)")
+    ap.add_argument("--audio-root", default=None)
+    ap.add_argument("--seconds", type=float, default=4.0, help="synthetic clip length when no --test-csv")
+    ap.add_argument("--iters", type=int, default=50, help="min timed calls per variant")
+    ap.add_argument("--threads", type=int, default=0, help="torch.set_num_threads (0 = torch default)")
+    ap.add_argument("--out", default=None)
+    args = ap.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    root_dir = _resolve_path(args.model_dir)
+    if not (root_dir and os.path.isdir(root_dir)):
+        raise SystemExit(f"--model-dir / AUDIO_MODEL_DIR invalid: {root_dir}")
+    base_path = find_audio_ts(root_dir)
+    variants = [v for v in args.variants.split(",") if v and v != "base"]
+    unknown = [v for v in variants if v not in AUDIO_VARIANTS]
+    if unknown:
+        raise SystemExit(f"unknown variants {unknown}; use {sorted(AUDIO_VARIANTS)}")
+
+    errors = {} if args.skip_build else build_variants(base_path, variants)
+
+    features = AudioFeatureExtractor.from_env()
+    if args.test_csv:
+        with open(_resolve_path(args.labels)) as f:
+            labels = json.load(f)
+        feats, y = load_test_set(args.test_csv, args.audio_root, labels, features)
+        y = np.asarray(y)
+    else:
+        torch.manual_seed(0)
+        feats = [features(torch.rand(1, int(features.target_sr * args.seconds)) * 2 - 1, features.target_sr)]
+        labels, y = None, None
+
+    recorded = json.loads((EVAL_DIR / "metrics_overall.json").read_text())
+    results, ref = [], None
+    for v in ["base"] + variants:
+        path = audio_variant_path(base_path, v)
+        if v in errors or not os.path.isfile(path):
+            results.append({"variant": v, "error": errors.get(v, "missing")})
+            continue
+        logits, latency, load_ms = evaluate(path, feats, args.iters)
+        row = {"variant": v, "path": path, "size_mb": os.path.getsize(path) / 2**20,
+               "load_ms": load_ms, "latency_ms": latency}
+        pred = logits.argmax(1)
+        if ref is None:
+            ref = (logits, pred, latency["p50"])
+        else:
+            row["speedup_p50"] = ref[2] / latency["p50"] if latency["p50"] else None
+            row["argmax_agreement"] = float((pred == ref[1]).mean())
+            row["max_logit_diff"] = float(np.abs(logits - ref[0]).max())
+        if y is not None:
+            row["accuracy"] = float((pred == y).mean())
+            row["macro/f1"] = macro_f1(y, pred, len(labels))
+            row["vs_recorded"] = {k: row[k] - recorded[k] for k in ("accuracy", "macro/f1")}
+        results.append(row)
+        acc = f"  acc {row['accuracy']:.4f}  macro-F1 {row['macro/f1']:.4f}" if y is not None else ""
+        print(f"{v:>7}: p50 {latency['p50']:.2f} ms  p95 {latency['p95']:.2f} ms  "
+              f"{row['size_mb']:.1f} MB{acc}")
+
+    write_report({
+        "config": vars(args),
+        "base": base_path,
+        "num_samples": len(feats) if y is not None else 0,
+        "recorded": recorded,
+        "results": results,
+    }, args.out)
+
+if __name__ == "__main__":
+    main()
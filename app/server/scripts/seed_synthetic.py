@@ -0,0 +1,232 @@
+"""
+Bulk-loads synthetic predictions + feedback into the configured database
+(DATABASE_URL / data/app.db) at analytics-benchmark scales, e.g. 1e5, 1e6 or
+1e7 rows. The shape follows production rather than uniform noise:
+
+  - modality mix: --text-share of rows are text, the rest audio
+  - labels: the real label sets from ai/models/{text,audio}/labels.json, skewed
+    like their training data (GoEmotions: ~1/3 neutral, grief/pride rare;
+    RAVDESS: neutral at half the weight of the other emotions)
+  - scores: a peaked Dirichlet vector per row with top_label as its argmax,
+    stored in the current SCORES_STORAGE form
+  - duplicates: --dup-rate of rows reuse a popular input_hash (Zipf), and
+    mostly get that input's usual label, so the disagreement stats are non-trivial
+  - feedback: --feedback-rate of predictions get stars (a few get two),
+    higher for confident predictions
+  - timestamps over the last --days, traffic growing towards today with a
+    day/night cycle
+
+    python scripts/seed_synthetic.py --rows 1e5
+    DATABASE_URL=sqlite:///data/bench_1e7.db python scripts/seed_synthetic.py --rows 1e7 --batch 100000
+"""
+import argparse, json, time
+from datetime import datetime, timedelta
+from uuid import uuid4
+import numpy as np
+from _bench import SERVER_DIR, use_server_imports
+
+MODELS_DIR = SERVER_DIR.parents[1] / "ai" / "models"
+
+# approximate label frequencies of the training sets; unknown labels get weight 1
+TEXT_PRIOR = {
+    "neutral": 14219, "admiration": 4130, "approval": 2939, "gratitude": 2662, "annoyance": 2470,
+    "amusement": 2328, "curiosity": 2191, "love": 2086, "disapproval": 2022, "optimism": 1581,
+    "anger": 1567, "joy": 1452, "confusion": 1368, "sadness": 1326, "disappointment": 1269,
+    "realization": 1110, "caring": 1087, "surprise": 1060, "excitement": 853, "disgust": 793,
+    "desire": 641, "fear": 596, "remorse": 545, "embarrassment": 303, "nervousness": 164,
+    "relief": 153, "pride": 111, "grief": 77,
+}
+AUDIO_PRIOR = {"neutral": 96}  # RAVDESS: 96 neutral clips per 192 of every other emotion
+LANGS = (("en", 0.78), ("es", 0.06), ("de", 0.04), ("fr", 0.04), ("pt", 0.02), ("und", 0.06))
+SAMPLE_RATES = ((16000, 0.5), (44100, 0.3), (48000, 0.2))
+DUP_LABEL_STABILITY = 0.9  # share of repeats that get the input's usual label
+COMMENTS = ("wrong", "spot on", "kind of", "not really", "yes!")
+
+def _model(modality: str, fallback_name: str):
+    d = MODELS_DIR / modality
+    labels = json.loads((d / "labels.json").read_text())
+    try:
+        meta = json.loads((d / "model_meta.json").read_text())
+    except (OSError, ValueError):
+        meta = {}
+    return labels, {"name": meta.get("name", fallback_name), "version": str(meta.get("version", "synthetic"))}
+
+def _label_probs(labels: list[str], prior: dict, default: float) -> np.ndarray:
+    w = np.array([prior.get(lbl, default) for lbl in labels], dtype=np.float64)
+    return w / w.sum()
+
+def _choice(rng, pairs, n):
+    values, p = zip(*pairs)
+    return np.asarray(values)[rng.choice(len(values), size=n, p=np.asarray(p) / sum(p))]
+
+class Generator:
+    def __init__(self, args, now: datetime):
+        self.rng = np.random.default_rng(args.seed)
+        self.args = args
+        self.now = now
+        self.models = {}
+        for m, prior, default, fallback in (("text", TEXT_PRIOR, 1.0, "bert-goemotions"),
+                                            ("audio", AUDIO_PRIOR, 192.0, "speechbrain-ser")):
+            labels, meta = _model(m, fallback)
+            self.models[m] = (labels, meta, _label_probs(labels, prior, default))
+        # popular inputs: Zipf-weighted pool of hashes, each with its usual label
+        pool = max(1, int(args.rows * args.dup_rate / 20))
+        zipf = 1.0 / np.arange(1, pool + 1) ** 1.1
+        self.pool_p = zipf / zipf.sum()
+        self.pool_hash = np.array([f"{h:064x}" for h in self.rng.integers(0, 1 << 62, size=pool)])
+        self.pool_label = {m: self.rng.choice(len(lp[0]), size=pool, p=lp[2]) for m, lp in self.models.items()}
+        # traffic grows ~3x over the window, with a day/night cycle
+        day_w = np.linspace(1.0, 3.0, args.days)
+        self.day_p = day_w / day_w.sum()
+        hour_w = 1.0 + 0.8 * np.sin((np.arange(24) - 9) / 24 * 2 * np.pi)
+        self.hour_p = hour_w / hour_w.sum()
+
+    def _timestamps(self, n):
+        day = self.rng.choice(self.args.days, size=n, p=self.day_p)  # 0 = oldest day of the window
+        secs = day * 86400 + self.rng.choice(24, size=n, p=self.hour_p) * 3600 + self.rng.integers(0, 3600, size=n)
+        start = (self.now - timedelta(days=self.args.days - 1)).replace(hour=0, minute=0, second=0, microsecond=0)
+        ts = [start + timedelta(seconds=int(s)) for s in secs]
+        # today's hours that haven't happened yet move to yesterday
+        return [t - timedelta(days=1) if t > self.now else t for t in ts]
+
+    def _scores(self, modality: str, top: np.ndarray):
+        labels, _, _ = self.models[modality]
+        v = self.rng.dirichlet(np.full(len(labels), 0.35), size=len(top)).astype(np.float32)
+        # swap each row's argmax into the chosen top label's column
+        rows = np.arange(len(top))
+        arg = v.argmax(axis=1)
+        v[rows, arg], v[rows, top] = v[rows, top], v[rows, arg]
+        return v
+
+    def predictions(self, n: int) -> list[dict]:
+        from utils.score_codec import score_storage, encode_dense, encode_topk, label_sets
+
+        rng = self.rng
+        is_text = rng.random(n) < self.args.text_share
+        dup = rng.random(n) < self.args.dup_rate
+        pool_idx = rng.choice(len(self.pool_hash), size=n, p=self.pool_p)
+        created = self._timestamps(n)
+        out = [None] * n
+        for m in ("text", "audio"):
+            idx = np.flatnonzero(is_text if m == "text" else ~is_text)
+            if not len(idx):
+                continue
+            labels, meta, probs = self.models[m]
+            top = rng.choice(len(labels), size=len(idx), p=probs)
+            keep = dup[idx] & (rng.random(len(idx)) < DUP_LABEL_STABILITY)
+            top[keep] = self.pool_label[m][pool_idx[idx][keep]]
+            scores = self._scores(m, top)
+            conf = scores[np.arange(len(idx)), top]
+            if m == "text":
+                text_len = np.clip(rng.lognormal(4.0, 0.9, size=len(idx)), 1, 5000).astype(int)
+                lang = _choice(rng, LANGS, len(idx))
+                proc = np.clip(rng.lognormal(np.log(25) + text_len / 2000, 0.4), 1, None).astype(int)
+            else:
+                dur = np.clip(rng.lognormal(np.log(4.0), 0.6, size=len(idx)), 0.5, 60.0)
+                sr = _choice(rng, SAMPLE_RATES, len(idx))
+                proc = np.clip(rng.lognormal(np.log(60), 0.3, size=len(idx)) * (1 + dur / 4), 1, None).astype(int)
+            ls_id = label_sets.id_for(meta["name"], meta["version"], tuple(labels)) if score_storage.mode != "json" else None
+            for j, i in enumerate(idx):
+                if score_storage.mode == "json":
+                    cols = {"scores": dict(zip(labels, scores[j].tolist())), "scores_blob": None, "label_set_id": None}
+                else:
+                    blob = encode_dense(scores[j]) if score_storage.mode == "packed" else encode_topk(scores[j], score_storage.top_k)
+                    cols = {"scores": None, "scores_blob": blob, "label_set_id": ls_id}
+                out[i] = {
+                    "prediction_id": str(uuid4()),
+                    "created_at": created[i],
+                    "modality": m,
+                    "text_len": int(text_len[j]) if m == "text" else None,
+                    "lang": str(lang[j]) if m == "text" else None,
+                    "duration_sec": float(dur[j]) if m == "audio" else None,
+                    "sample_rate": int(sr[j]) if m == "audio" else None,
+                    "model_name": meta["name"],
+                    "model_version": meta["version"],
+                    "top_label": labels[top[j]],
+                    "confidence": float(conf[j]),
+                    **cols,
+                    "processing_ms": int(proc[j]),
+                    "input_hash": self.pool_hash[pool_idx[i]] if dup[i] else uuid4().hex + uuid4().hex,
+                }
+        return out
+
+    def feedback(self, preds: list[dict]) -> list[dict]:
+        rng = self.rng
+        conf = np.fromiter((p["confidence"] for p in preds), dtype=np.float64, count=len(preds))
+        # confident predictions get feedback a bit more often, and better stars
+        chosen = np.flatnonzero(rng.random(len(preds)) < self.args.feedback_rate * (0.6 + 0.8 * conf))
+        out = []
+        for i in chosen:
+            p_good = 0.35 + 0.55 * conf[i]
+            for _ in range(2 if rng.random() < 0.05 else 1):
+                stars = int(rng.choice((4, 5)) if rng.random() < p_good else rng.choice((0, 1, 2, 3), p=(0.05, 0.35, 0.35, 0.25)))
+                out.append({
+                    "prediction_id": preds[i]["prediction_id"],
+                    "submitted_at": min(preds[i]["created_at"] + timedelta(seconds=float(rng.exponential(600))), self.now),
+                    "stars": stars,
+                    "comment": str(rng.choice(COMMENTS)) if rng.random() < 0.1 else None,
+                })
+        return out
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=float, default=1e5, help="predictions to add (1e5, 1e6, 1e7 ...)")
+    ap.add_argument("--days", type=int, default=90)
+    ap.add_argument("--text-share", type=float, default=0.7)
+    ap.add_argument("--dup-rate", type=float, default=0.08, help="share of rows repeating a popular input")
+    ap.add_argument("--feedback-rate", type=float, default=0.12, help="approximate share of predictions with feedback")
+    ap.add_argument("--batch", type=int, default=50000, help="rows per INSERT transaction")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--skip-rollups", action="store_true", help="leave the rollup build to the first analytics request")
+    args = ap.parse_args()
+    args.rows = int(args.rows)
+
+    use_server_imports()
+    from sqlalchemy import insert, select, func
+    from utils.db import engine, SessionLocal
+    from utils.migrations import run_migrations
+    from utils.models import Prediction, Feedback
+    from utils.rollups import refresh_rollups
+
+    run_migrations(engine)
+    with SessionLocal() as db:
+        existing = db.scalar(select(func.count(Prediction.id)))
+    if existing:
+        print(f"Note: the database already holds {existing} predictions; adding {args.rows} more")
+
+    gen = Generator(args, datetime.utcnow().replace(microsecond=0))
+    t0 = time.perf_counter()
+    gen_s = n_fb = 0
+    for start in range(0, args.rows, args.batch):
+        g0 = time.perf_counter()
+        preds = gen.predictions(min(args.batch, args.rows - start))
+        fbs = gen.feedback(preds)
+        gen_s += time.perf_counter() - g0
+        with SessionLocal() as db:
+            # Core table inserts: one executemany per batch (ORM bulk insert splits
+            # the batch wherever text and audio rows alternate their NULL columns)
+            conn = db.connection()
+            conn.execute(insert(Prediction.__table__), preds)
+            if fbs:
+                conn.execute(insert(Feedback.__table__), fbs)
+            db.commit()
+        n_fb += len(fbs)
+        done = start + len(preds)
+        print(f"  {done}/{args.rows} predictions, {n_fb} feedback  ({done / (time.perf_counter() - t0):.0f} rows/s)")
+    load_s = time.perf_counter() - t0
+
+    with engine.connect() as conn:
+        conn.exec_driver_sql("ANALYZE")
+    rollup_s = None
+    if not args.skip_rollups:
+        t1 = time.perf_counter()
+        days = refresh_rollups()
+        rollup_s = time.perf_counter() - t1
+        print(f"Rollups: {days} days rebuilt in {rollup_s:.1f}s")
+    print(json.dumps({
+        "predictions": args.rows, "feedback": n_fb, "load_s": round(load_s, 2),
+        "generate_s": round(gen_s, 2), "rollup_build_s": round(rollup_s, 2) if rollup_s is not None else None,
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Checks that the rollup-backed analytics match the raw-table (slow) path
+for a grid of query parameters. Exits non-zero on any mismatch.
+
+    python scripts/verify_rollups.py            # uses DATABASE_URL / data/app.db
+"""
+import argparse, math
+from _bench import use_server_imports
+
+use_server_imports()
+from utils.db import SessionLocal
+from utils.analytics import compute_analytics
+
+def _norm(obj):
+    # Ties in ORDER BY count DESC have no defined order in SQL; compare those lists as sets
+    if isinstance(obj, dict):
+        return {k: _norm(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        items = [_norm(v) for v in obj]
+        return sorted(items, key=lambda v: repr(sorted(v.items())) if isinstance(v, dict) else repr(v))
+    return obj
+
+def diff(a, b, path="", rel=1e-9):
+    out = []
+    if isinstance(a, dict) and isinstance(b, dict):
+        for k in sorted(set(a) | set(b)):
+            out += diff(a.get(k), b.get(k), f"{path}.{k}", rel)
+    elif isinstance(a, list) and isinstance(b, list):
+        if len(a) != len(b):
+            return [f"{path}: len {len(a)} != {len(b)}"]
+        for i, (x, y) in enumerate(zip(a, b)):
+            out += diff(x, y, f"{path}[{i}]", rel)
+    elif isinstance(a, float) or isinstance(b, float):
+        if a is None or b is None or not math.isclose(a, b, rel_tol=rel, abs_tol=1e-12):
+            out.append(f"{path}: {a!r} != {b!r}")
+    elif a != b:
+        out.append(f"{path}: {a!r} != {b!r}")
+    return out
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rel-tol", type=float, default=1e-9, help="float tolerance (summation order differs)")
+    args = ap.parse_args()
+
+    grid = [
+        dict(since_days=d, modality=m, correct_gte=cg, incorrect_lte=il, high_conf_thr=hc)
+        for d in (None, 1, 7, 30, 365)
+        for m in (None, "text", "audio")
+        for cg, il in ((4, 2), (5, 1))
+        for hc in (0.5, 0.8)
+    ]
+    failures = 0
+    with SessionLocal() as db:
+        for params in grid:
+            slow = compute_analytics(db, use_rollups=False, **params)
+            fast = compute_analytics(db, use_rollups=True, **params)
+            problems = diff(_norm(slow), _norm(fast), rel=args.rel_tol)
+            if problems:
+                failures += 1
+                print(f"MISMATCH {params}")
+                for p in problems[:20]:
+                    print("   ", p)
+    print(f"{len(grid) - failures}/{len(grid)} parameter sets match")
+    raise SystemExit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
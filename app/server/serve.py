@@ -0,0 +1,157 @@
+"""
+Preload-then-fork launcher: N uvicorn workers sharing one copy of the model
+weights.
+
+`uvicorn --workers N` spawns fresh interpreters, and each one loads its own
+BERT and TorchScript model. Here the parent loads both models once,
+moves every live Python object out of the garbage collector's reach
+(gc.freeze), binds the listening socket and then fork()s the workers. Weight
+tensors are never written during inference, so their pages stay shared
+copy-on-write between all workers. Each worker only adds its own
+activations, tokenizer state and request objects.
+
+The parent never runs a forward pass: that would start torch's OpenMP/MKL
+thread pools, which don't survive fork() (a worker could hang on its first
+inference). Each worker warms up after the fork, in its lifespan.
+
+    python serve.py --workers 4 --port 8000
+    python serve.py --workers 4 --no-preload      # every worker loads its own copy (for comparison)
+
+Requires INFER_EXECUTOR=thread: a process executor would spawn fresh workers
+that load their own copies again. Linux/macOS only (fork).
+"""
+import argparse, gc, os, signal, socket, sys, time, traceback
+
+def _bind(host: str, port: int, backlog: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+def preload() -> dict:
+    """Loads both models in this (the parent) process, without running them."""
+    from utils import model_adapters as adapters
+
+    if adapters.MODE == "REAL" and adapters._text_backend_name() == "onnx":
+        # ONNX Runtime's thread pools don't survive fork(); workers build their own session
+        print("[serve] TEXT_BACKEND=onnx: text model loads per worker", file=sys.stderr)
+        modalities = ("audio",)
+    else:
+        modalities = ("text", "audio")
+    out = {}
+    for m in modalities:
+        adapters.REGISTRIES[m].ensure_loaded()
+        out[m] = adapters.model_state(m)
+        if out[m].get("error"):
+            raise SystemExit(f"[serve] {m} model failed to load: {out[m]['error']}")
+    return out
+
+def _worker(app, sock: socket.socket, args):
+    from utils.db import engine, read_engine
+    from utils.model_adapters import MODE
+
+    # connections opened by the parent (migrations) belong to the parent
+    engine.dispose(close=False)
+    read_engine.dispose(close=False)
+    if args.threads_per_worker and MODE == "REAL":  # MOCK workers never import torch
+        try:
+            import torch
+            torch.set_num_threads(args.threads_per_worker)
+        except ImportError:
+            pass
+    import uvicorn
+    config = uvicorn.Config(app, log_level=args.log_level, timeout_graceful_shutdown=args.graceful_timeout)
+    uvicorn.Server(config).run(sockets=[sock])
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    ap.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    ap.add_argument("--workers", type=int, default=int(os.getenv("WEB_WORKERS", "2")))
+    ap.add_argument("--threads-per-worker", type=int, default=int(os.getenv("WORKER_TORCH_THREADS", "0")),
+                    help="torch intra-op threads per worker in MODE=REAL (0 = torch default)")
+    ap.add_argument("--no-preload", action="store_true", help="load models in each worker after fork")
+    ap.add_argument("--backlog", type=int, default=2048)
+    ap.add_argument("--graceful-timeout", type=int, default=30)
+    ap.add_argument("--log-level", default="info")
+    args = ap.parse_args()
+
+    if os.getenv("INFER_EXECUTOR", "thread").lower() != "thread":
+        raise SystemExit("serve.py shares models between forked workers; use INFER_EXECUTOR=thread")
+
+    import uvicorn  # noqa: F401  (imported once here, shared by the workers)
+    t0 = time.perf_counter()
+    import main as app_module  # runs migrations once, in the parent
+    if not args.no_preload:
+        loaded = preload()
+        versions = ", ".join(f"{m}={v['model']['version']}" for m, v in loaded.items())
+        print(f"[serve] preloaded {versions} in {time.perf_counter() - t0:.1f}s", file=sys.stderr)
+    sock = _bind(args.host, args.port, args.backlog)
+    # Everything allocated so far is never collected again, so the collector
+    # never writes to (and un-shares) those pages in the workers
+    gc.collect()
+    gc.freeze()
+
+    children: dict[int, tuple[int, float]] = {}  # pid -> (slot, started)
+    stopping = False
+    exit_code = 0
+
+    def spawn(slot: int):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            code = 0
+            try:
+                _worker(app_module.app, sock, args)
+            except BaseException:
+                traceback.print_exc()
+                code = 1
+            finally:
+                os._exit(code)
+        children[pid] = (slot, time.monotonic())
+
+    def stop(signum, _frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    for slot in range(args.workers):
+        spawn(slot)
+    print(f"[serve] {args.workers} workers on {args.host}:{args.port}: {sorted(children)}", file=sys.stderr)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        entry = children.pop(pid, None)
+        if entry is None or stopping:
+            continue
+        slot, started = entry
+        code = os.waitstatus_to_exitcode(status)
+        if time.monotonic() - started < 5.0:
+            # died while starting up: restarting would only loop on the same error
+            print(f"[serve] worker {pid} failed at startup ({code}); shutting down", file=sys.stderr)
+            stop(signal.SIGTERM, None)
+            exit_code = 1
+            continue
+        # a crashed worker is re-forked from the still-loaded parent: no model reload
+        print(f"[serve] worker {pid} exited ({code}); restarting", file=sys.stderr)
+        time.sleep(0.5)
+        spawn(slot)
+    sock.close()
+    sys.exit(exit_code)
+
+if __name__ == "__main__":
+    main()
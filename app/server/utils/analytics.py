@@ -1,8 +1,10 @@
+import os
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any, List
 from sqlalchemy.orm import Session
 from sqlalchemy import func, case, distinct
 from utils.models import Prediction, Feedback
+from utils.rollups import STAR_VALUES, refresh_rollups, load_facts
 
 def _apply_common_filters(q, cutoff_dt, modality):
     conds = []
@@ -189,6 +191,144 @@ def _audio_summary(db: Session, cutoff_dt):
         "avg_sample_rate": float(avg_sr) if avg_sr is not None else None,
     }
 
+def _parts_from_raw(db: Session, cutoff_dt, modality, correct_gte: int, incorrect_lte: int, high_conf_thr: float):
+    # Global totals by modality (for headers and quick cards)
+    totals_by_modality = {
+        m: _apply_common_filters(db.query(Prediction), cutoff_dt, m).count()
+        for m in ("text", "audio")
+    }
+
+    # Per-modality summaries
+    summaries = {}
+    for m in ("text", "audio"):
+        if modality and m != modality:
+            continue
+        summaries[m] = _modality_summary(
+            db, cutoff_dt, m, high_conf_thr, correct_gte, incorrect_lte
+        )
+
+    return {
+        "totals_by_modality": totals_by_modality,
+        "summaries": summaries,
+        # Emotion breakdown (filtered by modality if provided)
+        "by_emotion": _per_emotion_breakdown(db, cutoff_dt, modality, correct_gte, incorrect_lte),
+        # Timeseries (filtered by modality if provided)
+        "timeseries": _timeseries(db, cutoff_dt, modality),
+        # Duplicates consistency (based on input_hash)
+        "duplicates": _duplicates_summary(db, cutoff_dt, modality),
+        # Text language mix and audio recording stats
+        "language_stats": _language_stats(db, cutoff_dt),
+        "audio_stats": _audio_summary(db, cutoff_dt),
+        # Feedback coverage overall
+        "with_fb_overall": _with_feedback_count(db, cutoff_dt, modality),
+        "total_overall": _apply_common_filters(db.query(Prediction), cutoff_dt, modality).count(),
+    }
+
+# Rollup path: same numbers from per-day aggregates (utils.rollups)
+
+def _sum(facts, key) -> float:
+    return sum(f[key] for f in facts)
+
+def _stars_total(facts, pred=lambda s: True) -> int:
+    return sum(f[f"stars_{s}"] for f in facts for s in STAR_VALUES if pred(s))
+
+def _acc_from_facts(facts, correct_gte: int, incorrect_lte: int):
+    correct = _stars_total(facts, lambda s: s >= correct_gte)
+    incorrect = _stars_total(facts, lambda s: s <= incorrect_lte)
+    denom = correct + incorrect
+    acc = (correct / denom) if denom else None
+    return {"correct": correct, "incorrect": incorrect, "denominator": denom, "accuracy": acc}
+
+def _avg_stars_from_facts(facts):
+    n = _stars_total(facts)
+    return (sum(f[f"stars_{s}"] * s for f in facts for s in STAR_VALUES) / n) if n else None
+
+def _ratio(num, den):
+    return (num / den) if den else None
+
+def _parts_from_rollups(db: Session, cutoff_dt, modality, correct_gte: int, incorrect_lte: int, high_conf_thr: float):
+    refresh_rollups()
+    facts = load_facts(db, cutoff_dt)
+    by_mod = {m: [f for f in facts if f["modality"] == m] for m in ("text", "audio")}
+    scoped = by_mod[modality] if modality in ("text", "audio") else facts
+
+    summaries = {}
+    for m in ("text", "audio"):
+        if modality and m != modality:
+            continue
+        fm = by_mod[m]
+        total = int(_sum(fm, "n"))
+        with_fb = int(_sum(fm, "n_with_feedback"))
+        # an arbitrary confidence threshold can't be pre-aggregated; one indexed count
+        high_conf = (
+            _apply_common_filters(db.query(Prediction), cutoff_dt, m)
+                .filter(Prediction.confidence >= high_conf_thr)
+                .count()
+        ) if total else 0
+        stars_dist = {str(k): int(sum(f[f"stars_{k}"] for f in fm)) for k in range(1, 6)}
+        summaries[m] = {
+            "modality": m,
+            "total": total,
+            "with_feedback": with_fb,
+            "feedback_rate": (with_fb / total) if total else 0.0,
+            "avg_confidence": _ratio(_sum(fm, "conf_sum"), total),
+            "high_conf_share": _ratio(high_conf, total),
+            "avg_stars": _avg_stars_from_facts(fm),
+            "stars_distribution": stars_dist,
+            "avg_processing_ms": _ratio(float(_sum(fm, "proc_sum")), total),
+            "accuracy_by_feedback": _acc_from_facts(fm, correct_gte, incorrect_lte),
+        }
+
+    groups: Dict[str, list] = {}
+    for f in scoped:
+        groups.setdefault(f["top_label"], []).append(f)
+    by_emotion = []
+    for label in sorted(groups):
+        g = groups[label]
+        joined = int(_sum(g, "joined_n"))
+        by_emotion.append({
+            "label": label,
+            "count": joined,
+            "avg_confidence": _ratio(_sum(g, "joined_conf_sum"), joined),
+            "avg_stars": _avg_stars_from_facts(g),
+            "accuracy_by_feedback": _acc_from_facts(g, correct_gte, incorrect_lte),
+        })
+    by_emotion.sort(key=lambda r: -r["count"])
+
+    days: Dict[str, int] = {}
+    for f in scoped:
+        days[f["day"]] = days.get(f["day"], 0) + f["n"]
+    timeseries = [{"day": d, "count": int(c)} for d, c in sorted(days.items())]
+
+    langs: Dict[Any, int] = {}
+    for f in by_mod["text"]:
+        langs[f["lang"]] = langs.get(f["lang"], 0) + f["n"]
+    language_stats = [
+        {"lang": (k or "und"), "count": int(c)}
+        for k, c in sorted(langs.items(), key=lambda kv: (-kv[1], kv[0] or ""))
+    ]
+
+    fa = by_mod["audio"]
+    audio_stats = {
+        "avg_duration_sec": _ratio(_sum(fa, "dur_sum"), _sum(fa, "dur_n")),
+        "avg_sample_rate": _ratio(float(_sum(fa, "sr_sum")), _sum(fa, "sr_n")),
+    }
+
+    return {
+        "totals_by_modality": {m: int(_sum(by_mod[m], "n")) for m in ("text", "audio")},
+        "summaries": summaries,
+        "by_emotion": by_emotion,
+        "timeseries": timeseries,
+        # stability on repeated inputs needs per-input identity; stays a raw query
+        "duplicates": _duplicates_summary(db, cutoff_dt, modality),
+        "language_stats": language_stats,
+        "audio_stats": audio_stats,
+        "with_fb_overall": int(_sum(scoped, "n_with_feedback")),
+        "total_overall": int(_sum(scoped, "n")),
+    }
+
+ROLLUPS_ENABLED = os.getenv("ANALYTICS_USE_ROLLUPS", "1").lower() not in ("0", "false", "no")
+
 def compute_analytics(
     db: Session,
     since_days: Optional[int] = 30,
@@ -197,28 +337,22 @@ def compute_analytics(
     correct_gte: int = 4,
     incorrect_lte: int = 2,
     high_conf_thr: float = 0.80,
+    use_rollups: Optional[bool] = None,
 ) -> Dict[str, Any]:
     """
     Returns a comprehensive analytics dict.
     accuracy by feedback treats stars >= correct_gte as Correct,
     stars <= incorrect_lte as Incorrect, and 3-star (or missing) as Neutral/ignored.
+    use_rollups (default ANALYTICS_USE_ROLLUPS) answers from the daily rollup
+    tables; False scans the raw tables (the reference/slow path).
     """
     cutoff_dt = datetime.utcnow() - timedelta(days=since_days) if since_days else None
 
-    # Global totals by modality (for headers and quick cards)
-    totals_by_modality = {
-        m: _apply_common_filters(db.query(Prediction), cutoff_dt, m).count()
-        for m in ("text", "audio")
-    }
-
-    # Per-modality summaries
-    summaries = {}
-    for m in ("text", "audio"):
-        if modality and m != modality:
-            continue
-        summaries[m] = _modality_summary(
-            db, cutoff_dt, m, high_conf_thr, correct_gte, incorrect_lte
-        )
+    if use_rollups is None:
+        use_rollups = ROLLUPS_ENABLED
+    parts_fn = _parts_from_rollups if use_rollups else _parts_from_raw
+    p = parts_fn(db, cutoff_dt, modality, correct_gte, incorrect_lte, high_conf_thr)
+    summaries = p["summaries"]
 
     # Comparison (text and audio)
     comparison = None
@@ -241,22 +375,7 @@ def compute_analytics(
             "avg_stars_delta": _delta("avg_stars"),
         }
 
-    # Emotion breakdown (filtered by modality if provided)
-    by_emotion = _per_emotion_breakdown(db, cutoff_dt, modality, correct_gte, incorrect_lte)
-
-    # Timeseries (filtered by modality if provided)
-    timeseries = _timeseries(db, cutoff_dt, modality)
-
-    # Duplicates consistency (based on input_hash)
-    duplicates = _duplicates_summary(db, cutoff_dt, modality)
-
-    # Text language mix and audio recording stats
-    language_stats = _language_stats(db, cutoff_dt)
-    audio_stats    = _audio_summary(db, cutoff_dt)
-
-    # Feedback coverage overall
-    with_fb_overall = _with_feedback_count(db, cutoff_dt, modality)
-    total_overall   = _apply_common_filters(db.query(Prediction), cutoff_dt, modality).count()
+    with_fb_overall, total_overall = p["with_fb_overall"], p["total_overall"]
 
     return {
         "window_days": since_days,
@@ -266,7 +385,7 @@ def compute_analytics(
             "incorrect_lte": incorrect_lte,
             "high_confidence": high_conf_thr,
         },
-        "totals_by_modality": totals_by_modality,
+        "totals_by_modality": p["totals_by_modality"],
         "overall": {
             "total_predictions": total_overall,
             "total_with_feedback": with_fb_overall,
@@ -274,9 +393,9 @@ def compute_analytics(
         },
         "modality_summaries": summaries,# { "text": {...}, "audio": {...} }
         "comparison": comparison,# deltas audio - text
-        "by_emotion": by_emotion,# per label, with accuracy_by_feedback
-        "timeseries": timeseries, # [{day, count}]
-        "duplicates": duplicates, # stability on repeated inputs
-        "language_stats": language_stats,# for text
-        "audio_stats": audio_stats,# for audio
+        "by_emotion": p["by_emotion"],# per label, with accuracy_by_feedback
+        "timeseries": p["timeseries"], # [{day, count}]
+        "duplicates": p["duplicates"], # stability on repeated inputs
+        "language_stats": p["language_stats"],# for text
+        "audio_stats": p["audio_stats"],# for audio
     }
@@ -0,0 +1,124 @@
+import hashlib, json, os, sys, threading
+from time import monotonic
+from typing import Callable
+
+from sqlalchemy.orm import Session
+
+from utils.db import ReadSessionLocal
+from utils.metrics import register_stats
+
+# Bumped by every prediction/feedback write in this process. Writes in other
+# worker processes are covered by the TTL instead.
+_version = 0
+_version_lock = threading.Lock()
+KEY_LOCK_STRIPES = 16  # cold computes of different keys only wait on each other when they collide
+
+def mark_analytics_dirty() -> None:
+    global _version
+    with _version_lock:
+        _version += 1
+
+def data_version() -> int:
+    return _version
+
+class _Entry:
+    __slots__ = ("body", "etag", "version", "at")
+
+    def __init__(self, body: bytes, etag: str, version: int, at: float):
+        self.body, self.etag, self.version, self.at = body, etag, version, at
+
+class AnalyticsCache:
+    """
+    Serialized analytics responses keyed on the normalized query parameters.
+    An entry is fresh while no write happened since it was computed and it is
+    younger than ttl_s. A stale entry younger than max_stale_s is still served
+    while one background refresh runs (stale-while-revalidate); anything older
+    is recomputed inline. Each body carries a content ETag for 304s.
+    """
+
+    def __init__(self, ttl_s: float = 60.0, max_stale_s: float = 5.0, max_entries: int = 64):
+        self.ttl_s = float(ttl_s)
+        self.max_stale_s = float(max_stale_s)
+        self.max_entries = max(1, int(max_entries))
+        self._entries: dict[tuple, _Entry] = {}
+        # striped by key hash: keys come from query parameters, a lock per key would grow unbounded
+        self._key_locks = [threading.Lock() for _ in range(KEY_LOCK_STRIPES)]
+        self._refreshing: set[tuple] = set()
+        self._lock = threading.Lock()
+        self._counts = {"fresh": 0, "stale_served": 0, "computed": 0, "revalidated": 0, "not_modified": 0}
+
+    @classmethod
+    def from_env(cls) -> "AnalyticsCache":
+        return cls(
+            ttl_s=float(os.getenv("ANALYTICS_CACHE_TTL_S", "60")),
+            max_stale_s=float(os.getenv("ANALYTICS_CACHE_MAX_STALE_S", "5")),
+        )
+
+    def _count(self, name: str):
+        with self._lock:
+            self._counts[name] += 1
+
+    def _store(self, key, payload: dict, version: int) -> _Entry:
+        body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        ent = _Entry(body, '"' + hashlib.sha1(body).hexdigest() + '"', version, monotonic())
+        with self._lock:
+            self._entries[key] = ent
+            while len(self._entries) > self.max_entries:
+                self._entries.pop(min(self._entries, key=lambda k: self._entries[k].at))
+        return ent
+
+    def _compute(self, key, compute: Callable[[Session], dict], db: Session) -> _Entry:
+        version = data_version()  # read first: a write during compute leaves the entry stale
+        return self._store(key, compute(db), version)
+
+    def _revalidate(self, key, compute):
+        try:
+            with ReadSessionLocal() as db:
+                self._compute(key, compute, db)
+            self._count("revalidated")
+        except Exception as e:
+            print(f"[analytics_cache] refresh failed: {e}", file=sys.stderr)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def get(self, key: tuple, compute: Callable[[Session], dict], db: Session) -> _Entry:
+        ent = self._entries.get(key)
+        now = monotonic()
+        if ent is not None:
+            age = now - ent.at
+            if ent.version == data_version() and age <= self.ttl_s:
+                self._count("fresh")
+                return ent
+            if age <= self.max_stale_s:
+                with self._lock:
+                    start = key not in self._refreshing
+                    self._refreshing.add(key)
+                if start:
+                    threading.Thread(target=self._revalidate, args=(key, compute), daemon=True).start()
+                self._count("stale_served")
+                return ent
+
+        with self._key_locks[hash(key) % len(self._key_locks)]:  # identical cold requests compute once
+            ent = self._entries.get(key)
+            if ent is not None and ent.at >= now and ent.version == data_version():
+                self._count("fresh")
+                return ent
+            self._count("computed")
+            return self._compute(key, compute, db)
+
+    def note_not_modified(self):
+        self._count("not_modified")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "ttl_s": self.ttl_s,
+                "max_stale_s": self.max_stale_s,
+                "entries": len(self._entries),
+                "data_version": data_version(),
+                **self._counts,
+            }
+
+analytics_cache = AnalyticsCache.from_env()
+register_stats("analytics_cache", analytics_cache.stats)
@@ -0,0 +1,79 @@
+import os, threading
+from collections import OrderedDict
+import torch, torchaudio
+
+from utils.timing import stage
+
+class AudioFeatureExtractor:
+    """
+    Log-mel features for the TorchScript audio model.
+    Mel filterbank, window and dB transform are built once; resamplers are
+    cached per input sample rate (LRU, bounded). Output matches the
+    per-request pipeline that built every transform from scratch.
+    """
+
+    def __init__(self, target_sr: int = 16000, n_mels: int = 80, win_ms: float = 25.0,
+                 hop_ms: float = 10.0, n_fft: int = 512, top_db: float = 80.0,
+                 max_resamplers: int = 8):
+        self.target_sr = int(target_sr)
+        self.n_mels = int(n_mels)
+        self.n_fft = int(n_fft)
+        self.win_length = int(self.target_sr * win_ms / 1000.0)
+        self.hop_length = int(self.target_sr * hop_ms / 1000.0)
+        self.top_db = top_db
+        self.max_resamplers = max(1, int(max_resamplers))
+
+        self.melspec = torchaudio.transforms.MelSpectrogram(
+            sample_rate=self.target_sr, n_fft=self.n_fft,
+            win_length=self.win_length, hop_length=self.hop_length,
+            n_mels=self.n_mels, center=True, power=2.0
+        )
+        self.to_db = torchaudio.transforms.AmplitudeToDB(top_db=top_db)
+
+        self._resamplers: "OrderedDict[int, torchaudio.transforms.Resample]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "AudioFeatureExtractor":
+        # Feature extraction must match training
+        return cls(
+            target_sr=int(os.getenv("AUDIO_TARGET_SR", "16000")),
+            n_mels=int(os.getenv("AUDIO_N_MELS", "80")),
+            win_ms=float(os.getenv("AUDIO_WIN_MS", "25")),
+            hop_ms=float(os.getenv("AUDIO_HOP_MS", "10")),
+            n_fft=int(os.getenv("AUDIO_N_FFT", "512")),
+            max_resamplers=int(os.getenv("AUDIO_RESAMPLER_CACHE", "8")),
+        )
+
+    def resampler(self, orig_sr: int) -> "torchaudio.transforms.Resample":
+        with self._lock:
+            rs = self._resamplers.get(orig_sr)
+            if rs is not None:
+                self._resamplers.move_to_end(orig_sr)
+                return rs
+        # Kernel construction is the expensive part; do it outside the lock
+        rs = torchaudio.transforms.Resample(orig_freq=orig_sr, new_freq=self.target_sr)
+        with self._lock:
+            self._resamplers[orig_sr] = rs
+            self._resamplers.move_to_end(orig_sr)
+            while len(self._resamplers) > self.max_resamplers:
+                self._resamplers.popitem(last=False)
+        return rs
+
+    def waveform(self, wav: torch.Tensor, sr: int) -> torch.Tensor:
+        """[C, T] at any rate -> mono [T] at target_sr."""
+        if wav.ndim == 2 and wav.size(0) > 1:
+            wav = wav.mean(dim=0, keepdim=True)  # mono
+        if sr != self.target_sr:
+            with stage("resample"):
+                wav = self.resampler(sr)(wav)
+        return wav.squeeze(0)  # [T]
+
+    def __call__(self, wav: torch.Tensor, sr: int) -> torch.Tensor:
+        """[C, T] waveform -> [1, T_frames, n_mels] float32 log-mel features."""
+        wav = self.waveform(wav, sr)
+        with stage("mel"):
+            mel = self.melspec(wav)  # [n_mels, T_frames]
+            mel = self.to_db(mel)
+        mel = mel.transpose(0, 1)  # [T_frames, n_mels]
+        return mel.unsqueeze(0).contiguous()
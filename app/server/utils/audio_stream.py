@@ -0,0 +1,186 @@
+import threading
+from collections import deque
+import numpy as np
+
+from utils.metrics import register_stats
+
+ENCODINGS = {"s16le": (np.dtype("<i2"), 1.0 / 32768.0), "f32le": (np.dtype("<f4"), 1.0)}
+
+class PcmDecoder:
+    """Raw little-endian PCM chunks -> mono float32 samples; keeps a partial frame across chunks."""
+
+    def __init__(self, encoding: str, channels: int):
+        self.dtype, self.scale = ENCODINGS[encoding]
+        self.channels = max(1, int(channels))
+        self.frame_bytes = self.dtype.itemsize * self.channels
+        self._rest = b""
+
+    def __call__(self, chunk: bytes) -> np.ndarray:
+        data = self._rest + chunk
+        usable = len(data) - len(data) % self.frame_bytes
+        self._rest = data[usable:]
+        x = np.frombuffer(data[:usable], dtype=self.dtype).astype(np.float32)
+        if self.scale != 1.0:
+            x *= self.scale
+        if self.channels > 1:
+            x = x.reshape(-1, self.channels).mean(axis=1)
+        return x
+
+class _Windowed:
+    """
+    Rolling window bookkeeping shared by both buffers: counts units (frames or
+    samples) since the last emitted window and says when the next one is due.
+    Units that pass while a window is already due are reported as skipped.
+    """
+
+    def __init__(self, window_units: int, hop_units: int, units_per_s: float):
+        self.window_units = max(1, int(window_units))
+        self.hop_units = max(1, int(hop_units))
+        self.units_per_s = float(units_per_s)
+        self.total_units = 0
+        # units since the previous window ended one hop ago; the first window
+        # becomes due once a full window_units have arrived
+        self._since = self.hop_units - self.window_units
+
+    def _advance(self, n: int):
+        self.total_units += n
+        self._since += n
+
+    def due(self) -> bool:
+        return self._since >= self.hop_units
+
+    def take(self) -> int:
+        """Marks the current window as emitted; returns how many hops were skipped to get here."""
+        skipped = self._since // self.hop_units - 1
+        # keep the overshoot past the hop, so window starts stay on the hop grid
+        self._since -= (skipped + 1) * self.hop_units
+        return skipped
+
+    def window_bounds(self) -> tuple[float, float]:
+        """(start, end) of the current window in seconds of received audio."""
+        end = self.total_units / self.units_per_s
+        return max(0.0, end - self.window_units / self.units_per_s), end
+
+class StreamingLogMel(_Windowed):
+    """
+    Incremental log-mel for the TorchScript model. Each pushed chunk only adds
+    STFT frames for the new samples (center=False framing, so a frame never
+    depends on audio that hasn't arrived); power-mel frames live in a deque
+    holding exactly one window. The dB conversion (with its window-relative
+    top_db floor) is applied per window, like on a whole clip.
+    Window, filterbank and resamplers come from the shared AudioFeatureExtractor.
+
+    This is not the offline framing: utils/audio_features.py uses center=True,
+    which adds about n_fft / (2 * hop) reflect-padded frames at each end of a
+    clip. Interior frames are the same (shifted by n_fft // 2 samples), but a
+    window here lacks those edge frames, so its scores can differ slightly
+    from uploading the same audio as a clip.
+    """
+
+    def __init__(self, features, sample_rate: int, window_s: float, hop_s: float):
+        import torch  # REAL mode only
+        self._torch = torch
+        self.f = features
+        self.sample_rate = int(sample_rate)
+        self.n_fft, self.hop, self.win_length = features.n_fft, features.hop_length, features.win_length
+        self.window = features.melspec.spectrogram.window
+        self.fb = features.melspec.mel_scale.fb  # [n_freqs, n_mels]
+        frames_per_s = features.target_sr / self.hop
+        super().__init__(round(window_s * frames_per_s), round(hop_s * frames_per_s), frames_per_s)
+        self._frames = deque(maxlen=self.window_units)  # power-mel frames, [n_mels] each
+        self._tail = torch.zeros(0)  # samples not yet covered by a full frame (< n_fft)
+
+    def push(self, samples: np.ndarray) -> int:
+        torch = self._torch
+        x = torch.from_numpy(samples)
+        if self.sample_rate != self.f.target_sr:
+            # chunk-wise resampling: cached kernel, small seams at chunk edges
+            x = self.f.resampler(self.sample_rate)(x)
+        buf = torch.cat([self._tail, x])
+        if buf.numel() < self.n_fft:
+            self._tail = buf
+            return 0
+        n = 1 + (buf.numel() - self.n_fft) // self.hop
+        # only the last window's worth of frames can ever be used
+        first = max(0, n - self.window_units)
+        seg = buf[first * self.hop:(n - 1) * self.hop + self.n_fft]
+        spec = torch.stft(seg, self.n_fft, hop_length=self.hop, win_length=self.win_length,
+                          window=self.window, center=False, return_complex=True)
+        mel = spec.abs().pow(2).transpose(0, 1) @ self.fb  # [n - first, n_mels]
+        self._frames.extend(mel.unbind(0))
+        self._tail = buf[n * self.hop:].clone()
+        self._advance(n)
+        return n
+
+    def snapshot(self):
+        """[1, T, n_mels] log-mel features of the current window."""
+        mel = self._torch.stack(tuple(self._frames), dim=1)  # [n_mels, T]
+        return self.f.to_db(mel).transpose(0, 1).unsqueeze(0).contiguous()
+
+class StreamingSamples(_Windowed):
+    """Rolling window of raw samples (MOCK mode: the mock scorer hashes the window)."""
+
+    def __init__(self, sample_rate: int, window_s: float, hop_s: float):
+        super().__init__(round(window_s * sample_rate), round(hop_s * sample_rate), sample_rate)
+        self._buf = np.zeros(0, dtype=np.float32)
+
+    def push(self, samples: np.ndarray) -> int:
+        self._buf = np.concatenate([self._buf, samples])[-self.window_units:]
+        self._advance(len(samples))
+        return len(samples)
+
+    def snapshot(self) -> np.ndarray:
+        return self._buf.copy()
+
+_features = None
+_features_lock = threading.Lock()
+
+def shared_features():
+    """One AudioFeatureExtractor (same env config as the model loader) for all streams."""
+    global _features
+    with _features_lock:
+        if _features is None:
+            from utils.audio_features import AudioFeatureExtractor
+            _features = AudioFeatureExtractor.from_env()
+        return _features
+
+class EmaScores:
+    """Exponential moving average of per-window score dicts."""
+
+    def __init__(self, alpha: float):
+        self.alpha = min(1.0, max(0.0, float(alpha)))
+        self.value: dict | None = None
+
+    def update(self, scores: dict) -> dict:
+        if self.value is None:
+            self.value = dict(scores)
+        else:
+            a = self.alpha
+            self.value = {k: a * v + (1.0 - a) * self.value.get(k, v) for k, v in scores.items()}
+        return self.value
+
+class StreamStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.active = 0
+        self._counts = {"connections": 0, "rejected": 0, "windows_scored": 0, "windows_dropped": 0, "bytes_in": 0}
+
+    def add(self, name: str, n: int = 1):
+        with self._lock:
+            self._counts[name] += n
+
+    def opened(self):
+        with self._lock:
+            self.active += 1
+            self._counts["connections"] += 1
+
+    def closed(self):
+        with self._lock:
+            self.active -= 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"active": self.active, **self._counts}
+
+stream_stats = StreamStats()
+register_stats("audio_stream", stream_stats.stats)
@@ -1,16 +1,98 @@
-import wave, contextlib
+import wave, contextlib, struct
+from typing import NamedTuple
+import numpy as np
 
-def sniff_wav(path: str) -> bool:
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+class DecodedWav(NamedTuple):
+    """Parsed WAV header + location of the PCM payload inside the original bytes."""
+    buf: bytes          # the upload itself; samples are read from it in place
+    offset: int         # start of the data chunk payload
+    nbytes: int         # whole frames only
+    fmt: int            # WAVE_FORMAT_PCM or WAVE_FORMAT_IEEE_FLOAT
+    channels: int
+    sample_rate: int
+    sample_width: int   # bytes per sample
+    frames: int
+
+    @property
+    def duration(self) -> float:
+        return self.frames / float(self.sample_rate) if self.sample_rate else 0.0
+
+    def to_float32(self) -> np.ndarray:
+        """[C, T] float32, scaled the same way torchaudio.load(normalize=True) does."""
+        w, n, off = self.sample_width, self.frames * self.channels, self.offset
+        if self.fmt == WAVE_FORMAT_IEEE_FLOAT:
+            x = np.frombuffer(self.buf, dtype="<f4" if w == 4 else "<f8", count=n, offset=off)
+            x = x.astype(np.float32)  # always a copy: a view of the upload is read-only
+        elif w == 1:  # unsigned 8-bit
+            x = (np.frombuffer(self.buf, dtype=np.uint8, count=n, offset=off).astype(np.float32) - 128.0) / np.float32(128.0)
+        elif w == 2:
+            x = np.frombuffer(self.buf, dtype="<i2", count=n, offset=off).astype(np.float32) * np.float32(2.0 ** -15)
+        elif w == 3:  # packed 24-bit: widen into the top bytes of an int32
+            b = np.frombuffer(self.buf, dtype=np.uint8, count=n * 3, offset=off).reshape(-1, 3).astype(np.int32)
+            x = ((b[:, 0] << 8) | (b[:, 1] << 16) | (b[:, 2] << 24)).astype(np.float32) * np.float32(2.0 ** -31)
+        else:
+            x = np.frombuffer(self.buf, dtype="<i4", count=n, offset=off).astype(np.float32) * np.float32(2.0 ** -31)
+        return x.reshape(self.frames, self.channels).T  # interleaved -> [C, T]
+
+def decode_wav(blob: bytes) -> DecodedWav | None:
+    """
+    Single pass over the RIFF chunks of an in-memory WAV. Returns None if it isn't
+    an uncompressed PCM / float WAV we can read. No samples are copied here.
+    """
+    if len(blob) < 12 or blob[0:4] != b"RIFF" or blob[8:12] != b"WAVE":
+        return None
+    pos, fmt = 12, None
+    while pos + 8 <= len(blob):
+        cid = blob[pos:pos + 4]
+        size = int.from_bytes(blob[pos + 4:pos + 8], "little")
+        body = pos + 8
+        if cid == b"fmt ":
+            if size < 16 or body + 16 > len(blob):
+                return None
+            tag, channels, sr, _, align, bits = struct.unpack_from("<HHIIHH", blob, body)
+            if tag == WAVE_FORMAT_EXTENSIBLE and size >= 40:
+                tag = struct.unpack_from("<H", blob, body + 24)[0]  # sub-format GUID starts with the tag
+            width = (bits + 7) // 8
+            ok = (tag == WAVE_FORMAT_PCM and width in (1, 2, 3, 4)) or (tag == WAVE_FORMAT_IEEE_FLOAT and width in (4, 8))
+            if not ok or channels < 1 or sr <= 0 or align != channels * width:
+                return None
+            fmt = (tag, channels, sr, width)
+        elif cid == b"data":
+            if fmt is None:
+                return None
+            # Streamed WAVs (e.g. ffmpeg writing to a pipe) carry placeholder sizes
+            size = min(size, len(blob) - body)
+            tag, channels, sr, width = fmt
+            frames = size // (channels * width)
+            return DecodedWav(blob, body, frames * channels * width, tag, channels, sr, width, frames)
+        pos = body + size + (size & 1)  # chunks are word-aligned
+    return None
+
+def sniff_wav(src: "str | bytes | DecodedWav") -> bool:
+    if isinstance(src, DecodedWav):
+        return True
+    if isinstance(src, (bytes, bytearray)):
+        return decode_wav(bytes(src)) is not None
     # Validation: openable as WAV, PCM/uncompressed
     try:
-        with contextlib.closing(wave.open(path, "rb")) as wf:
+        with contextlib.closing(wave.open(src, "rb")) as wf:
             # If this works without error, assume valid enough for prototype
             return wf.getcomptype() in ("NONE", "ULAW", "ALAW")# common types
     except Exception:
         return False
 
-def wav_duration_seconds(path: str) -> tuple[float, int]:
-    with contextlib.closing(wave.open(path, "rb")) as wf:
+def wav_duration_seconds(src: "str | bytes | DecodedWav") -> tuple[float, int]:
+    if isinstance(src, (bytes, bytearray)):
+        src = decode_wav(bytes(src))
+        if src is None:
+            return 0.0, 0
+    if isinstance(src, DecodedWav):
+        return src.duration, src.sample_rate
+    with contextlib.closing(wave.open(src, "rb")) as wf:
         frames = wf.getnframes()
         sr = wf.getframerate()
         duration = frames / float(sr) if sr else 0.0
@@ -0,0 +1,141 @@
+import contextvars, os, threading, queue
+from collections import deque, Counter
+from concurrent.futures import Future
+from time import perf_counter
+from typing import Callable, List, Any
+
+_STOP = object()  # queued by close(): the worker thread exits when it reaches it
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-item calls into one call of `fn(items) -> results`.
+    The first queued item opens a window; the batch is dispatched when it holds
+    max_batch_size items or max_wait_ms has passed since the window opened.
+    `callers`, if given, returns how many threads may submit right now; once
+    the batch holds that many, nobody else can join and it goes out at once,
+    so a lone request doesn't sit out the window.
+    Callers block in submit() until their own result (or exception) is ready.
+    `init` runs first on the worker thread, e.g. to pin it like the pool whose
+    work it does.
+    """
+
+    def __init__(self, fn: Callable[[List[Any]], List[Any]], max_batch_size: int = 8,
+                 max_wait_ms: float = 5.0, name: str = "batch", init: Callable[[], None] | None = None,
+                 callers: Callable[[], int] | None = None):
+        self.fn = fn
+        self.init = init
+        self.callers = callers
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait_s = max(0.0, float(max_wait_ms)) / 1000.0
+        self.name = name
+        self._q: "queue.Queue[tuple[Any, Future, float, contextvars.Context]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        # stats
+        self._batches = 0
+        self._items = 0
+        self._sizes = Counter()
+        self._waits_ms = deque(maxlen=2048)  # recent per-item queue waits
+        self._run_ms_total = 0.0
+        self._early = 0  # batches dispatched before the window closed because no one else could join
+
+    def _ensure_worker(self):
+        # (Re)start lazily, also after a fork: threads do not survive fork().
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            if self._pid != os.getpid():
+                self._q = queue.Queue()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._loop, name=f"{self.name}-batcher", daemon=True)
+            self._thread.start()
+
+    def submit(self, item):
+        self._ensure_worker()
+        fut: Future = Future()
+        # the batch runs in the first item's context, so its stage timings land in that request
+        self._q.put((item, fut, perf_counter(), contextvars.copy_context()))
+        return fut.result()
+
+    def close(self):
+        """Stops the worker thread once the items already queued are done."""
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                self._q.put(_STOP)
+
+    def _collect(self):
+        first = self._q.get()
+        if first is _STOP:
+            return None
+        batch = [first]
+        deadline = first[2] + self.max_wait_s
+        while len(batch) < self.max_batch_size:
+            if self.callers is not None and self._q.empty() and len(batch) >= self.callers():
+                self._early += 1
+                break
+            remaining = deadline - perf_counter()
+            try:
+                # past the deadline: drain whatever is already waiting, without blocking
+                item = self._q.get_nowait() if remaining <= 0 else self._q.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                self._q.put(item)  # finish this batch, stop at the next _collect
+                break
+            batch.append(item)
+        return batch
+
+    def _loop(self):
+        if self.init is not None:
+            self.init()
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            start = perf_counter()
+            items = [b[0] for b in batch]
+            try:
+                results = batch[0][3].run(self.fn, items)
+                if len(results) != len(items):
+                    raise RuntimeError(f"{self.name}: got {len(results)} results for {len(items)} items")
+            except Exception as e:
+                for _, fut, _, _ in batch:
+                    fut.set_exception(e)
+            else:
+                for (_, fut, _, _), res in zip(batch, results):
+                    fut.set_result(res)
+            done = perf_counter()
+            with self._lock:
+                self._batches += 1
+                self._items += len(batch)
+                self._sizes[len(batch)] += 1
+                self._run_ms_total += (done - start) * 1000.0
+                self._waits_ms.extend((start - t0) * 1000.0 for _, _, t0, _ in batch)
+
+    def stats(self) -> dict:
+        with self._lock:
+            waits = sorted(self._waits_ms)
+            batches, items = self._batches, self._items
+            sizes = dict(sorted(self._sizes.items()))
+            run_ms = self._run_ms_total
+
+        def pct(p):
+            if not waits: return None
+            return waits[min(len(waits) - 1, int(p / 100.0 * len(waits)))]
+
+        return {
+            "enabled": True,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_s * 1000.0,
+            "batches": batches,
+            "items": items,
+            "avg_batch_size": (items / batches) if batches else None,
+            "batch_size_hist": {str(k): v for k, v in sizes.items()},
+            "avg_batch_run_ms": (run_ms / batches) if batches else None,
+            "early_dispatches": self._early,
+            "queue_wait_ms": {"p50": pct(50), "p95": pct(95), "p99": pct(99), "max": (waits[-1] if waits else None)},
+            "queue_depth": self._q.qsize(),
+        }
@@ -1,13 +1,74 @@
 import os
-from sqlalchemy import create_engine
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import QueuePool
+
+load_dotenv()  # DB_* settings below may come from server/.env
 
 DB_URL = os.getenv("DATABASE_URL", "sqlite:///data/app.db")
 _is_sqlite = DB_URL.startswith("sqlite:")
+_is_memory = _is_sqlite and (":memory:" in DB_URL or DB_URL.rstrip("/") == "sqlite:")
+
+# "tuned": WAL + pragmas below and a separate read-only pool for analytics.
+# "default": SQLAlchemy defaults, one pool for everything (the old behaviour).
+DB_PROFILE = os.getenv("DB_PROFILE", "tuned").lower()
+
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("DB_JOURNAL_MODE", "WAL"),  # readers no longer block the writer
+    "synchronous": os.getenv("DB_SYNCHRONOUS", "NORMAL"),  # WAL+NORMAL: fsync at checkpoints, not every commit
+    "busy_timeout": int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000")),  # wait for the write lock instead of "database is locked"
+    "cache_size": -int(os.getenv("DB_CACHE_SIZE_KB", "65536")),  # negative = KiB, per connection
+    "mmap_size": int(os.getenv("DB_MMAP_SIZE_MB", "256")) << 20,
+    "temp_store": os.getenv("DB_TEMP_STORE", "MEMORY"),  # sorts/GROUP BY temp b-trees stay in RAM
+}
+
+def _pool_args(size: int, overflow: int) -> dict:
+    if _is_memory:
+        return {}  # in-memory SQLite: keep SQLAlchemy's single-connection pool
+    return {
+        "poolclass": QueuePool,
+        "pool_size": size,
+        "max_overflow": overflow,
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT_S", "30")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE_S", "3600")),
+    }
+
+def _apply_pragmas(engine, read_only: bool):
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_conn, _record):
+        cur = dbapi_conn.cursor()
+        for name, value in SQLITE_PRAGMAS.items():
+            if read_only and name == "journal_mode":
+                continue  # persistent in the file; set by the write engine
+            cur.execute(f"PRAGMA {name}={value}")
+        if read_only:
+            cur.execute("PRAGMA query_only=ON")
+        cur.close()
+
+def _make_engine(url: str, read_only: bool = False):
+    if DB_PROFILE != "tuned":
+        return create_engine(url, connect_args={"check_same_thread": False} if _is_sqlite else {})
+    if read_only:
+        pool = _pool_args(int(os.getenv("DB_READ_POOL_SIZE", "4")), int(os.getenv("DB_READ_MAX_OVERFLOW", "4")))
+    else:
+        pool = _pool_args(int(os.getenv("DB_POOL_SIZE", "5")), int(os.getenv("DB_MAX_OVERFLOW", "10")))
+    engine = create_engine(url, connect_args={"check_same_thread": False} if _is_sqlite else {}, **pool)
+    if _is_sqlite:
+        _apply_pragmas(engine, read_only)
+    return engine
 
-engine = create_engine(DB_URL, connect_args={"check_same_thread": False} if _is_sqlite else {})
+engine = _make_engine(DB_URL)
+
+# Heavy analytics reads go through their own pool so they never hold the
+# writers' connections; SQLite read connections are query_only.
+if DB_PROFILE == "tuned" and not _is_memory:
+    read_engine = _make_engine(os.getenv("DATABASE_READ_URL", DB_URL), read_only=True)
+else:
+    read_engine = engine
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 Base = declarative_base()
 
 # FastAPI dependency
@@ -17,3 +78,11 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# FastAPI dependency for read-only endpoints (analytics)
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
@@ -0,0 +1,217 @@
+import asyncio, contextvars, multiprocessing, os, sys, threading
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, ProcessPoolExecutor
+
+from utils.metrics import register_stats
+from utils.timing import run_captured, replay
+
+MODALITIES = ("text", "audio")
+
+class QueueFull(Exception):
+    """A modality's pool already holds workers + queue_max jobs; answered with 503 (main.py)."""
+    status_code = 503
+    code = "QUEUE_FULL"
+
+    def __init__(self, modality: str, limit: int):
+        self.modality = modality
+        self.message = f"Too many {modality} requests in flight ({limit} queued); retry shortly."
+        super().__init__(self.message)
+
+def parse_cpus(spec: str | None) -> frozenset[int] | None:
+    """"0-3,6" -> {0, 1, 2, 3, 6}; empty -> None (no pinning)."""
+    cpus = set()
+    for part in (spec or "").replace(" ", "").split(","):
+        if not part:
+            continue
+        lo, _, hi = part.partition("-")
+        cpus.update(range(int(lo), int(hi or lo) + 1))
+    return frozenset(cpus) or None
+
+def _set_torch_threads(n: int):
+    # torch is only imported when a REAL model will run here (scripts/check_mock_imports.py)
+    if os.getenv("MODE", "MOCK").upper() != "REAL" and "torch" not in sys.modules:
+        return
+    import torch
+    torch.set_num_threads(n)
+
+def pin_current_thread(modality: str, cpus: frozenset[int] | None, nice: int):
+    """
+    Applies a pool's core set and nice to the calling thread. Linux keeps both
+    per thread, and threads started from it (torch's OpenMP team included)
+    inherit them, so this isolates thread pools as well as worker processes.
+    """
+    if cpus and hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(0, cpus)
+        except OSError as e:
+            print(f"[executor] {modality}: cannot pin to CPUs {sorted(cpus)}: {e}", file=sys.stderr)
+    if nice and hasattr(os, "setpriority"):
+        try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), nice)
+        except OSError as e:
+            print(f"[executor] {modality}: cannot set nice {nice}: {e}", file=sys.stderr)
+
+def init_pool_worker(modality: str, cpus: frozenset[int] | None, torch_threads: int, nice: int, init=None):
+    """
+    Runs first in every worker process. torch.set_num_threads is process-wide,
+    so the per-worker budget only holds here, where the process is the worker.
+    """
+    pin_current_thread(modality, cpus, nice)
+    if torch_threads:
+        _set_torch_threads(torch_threads)
+    if init is not None:
+        init(modality)
+
+class InferenceExecutor:
+    """
+    Separate worker pools per modality for CPU-heavy model work, so it never
+    runs on the event loop and a burst of one modality can't take all workers.
+
+    kind="thread": cheap, shares loaded models and the text micro-batcher.
+    kind="process": sidesteps the GIL for pre/post-processing; each worker
+    process loads its own model copy, so submitted callables must be
+    module-level functions and arguments must be picklable.
+
+    Per pool: `cpus` pins its workers to a core set, `torch_threads` caps
+    torch intra-op threads per worker (default: its cores / workers when
+    pinned), `nice` lowers its OS priority and `queue_max` bounds the jobs
+    waiting for a worker (submit raises QueueFull beyond it; 0 = unbounded).
+    Threads doing a pool's work outside it (the text batcher) call pin_thread.
+
+    torch's thread count is process-wide, so with kind="thread" the budgets
+    can't differ per pool: the largest one is applied once to the process.
+    Core sets and nice still apply per pool; separate torch budgets need
+    kind="process".
+    """
+
+    def __init__(self, kind: str = "thread", workers: dict | None = None, start_method: str = "spawn",
+                 cpus: dict | None = None, torch_threads: dict | None = None, nice: dict | None = None,
+                 queue_max: dict | None = None):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown executor kind: {kind}")
+        self.kind = kind
+        self.workers = {m: max(1, int((workers or {}).get(m, 1))) for m in MODALITIES}
+        self.start_method = start_method
+        self.cpus = {m: (cpus or {}).get(m) for m in MODALITIES}
+        self.torch_threads = {m: int((torch_threads or {}).get(m) or 0) for m in MODALITIES}
+        for m, c in self.cpus.items():
+            if c and not self.torch_threads[m]:
+                self.torch_threads[m] = max(1, len(c) // self.workers[m])
+        self.nice = {m: int((nice or {}).get(m) or 0) for m in MODALITIES}
+        self.queue_max = {m: max(0, int((queue_max or {}).get(m) or 0)) for m in MODALITIES}
+        self._pools: dict[str, Executor] = {}
+        self._inflight = {m: 0 for m in MODALITIES}
+        self._submitted = {m: 0 for m in MODALITIES}
+        self._rejected = {m: 0 for m in MODALITIES}
+        self._lock = threading.Lock()
+        self._torch_threads_set = False
+        self.worker_init = None  # fn(modality), run once in every new worker process
+
+    @classmethod
+    def from_env(cls) -> "InferenceExecutor":
+        return cls(
+            kind=os.getenv("INFER_EXECUTOR", "thread").lower(),
+            workers={
+                "text": os.getenv("TEXT_INFER_WORKERS", "8"),
+                "audio": os.getenv("AUDIO_INFER_WORKERS", "2"),
+            },
+            start_method=os.getenv("INFER_MP_START", "spawn"),
+            cpus={m: parse_cpus(os.getenv(f"{m.upper()}_INFER_CPUS")) for m in MODALITIES},
+            torch_threads={m: os.getenv(f"{m.upper()}_TORCH_THREADS") for m in MODALITIES},
+            nice={m: os.getenv(f"{m.upper()}_INFER_NICE") for m in MODALITIES},
+            queue_max={m: os.getenv(f"{m.upper()}_INFER_QUEUE_MAX") for m in MODALITIES},
+        )
+
+    def pin_thread(self, modality: str):
+        """Gives the calling thread the core set and nice of a modality's pool."""
+        pin_current_thread(modality, self.cpus[modality], self.nice[modality])
+
+    def active(self, modality: str) -> int:
+        """Jobs of a modality running on a worker right now (not waiting for one)."""
+        with self._lock:
+            return min(self._inflight[modality], self.workers[modality])
+
+    def _apply_shared_torch_threads(self):
+        # caller holds self._lock
+        n = max(self.torch_threads.values())
+        if n and not self._torch_threads_set:
+            _set_torch_threads(n)
+            self._torch_threads_set = True
+
+    def _pool(self, modality: str) -> Executor:
+        pool = self._pools.get(modality)
+        if pool is not None:
+            return pool
+        with self._lock:
+            pool = self._pools.get(modality)
+            if pool is None:
+                n = self.workers[modality]
+                init_args = (modality, self.cpus[modality], self.torch_threads[modality], self.nice[modality])
+                if self.kind == "process":
+                    init = self.worker_init
+                    pool = ProcessPoolExecutor(max_workers=n, mp_context=multiprocessing.get_context(self.start_method),
+                                               initializer=init_pool_worker, initargs=(*init_args, init))
+                else:
+                    self._apply_shared_torch_threads()
+                    pool = ThreadPoolExecutor(max_workers=n, thread_name_prefix=f"infer-{modality}",
+                                              initializer=self.pin_thread, initargs=(modality,))
+                self._pools[modality] = pool
+        return pool
+
+    def submit(self, modality: str, fn, *args, **kwargs) -> Future:
+        pool = self._pool(modality)
+        with self._lock:
+            # bounded queue: fail fast instead of letting a burst build up unbounded latency
+            limit = self.queue_max[modality]
+            if limit and self._inflight[modality] >= self.workers[modality] + limit:
+                self._rejected[modality] += 1
+                raise QueueFull(modality, limit)
+            self._inflight[modality] += 1
+            self._submitted[modality] += 1
+        try:
+            if self.kind == "thread":
+                # carry request-scoped context (timers etc.) into the worker thread
+                fut = pool.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+            else:
+                fut = pool.submit(fn, *args, **kwargs)
+        except BaseException:
+            self._done(modality)
+            raise
+        fut.add_done_callback(lambda _f: self._done(modality))
+        return fut
+
+    def _done(self, modality: str):
+        with self._lock:
+            self._inflight[modality] -= 1
+
+    async def run(self, modality: str, fn, *args, **kwargs):
+        if self.kind == "process":
+            # stage timings recorded in the worker come back with the result
+            result, spans = await asyncio.wrap_future(self.submit(modality, run_captured, fn, *args, **kwargs))
+            replay(spans)
+            return result
+        return await asyncio.wrap_future(self.submit(modality, fn, *args, **kwargs))
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            pools, self._pools = self._pools, {}
+        for pool in pools.values():
+            pool.shutdown(wait=wait, cancel_futures=not wait)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "kind": self.kind,
+                "pools": {
+                    m: {"workers": self.workers[m], "in_flight": self._inflight[m],
+                        "queued": max(0, self._inflight[m] - self.workers[m]), "submitted": self._submitted[m],
+                        "rejected": self._rejected[m], "queue_max": self.queue_max[m] or None,
+                        "cpus": sorted(self.cpus[m]) if self.cpus[m] else None,
+                        "torch_threads": self.torch_threads[m] or None, "nice": self.nice[m]}
+                    for m in MODALITIES
+                },
+                # process-wide in thread mode: one value (the largest budget) for both pools
+                "torch_threads_scope": "worker" if self.kind == "process" else "process",
+            }
+
+executor = InferenceExecutor.from_env()
+register_stats("executor", executor.stats, labels={("pools",): "modality"})
@@ -0,0 +1,158 @@
+import bisect, re, threading
+from typing import Callable, Dict, Any
+
+# In-process stats sources: name -> zero-arg callable returning a JSON-able dict.
+# Components (batchers, caches, pools...) register themselves here and
+# /api/metrics snapshots them on demand.
+_SOURCES: Dict[str, Callable[[], Dict[str, Any]]] = {}
+# name -> ({key path: label name}, inline paths), for the Prometheus rendering
+_LABELS: Dict[str, tuple] = {}
+
+def register_stats(name: str, fn: Callable[[], Dict[str, Any]],
+                   labels: Dict[tuple, str] | None = None, inline: tuple = ()) -> None:
+    """
+    For Prometheus, `labels` maps a key path in fn's dict ("*" matches any
+    key) to a label name: the keys below it are data (modalities, model
+    versions), so {("pools",): "modality"} renders pools.text.workers as
+    <ns>_<name>_pools_workers{modality="text"}. Keys at an `inline` path add
+    nothing to the metric name.
+    """
+    _SOURCES[name] = fn
+    _LABELS[name] = (dict(labels or {}), tuple(inline))
+
+def snapshot() -> Dict[str, Any]:
+    out = {}
+    for name, fn in list(_SOURCES.items()):
+        try:
+            out[name] = fn()
+        except Exception as e:
+            out[name] = {"error": str(e)}
+    return out
+
+
+# Latency buckets in seconds: sub-ms stages (sniffing, tokenization) up to slow transcodes
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+class Histogram:
+    """
+    Fixed-bucket histogram keyed by a tuple of label values. observe() is a
+    bisect plus three additions under a lock, cheap enough for every request.
+    """
+
+    def __init__(self, name: str, help: str, labelnames: tuple, buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._series: dict[tuple, list] = {}  # labels -> [bucket counts (+Inf last), sum, count]
+
+    def observe(self, labels: tuple, value: float) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            s = self._series.get(labels)
+            if s is None:
+                s = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            s[0][i] += 1
+            s[1] += value
+            s[2] += 1
+
+    def _copy(self) -> dict:
+        with self._lock:
+            return {k: (list(v[0]), v[1], v[2]) for k, v in self._series.items()}
+
+    def _quantile(self, counts: list, total: int, q: float) -> float:
+        # linear interpolation inside the bucket holding the q-th observation
+        rank, seen, lo = q * total, 0, 0.0
+        for i, c in enumerate(counts):
+            if c and seen + c >= rank:
+                hi = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lo + (hi - lo) * (rank - seen) / c
+            seen += c
+            lo = self.buckets[i] if i < len(self.buckets) else lo
+        return lo
+
+    def stats(self) -> dict:
+        out = {}
+        for labels, (counts, total_s, n) in sorted(self._copy().items()):
+            key = "/".join(v or "-" for v in labels)
+            out[key] = {
+                "count": n,
+                "mean_ms": round(total_s / n * 1000, 3),
+                "p50_ms": round(self._quantile(counts, n, 0.50) * 1000, 3),
+                "p95_ms": round(self._quantile(counts, n, 0.95) * 1000, 3),
+                "p99_ms": round(self._quantile(counts, n, 0.99) * 1000, 3),
+            }
+        return out
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total_s, n) in sorted(self._copy().items()):
+            base = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(self.labelnames, labels))
+            sep = "," if base else ""
+            cum = 0
+            for le, c in zip(self.buckets, counts):
+                cum += c
+                lines.append(f'{self.name}_bucket{{{base}{sep}le="{le:g}"}} {cum}')
+            lines.append(f'{self.name}_bucket{{{base}{sep}le="+Inf"}} {n}')
+            lines.append(f"{self.name}_sum{{{base}}} {total_s:.6f}")
+            lines.append(f"{self.name}_count{{{base}}} {n}")
+        return lines
+
+_HISTOGRAMS: Dict[str, Histogram] = {}
+
+def histogram(name: str, help: str, labelnames: tuple, buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+    """Process-wide histogram `name`, created on first use."""
+    h = _HISTOGRAMS.get(name)
+    if h is None:
+        h = _HISTOGRAMS.setdefault(name, Histogram(name, help, labelnames, buckets))
+    return h
+
+def _escape(v) -> str:
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+_NAME_BAD = re.compile(r"[^a-zA-Z0-9_]+")
+
+def _matches(pat: tuple, path: tuple) -> bool:
+    return len(pat) == len(path) and all(p == "*" or p == k for p, k in zip(pat, path))
+
+def _gauges(name: str, labels: tuple, value, spec: tuple, path: tuple, out: dict) -> None:
+    # numeric leaves of the JSON snapshot, one sample each, grouped by metric name
+    if isinstance(value, bool):
+        value = int(value)
+    if isinstance(value, (int, float)):
+        out.setdefault(name, []).append((labels, value))
+    elif isinstance(value, dict):
+        label_paths, inline = spec
+        label = next((l for pat, l in label_paths.items() if _matches(pat, path)), None)
+        for k, v in value.items():
+            sub = path + (k,)
+            if label:
+                _gauges(name, labels + ((label, k),), v, spec, sub, out)
+            elif any(_matches(pat, sub) for pat in inline):
+                _gauges(name, labels, v, spec, sub, out)
+            else:
+                _gauges(f"{name}_{_NAME_BAD.sub('_', str(k)).strip('_')}", labels, v, spec, sub, out)
+
+def render_prometheus(namespace: str = "emotion_ai") -> str:
+    """
+    Prometheus text exposition (0.0.4): all histograms, then the stats sources
+    as gauges (one # TYPE per metric name; counters among them too, the
+    snapshot doesn't say which is which).
+    """
+    lines = []
+    for h in list(_HISTOGRAMS.values()):
+        lines += h.render()
+    families: dict[str, list] = {}
+    for name, stats in snapshot().items():
+        _gauges(f"{namespace}_{_NAME_BAD.sub('_', name)}", (), stats, _LABELS.get(name, ({}, ())), (), families)
+    for name, samples in families.items():
+        lines.append(f"# TYPE {name} gauge")
+        for labels, value in samples:
+            lbl = ",".join(f'{k}="{_escape(v)}"' for k, v in labels)
+            lines.append(f"{name}{{{lbl}}} {value}" if lbl else f"{name} {value}")
+    return "\n".join(lines) + "\n"
+
+def histogram_stats() -> Dict[str, Any]:
+    """Per-series count/mean/p50/p95/p99 (ms, interpolated from the buckets) of every histogram."""
+    return {name: h.stats() for name, h in list(_HISTOGRAMS.items())}
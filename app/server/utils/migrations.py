@@ -0,0 +1,110 @@
+"""
+Ordered, forward-only schema migrations. Applied versions are recorded in
+schema_migrations; each migration runs in its own transaction together with
+that record. Migrations must be idempotent: a fresh database gets the current
+schema from the baseline (create_all) and later steps find nothing to do.
+"""
+
+import sys
+from sqlalchemy import MetaData, inspect, select, text
+from sqlalchemy.schema import CreateTable
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import IntegrityError
+
+from utils.db import Base
+from utils import models  # registers every table on Base.metadata
+from utils.models import SchemaMigration
+
+def _baseline(conn: Connection):
+    # new tables (and their indexes) from the current models; existing tables are left alone
+    Base.metadata.create_all(bind=conn)
+
+def _typed_timestamps(conn: Connection):
+    # created_at/submitted_at used to be mapped as strings. Normalize any stored
+    # variant (ISO "T", fractions, offsets) to the canonical UTC text form so
+    # range filters and date() grouping compare like for like.
+    if conn.dialect.name == "sqlite":
+        for table, col in (("predictions", "created_at"), ("feedback", "submitted_at")):
+            conn.execute(text(
+                f"UPDATE {table} SET {col} = datetime({col}) "
+                f"WHERE {col} IS NOT NULL AND {col} <> datetime({col})"
+            ))
+    elif conn.dialect.name == "postgresql":
+        for table, col in (("predictions", "created_at"), ("feedback", "submitted_at")):
+            conn.execute(text(
+                f"ALTER TABLE {table} ALTER COLUMN {col} TYPE TIMESTAMP USING {col}::timestamp"
+            ))
+
+def _analytics_indexes(conn: Connection):
+    # superseded by the covering indexes declared in utils/models.py
+    for name in ("ix_predictions_modality_created", "ix_predictions_input_hash"):
+        conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+    for table in (models.Prediction.__table__, models.Feedback.__table__):
+        for idx in table.indexes:
+            idx.create(bind=conn, checkfirst=True)
+    if conn.dialect.name == "sqlite":
+        conn.execute(text("ANALYZE"))  # planner statistics, so the covering indexes get picked
+
+def _compact_scores(conn: Connection):
+    # label_sets table, predictions.scores_blob/label_set_id, and `scores` made
+    # nullable (rows in packed/top-k form leave it empty). Existing JSON rows stay
+    # as they are; scripts/migrate_scores.py converts them.
+    models.LabelSet.__table__.create(bind=conn, checkfirst=True)
+    for idx in models.LabelSet.__table__.indexes:
+        idx.create(bind=conn, checkfirst=True)
+    cols = {c["name"]: c for c in inspect(conn).get_columns("predictions")}
+    if "scores_blob" in cols and cols["scores"]["nullable"]:
+        return
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("ALTER TABLE predictions ALTER COLUMN scores DROP NOT NULL"))
+        conn.execute(text("ALTER TABLE predictions ADD COLUMN IF NOT EXISTS scores_blob BYTEA"))
+        conn.execute(text("ALTER TABLE predictions ADD COLUMN IF NOT EXISTS label_set_id INTEGER REFERENCES label_sets(id)"))
+        return
+    # SQLite can't relax NOT NULL in place: rebuild the table (new -> copy -> drop
+    # -> rename, the documented procedure). feedback's FK names "predictions", so
+    # it points at the rebuilt table once the rename is done.
+    table = models.Prediction.__table__
+    md = MetaData()
+    models.LabelSet.__table__.to_metadata(md)  # FK target, so the copy compiles
+    tmp = table.to_metadata(md, name="predictions_rebuild")
+    tmp.indexes.clear()
+    conn.execute(text("DROP TABLE IF EXISTS predictions_rebuild"))
+    conn.execute(CreateTable(tmp))
+    keep = ", ".join(c.name for c in table.columns if c.name in cols)
+    conn.execute(text(f"INSERT INTO predictions_rebuild ({keep}) SELECT {keep} FROM predictions"))
+    conn.execute(text("DROP TABLE predictions"))
+    conn.execute(text("ALTER TABLE predictions_rebuild RENAME TO predictions"))
+    for idx in table.indexes:
+        idx.create(bind=conn)
+    conn.execute(text("ANALYZE predictions"))
+
+MIGRATIONS = [
+    (1, "baseline", _baseline),
+    (2, "typed_timestamps", _typed_timestamps),
+    (3, "analytics_indexes", _analytics_indexes),
+    (4, "compact_scores", _compact_scores),
+]
+
+def applied_versions(engine: Engine) -> set[int]:
+    if not inspect(engine).has_table(SchemaMigration.__tablename__):
+        return set()
+    with engine.connect() as conn:
+        return set(conn.scalars(select(SchemaMigration.version)))
+
+def run_migrations(engine: Engine) -> list[int]:
+    """Applies pending migrations in order; returns the versions applied."""
+    SchemaMigration.__table__.create(bind=engine, checkfirst=True)
+    done = applied_versions(engine)
+    applied = []
+    for version, name, fn in MIGRATIONS:
+        if version in done:
+            continue
+        try:
+            with engine.begin() as conn:
+                fn(conn)
+                conn.execute(SchemaMigration.__table__.insert().values(version=version, name=name))
+        except IntegrityError:
+            continue  # another worker process applied it first
+        print(f"[migrations] applied {version:04d}_{name}", file=sys.stderr)
+        applied.append(version)
+    return applied
@@ -1,13 +1,21 @@
 import os, json, hashlib, sys
+from functools import lru_cache
 from pathlib import Path
 import numpy as np
 from dotenv import load_dotenv
-from pathlib import Path
-import torch, torchaudio
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
 
+# torch / torchaudio / transformers (and utils.audio_features, which needs torch)
+# are imported inside the REAL loaders only: MOCK mode, tooling and worker
+# spawns never pay for them. scripts/check_mock_imports.py guards this.
+load_dotenv()  # load server/.env into process env (before utils.* read their config)
+
+from utils.audio_utils import DecodedWav
+from utils.batching import MicroBatcher
+from utils.executor import executor
+from utils.metrics import register_stats
+from utils.model_registry import ModelRegistry
+from utils.timing import timed_ms, stage
 
-load_dotenv()  # load server/.env into process env
 
 def _resolve_path(p: str | None) -> str:
     if not p: return ""
@@ -44,24 +52,6 @@ MODE = os.getenv("MODE")
 # Labels (for mock defaults)
 DEFAULT_LABELS = ["joy","sadness","anger","fear","neutral","surprise","disgust"]
 
-def _ensure_text_loaded():
-    if MODE == "REAL" and _TEXT["pipe"] is None:
-        try:
-            labels, pipe, meta = _load_text_real()
-            _TEXT.update({"labels": labels, "pipe": pipe, "meta": meta})
-        except Exception as e:
-            print(f"[model_adapters] TEXT load failed: {e}", file=sys.stderr)
-    return _TEXT
-
-def _ensure_audio_loaded():
-    if MODE == "REAL" and _AUDIO["infer"] is None:
-        try:
-            labels, infer, meta = _load_audio_real()
-            _AUDIO.update({"labels": labels, "infer": infer, "meta": meta})
-        except Exception as e:
-            print(f"[model_adapters] AUDIO load failed: {e}", file=sys.stderr)
-    return _AUDIO
-
 def _seed_from_bytes(b: bytes) -> int:
     return int(hashlib.sha256(b).hexdigest()[:8], 16)
 
@@ -76,13 +66,75 @@ def _scores_from_seed(seed: int, labels) -> dict:
     probs = _softmax(logits).astype(float)
     return {lbl: float(p) for lbl, p in zip(labels, probs)}
 
-# Globals filled at first use
-_TEXT = {"labels": DEFAULT_LABELS, "meta": {"name":"bert-goemotions-mock","version":"dev-mock"}, "pipe": None}
-_AUDIO = {"labels": DEFAULT_LABELS, "meta": {"name":"speechbrain-ser-mock","version":"dev-mock"}, "infer": None}
+# Mock models: what MOCK mode serves, and the fallback while a REAL model fails to load
+_TEXT = {"labels": DEFAULT_LABELS, "meta": {"name":"bert-goemotions-mock","version":"dev-mock"}, "pipe": None, "pipe_batch": None, "batcher": None, "error": None}
+_AUDIO = {"labels": DEFAULT_LABELS, "meta": {"name":"speechbrain-ser-mock","version":"dev-mock"}, "infer": None, "score_feats": None, "error": None}
+
+# TEXT_BACKEND -> suffix on the reported model version, so cached results,
+# stored predictions and analytics tell backends apart
+TEXT_BACKENDS = {"torch": "", "torch-int8": "+int8", "onnx": "+onnx"}
+
+def _text_backend_name() -> str:
+    return os.getenv("TEXT_BACKEND", "torch").lower()
+
+def build_text_logits(model_dir: str, backend: str, max_length: int = 512):
+    """
+    Returns logits_fn(texts) -> np.ndarray [B, num_labels] for one backend:
+      torch       FP32 AutoModelForSequenceClassification
+      torch-int8  same model with Linear layers dynamically quantized to int8
+      onnx        exported graph (scripts/export_text_onnx.py) on ONNX Runtime CPU
+    All backends share the tokenizer and padding, so scores stay comparable.
+    """
+    if backend not in TEXT_BACKENDS:
+        raise RuntimeError(f"Unknown TEXT_BACKEND {backend!r}; use one of {sorted(TEXT_BACKENDS)}")
+    from transformers import AutoTokenizer, AutoModelForSequenceClassification
+    tok = AutoTokenizer.from_pretrained(model_dir)
 
-def _load_text_real():
-    model_dir = _resolve_path(os.getenv("TEXT_MODEL_DIR"))
-    labels_path = _resolve_path(os.getenv("TEXT_LABELS_PATH"))
+    if backend == "onnx":
+        import onnxruntime as ort  # optional dependency, only needed for this backend
+        onnx_path = _resolve_path(os.getenv("TEXT_ONNX_PATH")) or str(Path(model_dir) / "model.onnx")
+        if not os.path.isfile(onnx_path):
+            raise RuntimeError(f"ONNX graph not found: {onnx_path} (run scripts/export_text_onnx.py)")
+        so = ort.SessionOptions()
+        so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        threads = int(os.getenv("TEXT_ONNX_THREADS", "0"))  # 0 = onnxruntime default
+        if threads > 0:
+            so.intra_op_num_threads = threads
+        sess = ort.InferenceSession(onnx_path, so, providers=["CPUExecutionProvider"])
+        input_names = {i.name for i in sess.get_inputs()}
+
+        def logits_fn(texts: list[str]) -> np.ndarray:
+            with stage("tokenize"):
+                enc = tok(texts, return_tensors="np", truncation=True, max_length=max_length, padding=True)
+                feed = {k: v.astype(np.int64) for k, v in enc.items() if k in input_names}
+            with stage("forward"):
+                return sess.run(None, feed)[0]
+        logits_fn.nbytes = os.path.getsize(onnx_path)
+        return logits_fn
+
+    import torch
+    mdl = AutoModelForSequenceClassification.from_pretrained(model_dir)
+    mdl.eval()
+    if backend == "torch-int8":
+        # int8 weights + dynamic activation scales for every nn.Linear (the bulk of BERT's FLOPs)
+        mdl = torch.ao.quantization.quantize_dynamic(mdl, {torch.nn.Linear}, dtype=torch.qint8)
+
+    def logits_fn(texts: list[str]) -> np.ndarray:
+        with stage("tokenize"):
+            inputs = tok(texts, return_tensors="pt", truncation=True, max_length=max_length, padding=True)
+        with stage("forward"), torch.no_grad():
+            return mdl(**inputs).logits.cpu().numpy()
+    logits_fn.nbytes = _module_nbytes(mdl)
+    return logits_fn
+
+def _module_nbytes(module) -> int:
+    # parameters + buffers: the weights a loaded version keeps resident
+    # (dynamically quantized Linear layers keep theirs in packed params, not counted)
+    return sum(t.numel() * t.element_size() for t in (*module.parameters(), *module.buffers()))
+
+def _load_text_real(model_dir: str | None = None, labels_path: str | None = None, backend: str | None = None):
+    model_dir = _resolve_path(model_dir or os.getenv("TEXT_MODEL_DIR"))
+    labels_path = _resolve_path(labels_path or os.getenv("TEXT_LABELS_PATH"))
 
     if not (model_dir and os.path.isdir(model_dir)):
         raise RuntimeError(f"TEXT_MODEL_DIR invalid: {model_dir}")
@@ -91,41 +143,86 @@ def _load_text_real():
 
     with open(labels_path, "r") as f:
         labels = json.load(f)
-    tok = AutoTokenizer.from_pretrained(model_dir)
-    mdl = AutoModelForSequenceClassification.from_pretrained(model_dir)
-    mdl.eval()
-
-    def pipe(text: str):
-        inputs = tok(text, return_tensors="pt", truncation=True, max_length=512)
-        with torch.no_grad():
-            logits = mdl(**inputs).logits[0].cpu().numpy()
-        probs = _softmax(logits)  # ok for top_label (sigmoid is fine too if multi-label)
-        return {labels[i]: float(probs[i]) for i in range(len(labels))}
+    backend = (backend or _text_backend_name()).lower()
+    logits_fn = build_text_logits(model_dir, backend)
     meta = _read_meta(model_dir, fallback_name="bert-goemotions")
-    return labels, pipe, meta
-
-
-def _load_audio_real():
-    root_dir = _resolve_path(os.getenv("AUDIO_MODEL_DIR"))
-    labels_path = _resolve_path(os.getenv("AUDIO_LABELS_PATH"))
+    meta["version"] += TEXT_BACKENDS[backend]
+
+    def pipe_batch(texts: list[str]):
+        # Pad to the longest text in the batch; attention_mask keeps padding out of the scores
+        logits = logits_fn(texts)
+        out = []
+        with stage("postprocess"):
+            for row in logits:
+                probs = _softmax(row)  # ok for top_label (sigmoid is fine too if multi-label)
+                out.append({labels[i]: float(probs[i]) for i in range(len(labels))})
+        return out
+
+    # Micro-batching: concurrent requests are held for up to TEXT_BATCH_MAX_WAIT_MS
+    # and run as one padded forward pass. TEXT_BATCH_MAX_SIZE<=1 disables it. The
+    # window closes early once every running text job has joined. A process worker
+    # runs one job at a time, so there is nothing to batch there.
+    max_batch = int(os.getenv("TEXT_BATCH_MAX_SIZE", "8"))
+    max_wait_ms = float(os.getenv("TEXT_BATCH_MAX_WAIT_MS", "5"))
+    batcher = None
+    if max_batch > 1 and executor.kind == "thread":
+        batcher = MicroBatcher(pipe_batch, max_batch_size=max_batch, max_wait_ms=max_wait_ms,
+                               name=f"text-{meta['version']}", init=lambda: executor.pin_thread("text"),
+                               callers=lambda: executor.active("text"))
+        pipe = batcher.submit
+    else:
+        def pipe(text: str):
+            return pipe_batch([text])[0]
+
+    return {"labels": labels, "pipe": pipe, "pipe_batch": pipe_batch, "batcher": batcher, "meta": meta,
+            "error": None, "nbytes": getattr(logits_fn, "nbytes", 0)}
+
+
+# AUDIO_MODEL_VARIANT -> suffix on the reported model version. Variants are
+# written next to the TorchScript file by scripts/optimize_audio_model.py.
+AUDIO_VARIANTS = {"base": "", "frozen": "+frozen", "opt": "+opt", "int8": "+int8"}
+DEFAULT_AUDIO_VARIANTS = "opt,frozen,base"  # int8 trades accuracy: opt in explicitly
+
+def find_audio_ts(root_dir: str) -> str:
+    for cand in ["model_best_ts.pt", "model.ts", "model_jit.pt"]:
+        p = Path(root_dir) / cand
+        if p.exists():
+            return str(p)
+    for p in Path(root_dir).rglob("model_best_ts.pt"):
+        return str(p)
+    raise RuntimeError(f"No TorchScript file found under {root_dir} (looked for model_best_ts.pt).")
+
+def audio_variant_path(base_path: str, variant: str) -> str:
+    # model_best_ts.pt -> model_best_ts.opt.pt
+    return base_path if variant == "base" else str(Path(base_path).with_suffix(f".{variant}.pt"))
+
+@lru_cache(maxsize=8)
+def pick_audio_variant(root_dir: str, preference: str) -> tuple[str, str]:
+    """First variant in the comma-separated preference list whose file exists -> (path, variant)."""
+    base = find_audio_ts(root_dir)
+    for v in (x.strip() for x in preference.split(",")):
+        if not v:
+            continue
+        if v not in AUDIO_VARIANTS:
+            raise RuntimeError(f"Unknown AUDIO_MODEL_VARIANT {v!r}; use {sorted(AUDIO_VARIANTS)}")
+        p = audio_variant_path(base, v)
+        if os.path.isfile(p):
+            return p, v
+    return base, "base"
+
+def _load_audio_real(model_dir: str | None = None, labels_path: str | None = None, variant: str | None = None):
+    root_dir = _resolve_path(model_dir or os.getenv("AUDIO_MODEL_DIR"))
+    labels_path = _resolve_path(labels_path or os.getenv("AUDIO_LABELS_PATH"))
 
     if not (root_dir and os.path.isdir(root_dir)):
         raise RuntimeError(f"AUDIO_MODEL_DIR invalid: {root_dir}")
     if not (labels_path and os.path.isfile(labels_path)):
         raise RuntimeError(f"AUDIO_LABELS_PATH invalid: {labels_path}")
 
-    # Find TorchScript file
-    ts_path = None
-    for cand in ["model_best_ts.pt", "model.ts", "model_jit.pt"]:
-        p = Path(root_dir) / cand
-        if p.exists():
-            ts_path = str(p)
-            break
-    if ts_path is None:
-        for p in Path(root_dir).rglob("model_best_ts.pt"):
-            ts_path = str(p); break
-    if ts_path is None:
-        raise RuntimeError(f"No TorchScript file found under {root_dir} (looked for model_best_ts.pt).")
+    ts_path, variant = pick_audio_variant(root_dir, variant or os.getenv("AUDIO_MODEL_VARIANT", DEFAULT_AUDIO_VARIANTS))
+
+    import torch, torchaudio
+    from utils.audio_features import AudioFeatureExtractor
 
     # Load labels
     with open(labels_path, "r") as f:
@@ -134,6 +231,8 @@ def _load_audio_real():
 
     # Decide device
     DEVICE = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    if variant in ("opt", "int8"):
+        DEVICE = torch.device("cpu")  # both are optimized/quantized for CPU kernels
 
     # Load TorchScript on the chosen device
     model = torch.jit.load(ts_path, map_location=DEVICE)
@@ -151,38 +250,11 @@ def _load_audio_real():
     except Exception:
         pass
 
-    target_sr = int(os.getenv("AUDIO_TARGET_SR", "16000"))
-
-    def infer(path: str):
-        # 1) Load/resample/melspec on CPU (typical and simple)
-        wav, sr = torchaudio.load(path)  # [C, T], float32 -1..1
-        if wav.ndim == 2 and wav.size(0) > 1:
-            wav = wav.mean(dim=0, keepdim=True)  # mono
-        if sr != target_sr:
-            wav = torchaudio.transforms.Resample(orig_freq=sr, new_freq=target_sr)(wav)
-            sr = target_sr
-
-        wav = wav.squeeze(0)  # [T]
-
-        # Feature extraction must match training
-        n_mels = int(os.getenv("AUDIO_N_MELS", "80"))
-        win_ms = float(os.getenv("AUDIO_WIN_MS", "25"))
-        hop_ms = float(os.getenv("AUDIO_HOP_MS", "10"))
-        n_fft  = int(os.getenv("AUDIO_N_FFT", "512"))
-
-        win_length = int(sr * win_ms / 1000.0)
-        hop_length = int(sr * hop_ms / 1000.0)
-
-        melspec = torchaudio.transforms.MelSpectrogram(
-            sample_rate=sr, n_fft=n_fft,
-            win_length=win_length, hop_length=hop_length,
-            n_mels=n_mels, center=True, power=2.0
-        )
-        mel = melspec(wav)  # [n_mels, T_frames]
-        mel = torchaudio.transforms.AmplitudeToDB(top_db=80)(mel)
-        mel = mel.transpose(0, 1)  # [T_frames, n_mels]
-        feats = mel.unsqueeze(0).contiguous()  # [1, T, n_mels], float32
+    # Resampler/mel/dB transforms and feature params are built once, not per request
+    features = AudioFeatureExtractor.from_env()
 
+    def score_feats(feats: torch.Tensor) -> dict:
+        # [1, T, n_mels] log-mel features -> label scores
         # SpeechBrain CRDNN often expects relative lens in [0,1]
         lens = torch.tensor([1.0], dtype=torch.float32)
 
@@ -190,62 +262,299 @@ def _load_audio_real():
         feats = feats.to(DEVICE, non_blocking=True)
         lens  = lens.to(DEVICE, non_blocking=True)
 
-        with torch.inference_mode():
+        with stage("forward"), torch.inference_mode():
             out = model(feats, lens)
-
-        if isinstance(out, (list, tuple)):
-            out = out[0]
-        out = torch.as_tensor(out).float().squeeze()
-        logits = out.detach().cpu().numpy()
+            if isinstance(out, (list, tuple)):
+                out = out[0]
+            out = torch.as_tensor(out).float().squeeze()
+            logits = out.detach().cpu().numpy()  # syncs with the device, so GPU time counts here
 
         if logits.shape[0] != num_labels:
             raise RuntimeError(f"Logits dim {logits.shape[0]} != labels {num_labels}. Adjust feature params or export wrapper.")
         probs = _softmax(logits)
         return {labels[i]: float(probs[i]) for i in range(num_labels)}
 
-    meta = _read_meta(root_dir, fallback_name="torchscript-audio")
-    return labels, infer, meta
+    def infer(src: "str | DecodedWav"):
+        # 1) Load/resample/melspec on CPU (typical and simple)
+        with stage("decode"):
+            if isinstance(src, DecodedWav):
+                wav, sr = torch.from_numpy(src.to_float32()), src.sample_rate  # [C, T], no file round-trip
+            else:
+                wav, sr = torchaudio.load(src)  # [C, T], float32 -1..1
+        return score_feats(features(wav, sr))  # [1, T, n_mels], float32
 
+    meta = _read_meta(root_dir, fallback_name="torchscript-audio")
+    meta["version"] += AUDIO_VARIANTS[variant]
+    print(f"[model_adapters] AUDIO variant {variant}: {ts_path}", file=sys.stderr)
+    return {"labels": labels, "infer": infer, "score_feats": score_feats, "meta": meta, "error": None,
+            "nbytes": _module_nbytes(model)}
+
+
+# -- model registry ---------------------------------------------------------
+# One registry per modality holds every resident version and the routing
+# table (utils/model_registry.py). The version configured through
+# TEXT_MODEL_DIR / AUDIO_MODEL_DIR loads on first use; more can be loaded,
+# switched to and weighted at runtime through /api/models.
+
+def _text_source() -> dict:
+    if MODE != "REAL":
+        return {}
+    return {"model_dir": os.getenv("TEXT_MODEL_DIR"), "labels_path": os.getenv("TEXT_LABELS_PATH"),
+            "backend": _text_backend_name()}
+
+def _audio_source() -> dict:
+    if MODE != "REAL":
+        return {}
+    return {"model_dir": os.getenv("AUDIO_MODEL_DIR"), "labels_path": os.getenv("AUDIO_LABELS_PATH"),
+            "variant": os.getenv("AUDIO_MODEL_VARIANT", DEFAULT_AUDIO_VARIANTS)}
+
+def _mock_state(base: dict, source: dict) -> dict:
+    # MOCK mode: a model dir only names the version (model_meta.json); scores stay seeded
+    state = {**base, "error": None}
+    if source.get("model_dir"):
+        model_dir = _resolve_path(source["model_dir"])
+        if not os.path.isdir(model_dir):
+            raise RuntimeError(f"model_dir invalid: {model_dir}")
+        state["meta"] = _read_meta(model_dir, base["meta"]["name"])
+    if source.get("labels_path"):
+        with open(_resolve_path(source["labels_path"])) as f:
+            state["labels"] = json.load(f)
+    return state
+
+def _load_text(source: dict) -> dict:
+    if MODE != "REAL":
+        return _mock_state(_TEXT, source)
+    state = _load_text_real(**source)
+    print(f"[model_adapters] TEXT {state['meta']['version']} loaded from {source.get('model_dir')}", file=sys.stderr)
+    return state
+
+def _load_audio(source: dict) -> dict:
+    if MODE != "REAL":
+        return _mock_state(_AUDIO, source)
+    state = _load_audio_real(**source)
+    print(f"[model_adapters] AUDIO {state['meta']['version']} loaded from {source.get('model_dir')}", file=sys.stderr)
+    return state
+
+# Size guesses before loading, so the registry can evict standbys first
+def _text_weights_on_disk(source: dict) -> int:
+    model_dir = _resolve_path(source.get("model_dir"))
+    if MODE != "REAL" or not os.path.isdir(model_dir):
+        return 0
+    sizes = {}
+    for p in Path(model_dir).rglob("*"):
+        if p.suffix in (".safetensors", ".bin", ".onnx") and p.is_file():
+            sizes[p.suffix] = sizes.get(p.suffix, 0) + p.stat().st_size
+    return max(sizes.values(), default=0)  # only one of the formats gets loaded
+
+def _audio_weights_on_disk(source: dict) -> int:
+    if MODE != "REAL":
+        return 0
+    try:
+        path, _ = pick_audio_variant(_resolve_path(source.get("model_dir")),
+                                     source.get("variant") or DEFAULT_AUDIO_VARIANTS)
+        return os.path.getsize(path)
+    except Exception:
+        return 0  # the loader reports the real problem
+
+def _close_text(state: dict):
+    if state.get("batcher") is not None:
+        state["batcher"].close()
+
+def _warm(modality: str, version: str):
+    from utils.warmup import warm_up_worker  # utils.warmup imports this module
+    warm_up_worker(modality, version)
+
+text_models = ModelRegistry(
+    "text", _load_text, _text_source, fallback=_TEXT,
+    budget_mb=float(os.getenv("TEXT_MODEL_BUDGET_MB", "2048")),
+    estimate=_text_weights_on_disk,
+    close=_close_text, warm=lambda version: _warm("text", version))
+audio_models = ModelRegistry(
+    "audio", _load_audio, _audio_source, fallback=_AUDIO,
+    budget_mb=float(os.getenv("AUDIO_MODEL_BUDGET_MB", "512")),
+    estimate=_audio_weights_on_disk,
+    warm=lambda version: _warm("audio", version))
+REGISTRIES = {"text": text_models, "audio": audio_models}
+
+register_stats("models", lambda: {m: reg.stats() for m, reg in REGISTRIES.items()},
+               labels={(): "modality", ("*", "routes"): "version"})
 
 def _ensure_text_loaded():
-    if MODE == "REAL" and _TEXT["pipe"] is None:
-        try:
-            labels, pipe, meta = _load_text_real()
-            _TEXT.update({"labels": labels, "pipe": pipe, "meta": meta})
-            print(f"[model_adapters] TEXT loaded from {os.getenv('TEXT_MODEL_DIR')}", file=sys.stderr)
-        except Exception as e:
-            print(f"[model_adapters] TEXT load failed: {e}", file=sys.stderr)
-    return _TEXT
+    return text_models.ensure_loaded().state
 
 def _ensure_audio_loaded():
-    if MODE == "REAL" and _AUDIO["infer"] is None:
-        try:
-            labels, infer, meta = _load_audio_real()
-            _AUDIO.update({"labels": labels, "infer": infer, "meta": meta})
-            print(f"[model_adapters] AUDIO loaded from {os.getenv('AUDIO_MODEL_DIR')}", file=sys.stderr)
-        except Exception as e:
-            print(f"[model_adapters] AUDIO load failed: {e}", file=sys.stderr)
-    return _AUDIO
-
+    return audio_models.ensure_loaded().state
+
+def model_state(modality: str) -> dict:
+    """Whether this process serves the real model for `modality` (no loading)."""
+    reg = REGISTRIES[modality]
+    v = reg.primary()
+    key = "pipe" if modality == "text" else "infer"
+    return {"real": v.state[key] is not None, "error": reg.fallback.state.get("error"), "model": v.meta}
+
+
+def text_batching_stats() -> dict:
+    batchers = {v.version: v.state["batcher"] for v in text_models.resident()
+                if v.state is not None and v.state.get("batcher") is not None}
+    if len(batchers) > 1:
+        return {"enabled": True, "versions": {k: b.stats() for k, b in batchers.items()}}
+    return next(iter(batchers.values())).stats() if batchers else {"enabled": False}
+
+# several resident versions: the same metric names as one batcher, with a version label
+register_stats("text_batching", text_batching_stats, inline=(("versions",),), labels={
+    ("versions",): "version", ("batch_size_hist",): "size", ("versions", "*", "batch_size_hist"): "size",
+})
+
+_META_PEEK: dict[str, dict] = {}
+
+def _peek_meta(state: dict, dir_env: str, fallback_name: str, version_suffix: str = "") -> dict:
+    # Meta of the configured model before its first load, without loading it
+    # (the API process may never load models when the executor uses processes).
+    if MODE != "REAL":
+        return state["meta"]
+    model_dir = _resolve_path(os.getenv(dir_env))
+    if not (model_dir and os.path.isdir(model_dir)):
+        return state["meta"]
+    key = model_dir + version_suffix
+    if key not in _META_PEEK:
+        meta = _read_meta(model_dir, fallback_name)
+        meta["version"] += version_suffix
+        _META_PEEK[key] = meta
+    return _META_PEEK[key]
+
+def peek_text_meta(route_key: str | None = None) -> dict:
+    """Meta of the version that will serve this input (route_key = its hash), without loading anything."""
+    return text_models.peek(route_key) or _peek_meta(_TEXT, "TEXT_MODEL_DIR", "bert-goemotions",
+                                                     TEXT_BACKENDS.get(_text_backend_name(), ""))
+
+@lru_cache(maxsize=8)
+def _peek_audio_suffix(model_dir: str, preference: str) -> str:
+    # cached with the fallback too: a failed lookup walks the model dir
+    try:
+        _, variant = pick_audio_variant(model_dir, preference)
+    except Exception:
+        variant = "base"  # the loader reports the real problem
+    return AUDIO_VARIANTS[variant]
+
+def peek_audio_meta(route_key: str | None = None) -> dict:
+    meta = audio_models.peek(route_key)
+    if meta is not None:
+        return meta
+    model_dir = _resolve_path(os.getenv("AUDIO_MODEL_DIR"))
+    if MODE != "REAL" or not (model_dir and os.path.isdir(model_dir)):
+        return _AUDIO["meta"]
+    suffix = _peek_audio_suffix(model_dir, os.getenv("AUDIO_MODEL_VARIANT", DEFAULT_AUDIO_VARIANTS))
+    return _peek_meta(_AUDIO, "AUDIO_MODEL_DIR", "torchscript-audio", suffix)
 
 def get_text_meta() -> dict:
-    return _ensure_text_loaded()["meta"]
+    return text_models.ensure_loaded().meta
 
 def get_audio_meta() -> dict:
-    return _ensure_audio_loaded()["meta"]
+    return audio_models.ensure_loaded().meta
 
-# Inference APIs used by routes
-def predict_text(text: str, lang: str | None):
-    t = _ensure_text_loaded()
+# Inference APIs used by routes. `version` pins a resident version (as picked
+# by peek_*_meta); when it is gone or None, routing picks one.
+def _score_text(t: dict, text: str, lang: str | None):
     if t["pipe"]:
         return t["pipe"](text)
     seed = _seed_from_bytes((text + "|" + (lang or "und")).encode("utf-8"))
     return _scores_from_seed(seed, t["labels"])
 
-def predict_audio(audio_path: str, duration: float, sample_rate: int):
-    a = _ensure_audio_loaded()
+def predict_text(text: str, lang: str | None, version: str | None = None):
+    with text_models.lease(version) as v:
+        return _score_text(v.state, text, lang)
+
+def _score_text_batch(t: dict, texts: list[str], langs: list[str | None]) -> list:
+    if not t["pipe_batch"]:
+        return [_score_text(t, x, l) for x, l in zip(texts, langs)]
+
+    chunk = max(1, int(os.getenv("TEXT_BULK_CHUNK_SIZE", "32")))
+    # Length-sorted chunks keep padding (wasted compute) small
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    out = [None] * len(texts)
+    for start in range(0, len(order), chunk):
+        idx = order[start:start + chunk]
+        try:
+            res = t["pipe_batch"]([texts[i] for i in idx])
+        except Exception as e:
+            res = [e] * len(idx)
+        for i, r in zip(idx, res):
+            out[i] = r
+    return out
+
+def predict_text_batch(texts: list[str], langs: list[str | None], version: str | None = None) -> list:
+    """
+    Scores many texts in as few forward passes as possible.
+    Returns one entry per input, in order: a scores dict, or the exception
+    raised by the chunk that item was in (so one bad chunk doesn't sink the rest).
+    """
+    with text_models.lease(version) as v:
+        return _score_text_batch(v.state, texts, langs)
+
+def _score_audio(a: dict, audio_path, duration: float, sample_rate: int, wav: DecodedWav | None):
     if a["infer"]:
-        return a["infer"](audio_path)
-    seed = _seed_from_bytes(f"{audio_path}|{duration:.3f}|{sample_rate}".encode("utf-8"))
+        return a["infer"](wav if wav is not None else audio_path)
+    src = hashlib.sha256(memoryview(wav.buf)[wav.offset:wav.offset + wav.nbytes]).hexdigest() if wav is not None else audio_path
+    seed = _seed_from_bytes(f"{src}|{duration:.3f}|{sample_rate}".encode("utf-8"))
+    return _scores_from_seed(seed, a["labels"])
+
+def predict_audio(audio_path: str | None = None, duration: float = 0.0, sample_rate: int = 0,
+                  wav: DecodedWav | None = None, version: str | None = None):
+    """Scores a WAV given either as a file path or as an in-memory DecodedWav."""
+    with audio_models.lease(version) as v:
+        return _score_audio(v.state, audio_path, duration, sample_rate, wav)
+
+def _score_audio_window(a: dict, window) -> dict:
+    if a["score_feats"]:
+        return a["score_feats"](window)
+    seed = _seed_from_bytes(np.ascontiguousarray(np.asarray(window)).tobytes())
     return _scores_from_seed(seed, a["labels"])
 
+def predict_audio_window(window, version: str | None = None) -> dict:
+    """
+    Scores one streaming window: [1, T, n_mels] log-mel features from
+    utils.audio_stream.StreamingLogMel in REAL mode, raw samples in MOCK mode.
+    """
+    with audio_models.lease(version) as v:
+        return _score_audio_window(v.state, window)
+
+
+# Off-loop entry points: run in the per-modality inference executor and return
+# (result, meta, model_ms) from the worker and model version that actually ran it.
+def _text_job(text: str, lang: str | None, version: str | None = None):
+    with timed_ms() as t, text_models.lease(version) as v:
+        scores = _score_text(v.state, text, lang)
+    return scores, v.meta, t.ms
+
+def _text_batch_job(texts: list[str], langs: list[str | None], version: str | None = None):
+    with timed_ms() as t, text_models.lease(version) as v:
+        results = _score_text_batch(v.state, texts, langs)
+    return results, v.meta, t.ms
+
+def _audio_job(wav: DecodedWav, duration: float, sample_rate: int, version: str | None = None):
+    with timed_ms() as t, audio_models.lease(version) as v:
+        scores = _score_audio(v.state, None, duration, sample_rate, wav)
+    return scores, v.meta, t.ms
+
+def _audio_window_job(window, version: str | None = None):
+    with timed_ms() as t, audio_models.lease(version) as v:
+        scores = _score_audio_window(v.state, window)
+    return scores, v.meta, t.ms
+
+# "inference" covers executor queueing too; its children (tokenize, forward, ...)
+# are recorded by whichever worker thread or process ran the model.
+async def run_text_inference(text: str, lang: str | None, version: str | None = None):
+    with stage("inference", "text"):
+        return await executor.run("text", _text_job, text, lang, version)
+
+async def run_text_batch_inference(texts: list[str], langs: list[str | None], version: str | None = None):
+    with stage("inference", "text"):
+        return await executor.run("text", _text_batch_job, texts, langs, version)
+
+async def run_audio_inference(wav: DecodedWav, duration: float, sample_rate: int, version: str | None = None):
+    with stage("inference", "audio"):
+        return await executor.run("audio", _audio_job, wav, duration, sample_rate, version)
+
+async def run_audio_window_inference(window, version: str | None = None):
+    with stage("inference", "audio"):
+        return await executor.run("audio", _audio_window_job, window, version)
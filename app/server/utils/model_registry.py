@@ -0,0 +1,352 @@
+import itertools, os, random, sys, threading, time, zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+class ModelVersion:
+    """
+    One loaded model version. `state` is the adapter's dict (labels, meta and
+    the callables that run the model); `refs` counts requests using it right
+    now, so it is only torn down once the last of them is done.
+    """
+    __slots__ = ("version", "meta", "state", "source", "nbytes", "loaded_at", "last_used", "refs",
+                 "requests", "retired")
+
+    def __init__(self, state: dict, source: dict | None):
+        self.state = state
+        self.meta = state["meta"]
+        self.version = self.meta["version"]
+        self.source = source
+        self.nbytes = int(state.get("nbytes") or 0)
+        self.loaded_at = time.time()
+        self.last_used = time.monotonic()
+        self.refs = 0
+        self.requests = 0
+        self.retired = False
+
+class Lease:
+    """`with registry.lease(...) as v:` keeps v resident until the block ends."""
+    __slots__ = ("_reg", "_version", "_route_key", "v")
+
+    def __init__(self, reg: "ModelRegistry", version: str | None, route_key: str | None):
+        self._reg, self._version, self._route_key = reg, version, route_key
+
+    def __enter__(self) -> ModelVersion:
+        self.v = self._reg.acquire(self._version, self._route_key)
+        return self.v
+
+    def __exit__(self, *exc):
+        self._reg.release(self.v)
+        return False
+
+class ModelRegistryError(Exception):
+    def __init__(self, code: str, message: str, status_code: int = 409):
+        super().__init__(message)
+        self.code, self.message, self.status_code = code, message, status_code
+
+class ModelRegistry:
+    """
+    Resident versions of one modality's model plus the routing table that
+    decides which of them serves a request.
+
+    - load(): loads and warms a version on a background thread; it only
+      receives traffic once warm (activate=True, or set_routes() later).
+    - set_routes(): swaps the whole weight table in one assignment. Requests
+      already running keep their lease on the old version; new ones see the
+      new table, so nothing is dropped or served half-switched.
+    - Versions without routing weight stay resident as standbys for instant
+      rollback until the memory budget needs room: then the least recently
+      used idle standby is evicted first.
+    - Routing by weight is sticky per route key (the input hash): the same
+      input always lands on the same version, which keeps A/B groups and the
+      result cache consistent.
+
+    `loader(source) -> state` builds a version (state["nbytes"]: its size); `default_source()`
+    names the one configured through the environment, loaded on first use.
+    `fallback` is served (and reported) while that first load fails.
+    """
+
+    def __init__(self, modality: str, loader: Callable, default_source: Callable, fallback: dict,
+                 budget_mb: float = 0.0, estimate: Callable | None = None, close: Callable | None = None,
+                 warm: Callable | None = None):
+        self.modality = modality
+        self._loader = loader
+        self._default_source = default_source
+        self.fallback = ModelVersion(fallback, None)
+        self.budget_bytes = int(max(0.0, budget_mb) * 2**20)  # 0 = unlimited
+        self._estimate = estimate  # fn(source) -> bytes, a size guess before loading
+        self._close = close  # fn(state), stops background threads of an unloaded version
+        self.warm = warm  # fn(version), runs synthetic inputs through a freshly loaded version
+        self._versions: dict[str, ModelVersion] = {}
+        self._routes: tuple[tuple[str, float], ...] = ()  # (version, cumulative weight), replaced whole
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()  # one load at a time: peak memory stays at one extra version
+        self._bg = None
+        self._bg_pid = None
+        self._jobs: dict[str, dict] = {}
+        self._job_ids = itertools.count(1)
+        self.evictions = 0
+
+    # -- serving -----------------------------------------------------------
+
+    def _pick(self, route_key: str | None) -> ModelVersion | None:
+        routes = self._routes
+        if not routes:
+            return None
+        if len(routes) == 1:
+            return self._versions.get(routes[0][0])
+        x = (zlib.crc32(route_key.encode()) / 2**32) if route_key else random.random()
+        x *= routes[-1][1]
+        for version, cum in routes:
+            if x < cum:
+                return self._versions.get(version)
+        return self._versions.get(routes[-1][0])
+
+    def _ensure_default(self):
+        # First use: load the environment-configured version (retried on every
+        # call while it fails, as before the registry existed)
+        with self._load_lock:
+            if self._routes:
+                return
+            try:
+                v = self._install(self._default_source())
+            except Exception as e:
+                self.fallback.state["error"] = str(e)
+                print(f"[model_registry] {self.modality} load failed: {e}", file=sys.stderr)
+                return
+            self.fallback.state["error"] = None
+            self._set_routes({v.version: 1.0})
+
+    def acquire(self, version: str | None = None, route_key: str | None = None) -> ModelVersion:
+        """
+        The version named by `version` if it is still resident (a caller that
+        already picked one through peek()), else the one routing picks.
+        Pair with release(); lease() does both.
+        """
+        if not self._routes:
+            self._ensure_default()
+        with self._lock:
+            v = self._versions.get(version) if version else None
+            if v is None or v.retired:
+                v = self._pick(route_key) or self.fallback
+            v.refs += 1
+            v.requests += 1
+            v.last_used = time.monotonic()
+        return v
+
+    def release(self, v: ModelVersion):
+        with self._lock:
+            v.refs -= 1
+            done = v.retired and v.refs == 0
+        if done:
+            self._teardown(v)
+
+    def lease(self, version: str | None = None, route_key: str | None = None) -> Lease:
+        return Lease(self, version, route_key)
+
+    def ensure_loaded(self) -> ModelVersion:
+        """Loads the configured version if nothing is routed yet; returns the primary one."""
+        if not self._routes:
+            self._ensure_default()
+        return self.primary()
+
+    def peek(self, route_key: str | None = None) -> dict | None:
+        """Meta of the version the next request with this key goes to; None before the first load."""
+        v = self._pick(route_key)
+        return v.meta if v is not None else None
+
+    def primary(self) -> ModelVersion:
+        """The routed version with the largest weight (what health and readiness report)."""
+        routes, prev, best, best_w = self._routes, 0.0, None, -1.0
+        for version, cum in routes:
+            if cum - prev > best_w:
+                best, best_w = version, cum - prev
+            prev = cum
+        return self._versions.get(best) or self.fallback
+
+    def resident(self) -> list[ModelVersion]:
+        with self._lock:
+            return list(self._versions.values())
+
+    # -- loading and switching --------------------------------------------
+
+    def _install(self, source: dict, on_loaded: Callable | None = None) -> ModelVersion:
+        if self._estimate is not None:
+            # evict ahead of the load, so peak memory stays within the budget too
+            with self._lock:
+                evicted = self._reserve(self._estimate(source), source.get("model_dir", "new version"))
+            for old in evicted:
+                self._teardown(old)
+        state = self._loader(source)
+        v = ModelVersion(state, source)
+        if on_loaded is not None:
+            on_loaded(v)
+        try:
+            with self._lock:
+                if v.version in self._versions:
+                    raise ModelRegistryError("VERSION_EXISTS", f"{self.modality} version {v.version} is already loaded")
+                evicted = self._reserve(v.nbytes, v.version)
+                self._versions[v.version] = v
+        except ModelRegistryError:
+            self._close_state(state)
+            raise
+        for old in evicted:
+            self._teardown(old)
+        return v
+
+    def _reserve(self, nbytes: int, what: str) -> list[ModelVersion]:
+        # caller holds self._lock
+        evicted = self._make_room(nbytes)
+        if evicted is None:
+            held = ("exceeds the budget" if nbytes > self.budget_bytes else
+                    f"{self._used_bytes() / 2**20:.0f} MB are held by routed or busy versions")
+            raise ModelRegistryError(
+                "MODEL_BUDGET_EXCEEDED",
+                f"{self.modality} {what} needs {nbytes / 2**20:.0f} MB of {self.budget_bytes / 2**20:.0f}; {held}", 507)
+        return evicted
+
+    def _used_bytes(self) -> int:
+        return sum(v.nbytes for v in self._versions.values())
+
+    def _make_room(self, nbytes: int) -> list[ModelVersion] | None:
+        # caller holds self._lock. Idle standbys go least recently used first;
+        # routed versions and ones still serving requests are never evicted.
+        if not self.budget_bytes:
+            return []
+        routed = {version for version, _ in self._routes}
+        idle = sorted((v for v in self._versions.values() if v.version not in routed and v.refs == 0),
+                      key=lambda v: v.last_used)
+        used, evicted = self._used_bytes(), []
+        while used + nbytes > self.budget_bytes and idle:
+            v = idle.pop(0)
+            used -= v.nbytes
+            evicted.append(v)
+        if used + nbytes > self.budget_bytes:
+            return None
+        for v in evicted:
+            del self._versions[v.version]
+            v.retired = True
+            self.evictions += 1
+            print(f"[model_registry] evicted {self.modality} {v.version} (least recently used standby)", file=sys.stderr)
+        return evicted
+
+    def _close_state(self, state: dict):
+        if self._close is not None:
+            try:
+                self._close(state)
+            except Exception as e:
+                print(f"[model_registry] closing {self.modality} model failed: {e}", file=sys.stderr)
+
+    def _teardown(self, v: ModelVersion):
+        self._close_state(v.state)
+        v.state = None  # drop the model; in-flight requests held the last references
+
+    def _set_routes(self, weights: dict[str, float]):
+        cum, table = 0.0, []
+        for version, w in weights.items():
+            if w > 0:
+                cum += float(w)
+                table.append((version, cum))
+        self._routes = tuple(table)
+
+    def set_routes(self, weights: dict[str, float]) -> dict:
+        """Replaces the routing table: {version: weight}; weights are relative, 0 = standby."""
+        if not weights or any(w < 0 for w in weights.values()) or sum(weights.values()) <= 0:
+            raise ModelRegistryError("BAD_WEIGHTS", "Give at least one version a positive weight; no negative weights.", 422)
+        with self._lock:
+            missing = sorted(set(weights) - set(self._versions))
+            if missing:
+                raise ModelRegistryError("VERSION_NOT_LOADED", f"Not loaded: {', '.join(missing)}", 404)
+            self._set_routes(weights)
+        print(f"[model_registry] {self.modality} routes: {weights}", file=sys.stderr)
+        return self.routes()
+
+    def routes(self) -> dict[str, float]:
+        out, prev = {}, 0.0
+        for version, cum in self._routes:
+            out[version] = round(cum - prev, 6)
+            prev = cum
+        return out
+
+    def unload(self, version: str):
+        """Drops a standby version; requests still using it finish first."""
+        with self._lock:
+            v = self._versions.get(version)
+            if v is None:
+                raise ModelRegistryError("VERSION_NOT_LOADED", f"{self.modality} version {version} is not loaded", 404)
+            if any(r == version for r, _ in self._routes):
+                raise ModelRegistryError("VERSION_ROUTED", f"{version} still receives traffic; route it to 0 first")
+            del self._versions[version]
+            v.retired = True
+            done = v.refs == 0
+        if done:
+            self._teardown(v)
+
+    def load(self, source: dict, activate: bool = False) -> dict:
+        """
+        Starts loading `source` in the background and returns the job; poll
+        job(id) (or the registry stats) for "loading" -> "ready" / "failed".
+        With activate=True, all traffic switches to it once it is warm.
+        """
+        job = {"id": str(next(self._job_ids)), "modality": self.modality, "source": source, "activate": activate,
+               "status": "loading", "version": None, "error": None, "started_at": time.time(), "load_s": None}
+        with self._lock:
+            self._jobs[job["id"]] = job
+            while len(self._jobs) > 20:
+                self._jobs.pop(next(iter(self._jobs)))
+        self._executor().submit(self._run_load, job)
+        return dict(job)
+
+    def _executor(self) -> ThreadPoolExecutor:
+        # created on first use (threads don't survive fork: serve.py forks after import)
+        if self._bg is None or self._bg_pid != os.getpid():
+            self._bg = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"model-load-{self.modality}")
+            self._bg_pid = os.getpid()
+        return self._bg
+
+    def _run_load(self, job: dict):
+        t0 = time.perf_counter()
+        try:
+            if not self._routes:
+                self._ensure_default()  # the configured version comes first, so it stays the fallback
+            with self._load_lock:
+                v = self._install(job["source"], on_loaded=lambda v: job.update(version=v.version))
+            job["status"] = "warming"
+            if self.warm is not None:
+                self.warm(v.version)
+            if job["activate"]:
+                with self._lock:
+                    if v.version in self._versions:
+                        self._set_routes({v.version: 1.0})
+                print(f"[model_registry] {self.modality} switched to {v.version}", file=sys.stderr)
+            job["status"] = "ready"
+        except Exception as e:
+            job["status"], job["error"] = "failed", getattr(e, "message", None) or str(e)
+            print(f"[model_registry] {self.modality} load failed: {job['error']}", file=sys.stderr)
+        job["load_s"] = round(time.perf_counter() - t0, 3)
+
+    def job(self, job_id: str) -> dict | None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def stats(self) -> dict:
+        routes = self.routes()
+        now = time.monotonic()
+        with self._lock:
+            versions = [{
+                "version": v.version, "name": v.meta["name"], "weight": routes.get(v.version, 0.0),
+                "state": "routed" if v.version in routes else "standby",
+                "refs": v.refs, "requests": v.requests, "mb": round(v.nbytes / 2**20, 1),
+                "idle_s": round(now - v.last_used, 1), "source": v.source,
+            } for v in self._versions.values()]
+            jobs = [dict(j) for j in self._jobs.values()]
+            used = self._used_bytes()
+        return {
+            "routes": routes,
+            "versions": versions,
+            "budget_mb": round(self.budget_bytes / 2**20, 1) or None,
+            "used_mb": round(used / 2**20, 1),
+            "evictions": self.evictions,
+            "loads": jobs[-5:],
+            "error": self.fallback.state.get("error"),
+        }
@@ -1,14 +1,24 @@
+from datetime import datetime
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import String, Integer, Float, JSON, ForeignKey, Text, Index
+from sqlalchemy import String, Integer, Float, JSON, ForeignKey, Text, Index, DateTime, LargeBinary
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.sql import func
 from utils.db import Base
 
+# UTC timestamps. On SQLite they are stored exactly like CURRENT_TIMESTAMP
+# ("YYYY-MM-DD HH:MM:SS") so server defaults, Python-bound values and range
+# filters all compare as the same text and date() works unchanged.
+Timestamp = DateTime().with_variant(
+    sqlite.DATETIME(storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"),
+    "sqlite",
+)
+
 class Prediction(Base):
     __tablename__ = "predictions"
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     prediction_id: Mapped[str] = mapped_column(String(36), unique=True, index=True)
-    created_at: Mapped[str] = mapped_column(server_default=func.now())
+    created_at: Mapped[datetime] = mapped_column(Timestamp, server_default=func.now())
 
     modality: Mapped[str] = mapped_column(String(10))# "text"  "audio"
 
@@ -27,20 +37,99 @@ class Prediction(Base):
     # outputs
     top_label: Mapped[str] = mapped_column(String(32))
     confidence: Mapped[float] = mapped_column(Float)
-    scores: Mapped[dict] = mapped_column(JSON)
+    # Full score vector, one of two forms (see utils/score_codec.py, SCORES_STORAGE):
+    # legacy label->float JSON in `scores`, or a packed float32 / top-k blob in
+    # `scores_blob` whose label order comes from label_sets via label_set_id.
+    scores: Mapped[dict | None] = mapped_column(JSON(none_as_null=True), nullable=True)
+    scores_blob: Mapped[bytes | None] = mapped_column(LargeBinary, nullable=True)
+    label_set_id: Mapped[int | None] = mapped_column(ForeignKey("label_sets.id"), nullable=True)
 
     processing_ms: Mapped[int] = mapped_column(Integer)
 
     # privacy: store only hash of raw input (text or audio bytes)
-    input_hash: Mapped[str] = mapped_column(String(64), index=True)
+    input_hash: Mapped[str] = mapped_column(String(64))
+
+# Covering indexes for the analytics filters (modality and/or created_at window):
+# each carries the columns the joins and aggregates read, so they never touch the table.
+Index("ix_predictions_modality_created_cover", Prediction.modality, Prediction.created_at,
+      Prediction.prediction_id, Prediction.top_label, Prediction.confidence, Prediction.lang)
+Index("ix_predictions_created_cover", Prediction.created_at, Prediction.modality,
+      Prediction.prediction_id, Prediction.top_label, Prediction.confidence)
+# duplicate-input stats group by input_hash and filter by modality/window
+Index("ix_predictions_input_hash_cover", Prediction.input_hash, Prediction.modality,
+      Prediction.created_at, Prediction.top_label)
+
+class LabelSet(Base):
+    """Ordered label list of one model version; packed score vectors index into it."""
+    __tablename__ = "label_sets"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    model_name: Mapped[str] = mapped_column(String(64))
+    model_version: Mapped[str] = mapped_column(String(32))
+    labels: Mapped[list] = mapped_column(JSON)
+    labels_hash: Mapped[str] = mapped_column(String(40))  # sha1 of the JSON label list
+    created_at: Mapped[datetime] = mapped_column(Timestamp, server_default=func.now())
 
-Index("ix_predictions_modality_created", Prediction.modality, Prediction.created_at)
+Index("ux_label_sets_model_labels", LabelSet.model_name, LabelSet.model_version, LabelSet.labels_hash, unique=True)
 
 class Feedback(Base):
     __tablename__ = "feedback"
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     prediction_id: Mapped[str] = mapped_column(String(36), ForeignKey("predictions.prediction_id", ondelete="CASCADE"))
-    submitted_at: Mapped[str] = mapped_column(server_default=func.now())
+    submitted_at: Mapped[datetime] = mapped_column(Timestamp, server_default=func.now())
     stars: Mapped[int] = mapped_column(Integer)  # 0..5
     comment: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+# every analytics join is feedback.prediction_id = predictions.prediction_id; stars rides along
+Index("ix_feedback_prediction_stars", Feedback.prediction_id, Feedback.stars)
+
+class AnalyticsRollup(Base):
+    """
+    Per-day aggregates of predictions (+ their feedback), rebuilt day by day
+    from the raw tables by utils.rollups. Enough to answer compute_analytics
+    without rescanning history.
+    """
+    __tablename__ = "analytics_daily_rollup"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    day: Mapped[str] = mapped_column(String(10))  # YYYY-MM-DD of created_at
+    modality: Mapped[str] = mapped_column(String(10))
+    top_label: Mapped[str] = mapped_column(String(32))
+    model_version: Mapped[str] = mapped_column(String(32))
+    lang: Mapped[str | None] = mapped_column(String(8), nullable=True)
+
+    n: Mapped[int] = mapped_column(Integer)                  # predictions
+    n_with_feedback: Mapped[int] = mapped_column(Integer)    # predictions with >= 1 feedback
+    conf_sum: Mapped[float] = mapped_column(Float)
+    proc_sum: Mapped[int] = mapped_column(Integer)
+    dur_sum: Mapped[float] = mapped_column(Float)
+    dur_n: Mapped[int] = mapped_column(Integer)
+    sr_sum: Mapped[int] = mapped_column(Integer)
+    sr_n: Mapped[int] = mapped_column(Integer)
+    # prediction LEFT JOIN feedback row counts (a prediction with k ratings counts k times)
+    joined_n: Mapped[int] = mapped_column(Integer)
+    joined_conf_sum: Mapped[float] = mapped_column(Float)
+    # star histogram over feedback rows
+    stars_0: Mapped[int] = mapped_column(Integer)
+    stars_1: Mapped[int] = mapped_column(Integer)
+    stars_2: Mapped[int] = mapped_column(Integer)
+    stars_3: Mapped[int] = mapped_column(Integer)
+    stars_4: Mapped[int] = mapped_column(Integer)
+    stars_5: Mapped[int] = mapped_column(Integer)
+
+Index("ix_rollup_day_modality", AnalyticsRollup.day, AnalyticsRollup.modality)
+
+class RollupWatermark(Base):
+    __tablename__ = "analytics_rollup_state"
+
+    name: Mapped[str] = mapped_column(String(32), primary_key=True)  # "predictions" / "feedback"
+    last_id: Mapped[int] = mapped_column(Integer)
+
+class SchemaMigration(Base):
+    """Applied schema migrations (see utils/migrations.py)."""
+    __tablename__ = "schema_migrations"
+
+    version: Mapped[int] = mapped_column(Integer, primary_key=True)
+    name: Mapped[str] = mapped_column(String(64))
+    applied_at: Mapped[datetime] = mapped_column(Timestamp, server_default=func.now())
@@ -0,0 +1,160 @@
+import asyncio, os, sys, threading
+from collections import OrderedDict
+from time import monotonic, perf_counter
+from typing import Any, Awaitable, Callable, Hashable
+
+from utils.metrics import register_stats
+
+def _approx_size(obj) -> int:
+    # Good-enough byte estimate for score dicts / small tuples of primitives
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_approx_size(k) + _approx_size(v) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(_approx_size(v) for v in obj)
+    return size
+
+class ResultCache:
+    """
+    Prediction result cache keyed on (modality, input_hash, model_name, model_version),
+    plus any request option that changes the scores (text: lang).
+    LRU order, per-entry TTL and a total byte budget bound it; concurrent misses
+    on the same key share one computation (single-flight).
+    Each entry remembers how long it took to compute, reported as saved_ms on hits.
+    """
+
+    def __init__(self, enabled: bool = True, max_entries: int = 10000, ttl_s: float = 3600.0, max_bytes: int = 64 << 20):
+        self.enabled = enabled
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_s = float(ttl_s)
+        self.max_bytes = max(1, int(max_bytes))
+        self._data: "OrderedDict[Hashable, tuple[Any, float, int, float]]" = OrderedDict()  # value, cost_ms, size, expires
+        self._bytes = 0
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self._counts = {"hits": 0, "misses": 0, "coalesced": 0, "evicted_lru": 0, "evicted_ttl": 0, "saved_ms": 0.0}
+
+    @classmethod
+    def from_env(cls) -> "ResultCache":
+        return cls(
+            enabled=os.getenv("RESULT_CACHE_ENABLED", "1").lower() not in ("0", "false", "no"),
+            max_entries=int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "10000")),
+            ttl_s=float(os.getenv("RESULT_CACHE_TTL_S", "3600")),
+            max_bytes=int(float(os.getenv("RESULT_CACHE_MAX_MB", "64")) * (1 << 20)),
+        )
+
+    def _drop(self, key, reason: str):
+        _, _, size, _ = self._data.pop(key)
+        self._bytes -= size
+        self._counts[reason] += 1
+
+    def _lookup(self, key):
+        # caller holds the lock
+        ent = self._data.get(key)
+        if ent is not None and ent[3] < monotonic():
+            self._drop(key, "evicted_ttl")
+            return None
+        if ent is not None:
+            self._data.move_to_end(key)
+            self._counts["hits"] += 1
+            self._counts["saved_ms"] += ent[1]
+        return ent
+
+    def get(self, key):
+        """Returns (value, cost_ms) or None. Counts as a hit/miss."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            ent = self._lookup(key)
+            if ent is None:
+                self._counts["misses"] += 1
+                return None
+            return ent[0], ent[1]
+
+    def put(self, key, value, cost_ms: float):
+        if not self.enabled:
+            return
+        size = _approx_size(key) + _approx_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+            self._data[key] = (value, float(cost_ms), size, monotonic() + self.ttl_s)
+            self._bytes += size
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._data)), "evicted_lru")
+
+    async def get_or_compute(self, key, compute: Callable[[], Awaitable[Any]],
+                             cacheable: Callable[[Any], bool] | None = None):
+        """
+        Returns (value, hit). `compute` runs at most once per key at a time;
+        callers arriving meanwhile await its result. The value is stored, with
+        the wall time compute took, unless `cacheable(value)` says otherwise.
+        Errors propagate to every waiter and are not cached. If the computing
+        request is cancelled (its client went away), a waiter computes itself.
+        """
+        if not self.enabled:
+            return await compute(), False
+
+        with self._lock:
+            ent = self._lookup(key)
+            fut = self._inflight.get(key) if ent is None else None
+            if ent is None:
+                self._counts["coalesced" if fut is not None else "misses"] += 1
+        if ent is not None:
+            return ent[0], True
+
+        if fut is not None:
+            try:
+                value, ms = await asyncio.shield(fut)
+            except asyncio.CancelledError:
+                task = asyncio.current_task()
+                if not fut.cancelled() or (task is not None and task.cancelling()):
+                    raise  # this request itself was cancelled
+                # the leader's cancellation isn't ours: take over (or join whoever did)
+                return await self.get_or_compute(key, compute, cacheable)
+            with self._lock:
+                self._counts["saved_ms"] += ms
+            return value, True
+
+        fut = asyncio.get_running_loop().create_future()
+        self._inflight[key] = fut
+        start = perf_counter()
+        try:
+            value = await compute()
+        except asyncio.CancelledError:
+            fut.cancel()
+            raise
+        except Exception as e:
+            fut.set_exception(e)
+            fut.exception()  # mark retrieved when nobody else was waiting
+            raise
+        else:
+            ms = (perf_counter() - start) * 1000.0
+            if cacheable is None or cacheable(value):
+                self.put(key, value, ms)
+            fut.set_result((value, ms))
+            return value, False
+        finally:
+            self._inflight.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            c = dict(self._counts)
+            entries, used = len(self._data), self._bytes
+        lookups = c["hits"] + c["misses"] + c["coalesced"]
+        return {
+            "enabled": self.enabled,
+            "entries": entries,
+            "bytes": used,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl_s": self.ttl_s,
+            **c,
+            "hit_ratio": ((c["hits"] + c["coalesced"]) / lookups) if lookups else None,
+        }
+
+result_cache = ResultCache.from_env()
+register_stats("result_cache", result_cache.stats)
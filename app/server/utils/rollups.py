@@ -0,0 +1,164 @@
+import os, sys, threading
+from datetime import datetime, timedelta
+from sqlalchemy import select, insert, delete, func, case
+from sqlalchemy.orm import Session
+
+from utils.db import SessionLocal
+from utils.models import Prediction, Feedback, AnalyticsRollup, RollupWatermark
+
+STAR_VALUES = range(6)  # FeedbackRequest allows 0..5
+ROLLUP_KEYS = ("day", "modality", "top_label", "model_version", "lang")
+ROLLUP_SUMS = (
+    "n", "n_with_feedback", "conf_sum", "proc_sum", "dur_sum", "dur_n", "sr_sum", "sr_n",
+    "joined_n", "joined_conf_sum", *[f"stars_{i}" for i in STAR_VALUES],
+)
+
+def _facts_select(*conds):
+    """
+    Raw predictions (+ feedback) aggregated into rollup-shaped rows, restricted by conds.
+    Inner query: one row per prediction with its feedback count and star counts;
+    outer query: sums per (day, modality, top_label, model_version, lang).
+    """
+    per_pred = (
+        select(
+            func.date(Prediction.created_at).label("day"),
+            Prediction.modality, Prediction.top_label, Prediction.model_version, Prediction.lang,
+            Prediction.confidence, Prediction.processing_ms, Prediction.duration_sec, Prediction.sample_rate,
+            func.count(Feedback.id).label("k"),
+            *[func.sum(case((Feedback.stars == i, 1), else_=0)).label(f"s{i}") for i in STAR_VALUES],
+        )
+        .outerjoin(Feedback, Feedback.prediction_id == Prediction.prediction_id)
+        .where(*conds)
+        .group_by(Prediction.id)
+        .subquery()
+    )
+    c = per_pred.c
+    mult = case((c.k > 0, c.k), else_=1)  # rows this prediction contributes to a LEFT JOIN
+    return (
+        select(
+            c.day, c.modality, c.top_label, c.model_version, c.lang,
+            func.count().label("n"),
+            func.sum(case((c.k > 0, 1), else_=0)).label("n_with_feedback"),
+            func.coalesce(func.sum(c.confidence), 0.0).label("conf_sum"),
+            func.coalesce(func.sum(c.processing_ms), 0).label("proc_sum"),
+            func.coalesce(func.sum(c.duration_sec), 0.0).label("dur_sum"),
+            func.count(c.duration_sec).label("dur_n"),
+            func.coalesce(func.sum(c.sample_rate), 0).label("sr_sum"),
+            func.count(c.sample_rate).label("sr_n"),
+            func.sum(mult).label("joined_n"),
+            func.coalesce(func.sum(c.confidence * mult), 0.0).label("joined_conf_sum"),
+            *[func.coalesce(func.sum(getattr(c, f"s{i}")), 0).label(f"stars_{i}") for i in STAR_VALUES],
+        )
+        .group_by(c.day, c.modality, c.top_label, c.model_version, c.lang)
+    )
+
+def _day_bounds(day: str):
+    start = datetime.strptime(day, "%Y-%m-%d")
+    return start, start + timedelta(days=1)
+
+def _watermarks(db: Session) -> dict:
+    rows = db.execute(select(RollupWatermark.name, RollupWatermark.last_id)).all()
+    wm = {"predictions": 0, "feedback": 0}
+    wm.update({name: last_id for name, last_id in rows})
+    return wm
+
+_refresh_lock = threading.Lock()
+LATE_COMMIT_S = float(os.getenv("ROLLUP_LATE_COMMIT_S", "60"))
+
+def _settled_id(db: Session, model, ts_col, after: int, max_id: int, cutoff: datetime) -> int:
+    # the watermark may pass a row only once it is LATE_COMMIT_S old: a younger
+    # row's id may still have gaps below it that an open transaction will fill
+    young = db.scalar(select(func.min(model.id)).where(model.id > after, ts_col >= cutoff))
+    return young - 1 if young else max_id
+
+def refresh_rollups() -> int:
+    """
+    Rebuilds the rollup rows of every day touched by predictions or feedback
+    written since the last refresh. Returns how many days were rebuilt.
+    Idempotent: a day is always recomputed from the raw rows as a whole.
+
+    New rows are found by id above a per-table watermark. Ids are handed out
+    at insert but become visible at commit, so with concurrent writers a
+    lower id can show up after a higher one. The watermark therefore stops
+    below rows younger than ROLLUP_LATE_COMMIT_S, and their days are rebuilt
+    again on each refresh until they are that old. This assumes no write
+    transaction stays open that long.
+    """
+    with _refresh_lock, SessionLocal() as db:
+        wm = _watermarks(db)
+        pred_max = db.scalar(select(func.max(Prediction.id))) or 0
+        fb_max = db.scalar(select(func.max(Feedback.id))) or 0
+        if pred_max <= wm["predictions"] and fb_max <= wm["feedback"]:
+            return 0
+        cutoff = datetime.utcnow() - timedelta(seconds=LATE_COMMIT_S)
+        settled = {
+            "predictions": _settled_id(db, Prediction, Prediction.created_at, wm["predictions"], pred_max, cutoff),
+            "feedback": _settled_id(db, Feedback, Feedback.submitted_at, wm["feedback"], fb_max, cutoff),
+        }
+
+        day = func.date(Prediction.created_at)
+        dirty = set(db.scalars(
+            select(day).where(Prediction.id > wm["predictions"], Prediction.id <= pred_max).distinct()
+        ))
+        dirty |= set(db.scalars(
+            select(day)
+            .join(Feedback, Feedback.prediction_id == Prediction.prediction_id)
+            .where(Feedback.id > wm["feedback"], Feedback.id <= fb_max)
+            .distinct()
+        ))
+
+        cols = [*ROLLUP_KEYS, *ROLLUP_SUMS]
+        for d in sorted(x for x in dirty if x):
+            start, end = _day_bounds(str(d))
+            db.execute(delete(AnalyticsRollup).where(AnalyticsRollup.day == str(d)))
+            db.execute(insert(AnalyticsRollup).from_select(
+                cols, _facts_select(Prediction.created_at >= start, Prediction.created_at < end)
+            ))
+        for name, last_id in settled.items():
+            db.merge(RollupWatermark(name=name, last_id=last_id))
+        db.commit()
+        return len(dirty)
+
+def load_facts(db: Session, cutoff_dt: datetime | None) -> list[dict]:
+    """
+    Rollup-shaped rows covering created_at >= cutoff_dt: whole days come from the
+    rollup table, the partial first day is aggregated from the raw tables.
+    """
+    q = select(*[getattr(AnalyticsRollup, k) for k in (*ROLLUP_KEYS, *ROLLUP_SUMS)])
+    if cutoff_dt is None:
+        return [dict(r._mapping) for r in db.execute(q)]
+    first_day = cutoff_dt.strftime("%Y-%m-%d")
+    rows = [dict(r._mapping) for r in db.execute(q.where(AnalyticsRollup.day > first_day))]
+    _, next_midnight = _day_bounds(first_day)
+    rows += [dict(r._mapping) for r in db.execute(
+        _facts_select(Prediction.created_at >= cutoff_dt, Prediction.created_at < next_midnight)
+    )]
+    return rows
+
+class RollupCompactor:
+    """Background thread that keeps rollups fresh between analytics requests."""
+
+    def __init__(self, interval_s: float):
+        self.interval_s = interval_s
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self.interval_s <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._loop, name="rollup-compactor", daemon=True)
+        self._thread.start()
+
+    def _loop(self):
+        while not self._stop.wait(self.interval_s):
+            try:
+                refresh_rollups()
+            except Exception as e:
+                print(f"[rollups] refresh failed: {e}", file=sys.stderr)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+compactor = RollupCompactor(float(os.getenv("ROLLUP_COMPACT_INTERVAL_S", "30")))
@@ -12,6 +12,16 @@ class FeedbackRequest(BaseModel):
     stars: int = Field(ge=0, le=5)
     comment: Optional[str] = Field(default=None, max_length=500)
 
+class ModelLoadRequest(BaseModel):
+    model_dir: str = Field(min_length=1)
+    labels_path: Optional[str] = None  # defaults to TEXT_LABELS_PATH / AUDIO_LABELS_PATH
+    backend: Optional[str] = None  # text: torch | torch-int8 | onnx (default TEXT_BACKEND)
+    variant: Optional[str] = None  # audio: preference list like "opt,base" (default AUDIO_MODEL_VARIANT)
+    activate: bool = False  # switch all traffic to it once it is warm
+
+class ModelRoutesRequest(BaseModel):
+    weights: Dict[str, float]  # version -> relative weight; 0 = resident but unrouted
+
 # Responses 
 class PredictionInputInfo(BaseModel):
     text_len: Optional[int] = None
@@ -32,10 +42,22 @@ class PredictionResponse(BaseModel):
 class AudioPredictionResponse(PredictionResponse):
     pass
 
+class TextBatchItemResult(BaseModel):
+    index: int
+    ok: bool
+    prediction: Optional[PredictionResponse] = None
+    error: Optional[dict] = None
+
 class FeedbackResponse(BaseModel):
     ok: bool
     feedback_id: int
 
+class FeedbackBatchItemResult(BaseModel):
+    index: int
+    ok: bool
+    feedback_id: Optional[int] = None
+    error: Optional[dict] = None
+
 # Errors 
 class ErrorEnvelope(BaseModel):
     error: dict | None = None
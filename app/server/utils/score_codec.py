@@ -0,0 +1,203 @@
+"""
+Compact storage for per-prediction score vectors.
+
+Instead of a label->float JSON object per row, a prediction can store its
+scores as a blob in label order, with the order itself kept once per model
+version in the label_sets table:
+
+    packed  b"\\x01" + float32[L] little-endian          (4*L + 1 bytes; 113 B for GoEmotions)
+    topk    b"\\x02" + k + uint16[k] indexes + float32[k]  (6*k + 2 bytes; the rest reads as 0)
+
+SCORES_STORAGE selects what new rows get (json | packed | topk; json by
+default, so external readers of predictions.scores keep working until a
+deploy opts in); rows in any form decode through the same helpers. API
+responses never read these columns.
+"""
+import hashlib, json, os, threading
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from utils.db import SessionLocal
+from utils.models import LabelSet, Prediction
+from utils.metrics import register_stats
+
+DENSE, TOPK = 1, 2
+STORAGE_MODES = ("json", "packed", "topk")
+
+def encode_dense(values) -> bytes:
+    return bytes([DENSE]) + np.asarray(values, dtype="<f4").tobytes()
+
+def encode_topk(values, k: int) -> bytes:
+    v = np.asarray(values, dtype="<f4")
+    k = max(1, min(int(k), len(v), 255))
+    idx = np.argpartition(-v, k - 1)[:k]
+    idx = idx[np.argsort(-v[idx], kind="stable")]  # highest first
+    return bytes([TOPK, k]) + idx.astype("<u2").tobytes() + v[idx].tobytes()
+
+def decode(blob: bytes, n_labels: int) -> np.ndarray:
+    """One blob -> float32[n_labels]."""
+    if blob[0] == DENSE:
+        return np.frombuffer(blob, dtype="<f4", offset=1).astype(np.float32)
+    if blob[0] == TOPK:
+        k = blob[1]
+        out = np.zeros(n_labels, dtype=np.float32)
+        out[np.frombuffer(blob, dtype="<u2", count=k, offset=2)] = np.frombuffer(blob, dtype="<f4", count=k, offset=2 + 2 * k)
+        return out
+    raise ValueError(f"Unknown score blob kind {blob[0]}")
+
+def decode_many(blobs: list[bytes], n_labels: int) -> np.ndarray:
+    """
+    Blobs of one label set -> float32[N, n_labels]. Dense blobs are joined and
+    reinterpreted in one frombuffer; top-k blobs are scattered per k group.
+    """
+    out = np.zeros((len(blobs), n_labels), dtype=np.float32)
+    dense_len = 1 + 4 * n_labels
+    dense = [i for i, b in enumerate(blobs) if b[0] == DENSE and len(b) == dense_len]
+    if dense:
+        out[dense] = np.frombuffer(b"".join(blobs[i][1:] for i in dense), dtype="<f4").reshape(len(dense), n_labels)
+    by_k: dict[int, list[int]] = {}
+    for i, b in enumerate(blobs):
+        if b[0] == TOPK:
+            by_k.setdefault(b[1], []).append(i)
+    for k, rows in by_k.items():
+        raw = np.frombuffer(b"".join(blobs[i][2:] for i in rows), dtype=np.uint8).reshape(len(rows), 6 * k)
+        idx = np.ascontiguousarray(raw[:, :2 * k]).view("<u2")
+        val = np.ascontiguousarray(raw[:, 2 * k:]).view("<f4")
+        out[np.asarray(rows)[:, None], idx] = val
+    return out
+
+def _labels_hash(labels) -> str:
+    return hashlib.sha1(json.dumps(list(labels)).encode("utf-8")).hexdigest()
+
+class LabelSets:
+    """label_sets rows, cached per process: (model, version, labels) <-> id."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ids: dict[tuple, int] = {}
+        self._labels: dict[int, list[str]] = {}
+
+    def id_for(self, model_name: str, model_version: str, labels: tuple) -> int:
+        key = (model_name, model_version, labels)
+        hit = self._ids.get(key)
+        if hit is not None:
+            return hit
+        with self._lock:
+            if key not in self._ids:
+                self._ids[key] = self._resolve(model_name, model_version, list(labels))
+                self._labels[self._ids[key]] = list(labels)
+            return self._ids[key]
+
+    def _resolve(self, model_name: str, model_version: str, labels: list[str]) -> int:
+        h = _labels_hash(labels)
+        q = select(LabelSet.id).where(LabelSet.model_name == model_name, LabelSet.model_version == model_version,
+                                      LabelSet.labels_hash == h)
+        with SessionLocal() as db:
+            found = db.scalar(q)
+            if found is not None:
+                return found
+            try:
+                ls = LabelSet(model_name=model_name, model_version=model_version, labels=labels, labels_hash=h)
+                db.add(ls)
+                db.commit()
+                return ls.id
+            except IntegrityError:
+                db.rollback()  # another process registered it first
+                return db.scalar(q)
+
+    def labels(self, label_set_id: int, db=None) -> list[str]:
+        hit = self._labels.get(label_set_id)
+        if hit is None:
+            if db is None:
+                with SessionLocal() as s:
+                    hit = s.scalar(select(LabelSet.labels).where(LabelSet.id == label_set_id))
+            else:
+                hit = db.scalar(select(LabelSet.labels).where(LabelSet.id == label_set_id))
+            if hit is None:
+                raise KeyError(f"label set {label_set_id} not found")
+            self._labels[label_set_id] = hit
+        return hit
+
+label_sets = LabelSets()
+
+class ScoreStorage:
+    def __init__(self, mode: str = "json", top_k: int = 5):
+        if mode not in STORAGE_MODES:
+            raise ValueError(f"Unknown SCORES_STORAGE: {mode}")
+        self.mode = mode
+        self.top_k = max(1, min(int(top_k), 255))
+
+    @classmethod
+    def from_env(cls) -> "ScoreStorage":
+        return cls(
+            mode=os.getenv("SCORES_STORAGE", "json").lower(),
+            top_k=int(os.getenv("SCORES_TOP_K", "5")),
+        )
+
+    def columns(self, scores: dict, meta: dict) -> dict:
+        """Prediction column values (scores, scores_blob, label_set_id) for one scores dict."""
+        if self.mode == "json":
+            return {"scores": scores, "scores_blob": None, "label_set_id": None}
+        values = np.fromiter(scores.values(), dtype=np.float32, count=len(scores))
+        blob = encode_dense(values) if self.mode == "packed" else encode_topk(values, self.top_k)
+        return {
+            "scores": None,
+            "scores_blob": blob,
+            "label_set_id": label_sets.id_for(meta["name"], meta["version"], tuple(scores)),
+        }
+
+    def stats(self) -> dict:
+        return {"mode": self.mode, "top_k": self.top_k if self.mode == "topk" else None,
+                "label_sets_cached": len(label_sets._ids)}
+
+score_storage = ScoreStorage.from_env()
+register_stats("score_storage", score_storage.stats)
+
+def row_scores(row, db=None) -> dict:
+    """Scores dict of one stored prediction, whatever its storage form (top-k rows: stored labels only)."""
+    if row.scores is not None:
+        return row.scores
+    if row.scores_blob is None:
+        return {}
+    labels = label_sets.labels(row.label_set_id, db)
+    if row.scores_blob[0] == TOPK:
+        k = row.scores_blob[1]
+        idx = np.frombuffer(row.scores_blob, dtype="<u2", count=k, offset=2)
+        val = np.frombuffer(row.scores_blob, dtype="<f4", count=k, offset=2 + 2 * k)
+        return {labels[i]: float(v) for i, v in zip(idx, val)}
+    return {lbl: float(v) for lbl, v in zip(labels, decode(row.scores_blob, len(labels)))}
+
+def score_matrices(db, *where, chunk: int = 10000) -> list[dict]:
+    """
+    Vectorized read for exports: predictions matching `where`, grouped
+    by label set, as {model_name, model_version, labels, prediction_ids,
+    scores: float32[N, L]}. Blob rows decode in bulk; legacy JSON rows are
+    grouped by their key order. utils/analytics.py has no score-level reads
+    (it aggregates top_label and confidence), so it doesn't use this yet.
+    """
+    q = (select(Prediction.prediction_id, Prediction.model_name, Prediction.model_version,
+                Prediction.label_set_id, Prediction.scores_blob, Prediction.scores)
+         .where(*where).order_by(Prediction.id).execution_options(yield_per=chunk))
+    blob_groups: dict[int, dict] = {}
+    json_groups: dict[tuple, dict] = {}
+    for pid, name, version, ls_id, blob, scores in db.execute(q):
+        if blob is not None:
+            g = blob_groups.setdefault(ls_id, {"model_name": name, "model_version": version, "ids": [], "blobs": []})
+            g["ids"].append(pid)
+            g["blobs"].append(blob)
+        elif scores:
+            g = json_groups.setdefault((name, version, tuple(scores)),
+                                       {"model_name": name, "model_version": version, "ids": [], "rows": []})
+            g["ids"].append(pid)
+            g["rows"].append(list(scores.values()))
+
+    out = []
+    for ls_id, g in blob_groups.items():
+        labels = label_sets.labels(ls_id, db)
+        out.append({"model_name": g["model_name"], "model_version": g["model_version"], "labels": labels,
+                    "prediction_ids": g["ids"], "scores": decode_many(g["blobs"], len(labels))})
+    for (name, version, labels), g in json_groups.items():
+        out.append({"model_name": name, "model_version": version, "labels": list(labels),
+                    "prediction_ids": g["ids"], "scores": np.asarray(g["rows"], dtype=np.float32)})
+    return out
@@ -1,6 +1,24 @@
+"""
+Request timing.
+
+stage("name") times one step of a request. Stages nest: a stage opened inside
+another is recorded as "parent.child" (e.g. "inference.forward"), in the same
+thread or in an inference worker thread (the executor carries the context
+over). Every finished stage feeds the stage_seconds{stage,modality}
+histogram; stages of an HTTP request are also kept on its Trace, which
+TimingMiddleware turns into a Server-Timing header when TIMING_HEADER=1.
+
+Inference worker processes can't reach the API process' histograms: their
+stages are captured by run_captured() and replayed() by the caller.
+STAGE_TIMING=0 turns stage() into a no-op.
+"""
+import os
 from contextlib import contextmanager
+from contextvars import ContextVar
 from time import perf_counter
 
+from utils.metrics import histogram
+
 @contextmanager
 def timed_ms():
     start = perf_counter()
@@ -11,3 +29,122 @@ def timed_ms():
         yield t
     finally:
         t.ms = int((perf_counter() - start) * 1000)
+
+
+ENABLED = os.getenv("STAGE_TIMING", "1") == "1"
+
+stage_seconds = histogram("emotion_ai_stage_seconds", "Time spent per request stage", ("stage", "modality"))
+http_seconds = histogram("emotion_ai_http_request_seconds", "HTTP request latency", ("method", "route", "status"))
+
+class Trace:
+    """Stages finished during one request (or one worker-process job)."""
+    __slots__ = ("spans", "capture_only")
+
+    def __init__(self, capture_only: bool = False):
+        self.spans: list[tuple[str, str | None, float]] = []  # (path, modality, seconds)
+        self.capture_only = capture_only
+
+    def server_timing(self, total_s: float) -> str:
+        parts = [f"{p};dur={s * 1000:.2f}" for p, _, s in self.spans]
+        parts.append(f"total;dur={total_s * 1000:.2f}")
+        return ", ".join(parts)
+
+_trace: ContextVar[Trace | None] = ContextVar("timing_trace", default=None)
+_current: ContextVar[tuple[str, str | None] | None] = ContextVar("timing_stage", default=None)  # (path, modality)
+
+def _record(path: str, modality: str | None, seconds: float) -> None:
+    tr = _trace.get()
+    if tr is not None:
+        tr.spans.append((path, modality, seconds))
+        if tr.capture_only:
+            return
+    stage_seconds.observe((path, modality or ""), seconds)
+
+class stage:
+    """Times the enclosed block as stage `name`; modality defaults to the enclosing stage's."""
+    __slots__ = ("name", "modality", "_token", "_start")
+
+    def __init__(self, name: str, modality: str | None = None):
+        self.name = name
+        self.modality = modality
+
+    def __enter__(self):
+        if ENABLED:
+            parent = _current.get()
+            if parent is not None:
+                self.name, self.modality = f"{parent[0]}.{self.name}", self.modality or parent[1]
+            self._token = _current.set((self.name, self.modality))
+            self._start = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if ENABLED:
+            seconds = perf_counter() - self._start
+            _current.reset(self._token)
+            _record(self.name, self.modality, seconds)
+        return False
+
+def run_captured(fn, *args, **kwargs):
+    """Worker-process side: fn(*args, **kwargs) -> (result, spans recorded while it ran)."""
+    tr = Trace(capture_only=True)
+    token = _trace.set(tr)
+    try:
+        return fn(*args, **kwargs), tr.spans
+    finally:
+        _trace.reset(token)
+
+@contextmanager
+def untimed():
+    """Stages inside are not recorded anywhere (synthetic work such as warm-up)."""
+    token = _trace.set(Trace(capture_only=True))
+    try:
+        yield
+    finally:
+        _trace.reset(token)
+
+def replay(spans) -> None:
+    """Caller side: records spans from run_captured() as if they ran under the current stage."""
+    parent = _current.get()
+    for path, modality, seconds in spans:
+        if parent is not None:
+            path, modality = f"{parent[0]}.{path}", modality or parent[1]
+        _record(path, modality, seconds)
+
+
+class TimingMiddleware:
+    """
+    Pure ASGI middleware (no extra task per request, unlike BaseHTTPMiddleware):
+    opens the request's Trace, records http_request_seconds by route template,
+    and optionally adds `Server-Timing: stage;dur=ms, ..., total;dur=ms`.
+    """
+
+    def __init__(self, app, header: bool | None = None):
+        self.app = app
+        self.header = os.getenv("TIMING_HEADER", "0") == "1" if header is None else header
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not ENABLED:
+            await self.app(scope, receive, send)
+            return
+        tr = Trace()
+        token = _trace.set(tr)
+        start = perf_counter()
+        status = 500
+
+        async def send_timed(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.header:
+                    value = tr.server_timing(perf_counter() - start).encode("latin-1")
+                    message = {**message, "headers": [*message.get("headers", []), (b"server-timing", value)]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_timed)
+        finally:
+            _trace.reset(token)
+            route = scope.get("route")
+            # route templates, not raw paths: one series per endpoint, not per id
+            http_seconds.observe((scope["method"], getattr(route, "path", "unmatched"), str(status)),
+                                 perf_counter() - start)
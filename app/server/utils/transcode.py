@@ -0,0 +1,141 @@
+import asyncio, os, tempfile
+from collections import deque
+from time import perf_counter
+
+from utils.metrics import register_stats
+
+# MP4-family containers may keep the index (moov) at the end of the file,
+# which ffmpeg can't reach on a non-seekable pipe. Those get one retry from a file.
+SEEKABLE_INPUT_CT = {"audio/mp4", "audio/m4a", "audio/3gpp", "audio/3gp", "audio/x-caf"}
+
+class TranscodeError(Exception):
+    def __init__(self, status_code: int, code: str, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+        self.code = code
+        self.message = message
+
+def _write_temp(blob: bytes) -> str:
+    fd, path = tempfile.mkstemp(suffix=".bin")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(blob)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return path
+
+class Transcoder:
+    """
+    Runs ffmpeg as an asyncio subprocess: upload bytes in on stdin, mono WAV out
+    on stdout. At most max_procs ffmpeg processes run at once; up to max_queue
+    jobs may wait for a slot, beyond that new jobs are rejected. Each job is
+    killed after timeout_s. The event loop is never blocked.
+    """
+
+    def __init__(self, max_procs: int = 2, timeout_s: float = 30.0, max_queue: int = 32, binary: str = "ffmpeg"):
+        self.max_procs = max(1, int(max_procs))
+        self.timeout_s = float(timeout_s)
+        self.max_queue = max(0, int(max_queue))
+        self.binary = binary
+        self._sem = asyncio.Semaphore(self.max_procs)
+        self._waiting = 0
+        self._running = 0
+        self._counts = {"completed": 0, "failed": 0, "timeouts": 0, "rejected": 0, "file_fallbacks": 0}
+        self._wait_ms = deque(maxlen=1024)
+        self._run_ms = deque(maxlen=1024)
+
+    @classmethod
+    def from_env(cls) -> "Transcoder":
+        return cls(
+            max_procs=int(os.getenv("FFMPEG_MAX_PROCS", "2")),
+            timeout_s=float(os.getenv("FFMPEG_TIMEOUT_S", "30")),
+            max_queue=int(os.getenv("FFMPEG_MAX_QUEUE", "32")),
+            binary=os.getenv("FFMPEG_BIN", "ffmpeg"),
+        )
+
+    def _cmd(self, src: str) -> list[str]:
+        # Convert to mono PCM WAV, no resample here (adapter handles sample rate)
+        # -ac 1 = mono; omit -ar to preserve original rate
+        return [self.binary, "-hide_banner", "-loglevel", "error", "-i", src, "-ac", "1", "-f", "wav", "pipe:1"]
+
+    async def _run(self, cmd: list[str], stdin_bytes: bytes | None) -> bytes:
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdin=asyncio.subprocess.PIPE if stdin_bytes is not None else asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+        except FileNotFoundError:
+            raise TranscodeError(415, "TRANSCODE_FAILED", f"{self.binary} not available on server.")
+        try:
+            out, err = await asyncio.wait_for(proc.communicate(stdin_bytes), timeout=self.timeout_s)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            self._counts["timeouts"] += 1
+            raise TranscodeError(504, "TRANSCODE_TIMEOUT", f"Transcode exceeded {self.timeout_s:.0f}s.")
+        if proc.returncode != 0 or not out:
+            tail = err.decode(errors="ignore")[-400:]
+            raise TranscodeError(415, "TRANSCODE_FAILED", tail)
+        return out
+
+    async def to_wav(self, blob: bytes, content_type: str | None = None) -> bytes:
+        if self._waiting >= self.max_queue and self._sem.locked():
+            self._counts["rejected"] += 1
+            raise TranscodeError(503, "TRANSCODE_BUSY", "Too many uploads being converted; retry shortly.")
+
+        queued_at = perf_counter()
+        self._waiting += 1
+        try:
+            await self._sem.acquire()
+        finally:
+            self._waiting -= 1
+        started = perf_counter()
+        self._wait_ms.append((started - queued_at) * 1000.0)
+        self._running += 1
+        try:
+            try:
+                out = await self._run(self._cmd("pipe:0"), blob)
+            except TranscodeError as e:
+                if e.code != "TRANSCODE_FAILED" or (content_type or "").lower() not in SEEKABLE_INPUT_CT:
+                    raise
+                out = await self._run_from_file(blob)
+            self._counts["completed"] += 1
+            return out
+        except TranscodeError as e:
+            if e.code != "TRANSCODE_TIMEOUT":  # counted under "timeouts" already
+                self._counts["failed"] += 1
+            raise
+        finally:
+            self._running -= 1
+            self._run_ms.append((perf_counter() - started) * 1000.0)
+            self._sem.release()
+
+    async def _run_from_file(self, blob: bytes) -> bytes:
+        self._counts["file_fallbacks"] += 1
+        # a multi-MB write (and the unlink) would otherwise block the loop
+        path = await asyncio.to_thread(_write_temp, blob)
+        try:
+            return await self._run(self._cmd(path), None)
+        finally:
+            await asyncio.to_thread(os.unlink, path)
+
+    def stats(self) -> dict:
+        def pct(vals, p):
+            v = sorted(vals)
+            return v[min(len(v) - 1, int(p / 100.0 * len(v)))] if v else None
+        return {
+            "max_procs": self.max_procs,
+            "timeout_s": self.timeout_s,
+            "max_queue": self.max_queue,
+            "queue_depth": self._waiting,
+            "running": self._running,
+            **self._counts,
+            "queue_wait_ms": {"p50": pct(self._wait_ms, 50), "p99": pct(self._wait_ms, 99)},
+            "run_ms": {"p50": pct(self._run_ms, 50), "p99": pct(self._run_ms, 99)},
+        }
+
+transcoder = Transcoder.from_env()
+register_stats("transcode", transcoder.stats)
@@ -0,0 +1,182 @@
+import asyncio, io, os, sys, threading, time, wave
+import numpy as np
+
+from utils.audio_utils import decode_wav
+from utils.executor import executor, MODALITIES
+from utils.metrics import register_stats
+from utils.timing import untimed
+from utils import model_adapters as adapters
+
+WARM_TEXTS = [
+    "ok",
+    "I can't believe how well this turned out, thank you so much!",
+    "The meeting was moved again and nobody told me, which is honestly frustrating. " * 4,
+]
+WARM_AUDIO_S = (1.0, 3.0)
+# first retry of a failed warm-up after this many seconds, doubling up to RETRY_MAX_S (0 = no retry)
+RETRY_S = float(os.getenv("WARMUP_RETRY_S", "5"))
+RETRY_MAX_S = 300.0
+
+_initialized: dict[str, dict] = {}  # process pool worker: what init_worker's warm-up returned
+
+def _synthetic_wav(seconds: float, sr: int):
+    # low-level noise: exercises resampling, mel and the model at a realistic shape
+    rng = np.random.RandomState(0)
+    pcm = (rng.randn(int(seconds * sr)) * 300).astype("<i2")
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(sr)
+        w.writeframes(pcm.tobytes())
+    return decode_wav(buf.getvalue())
+
+def warm_up_worker(modality: str, version: str | None = None) -> dict:
+    """
+    Loads the model for `modality` in this process and runs synthetic inputs
+    through it WARMUP_ITERS times, so lazy init, allocator growth and the
+    TorchScript profiling runs happen before real traffic. Module-level so
+    process pools can run it (also as their worker initializer). Idempotent.
+    `version` warms that resident version instead (a hot-loaded one that
+    gets no traffic yet). Synthetic inputs stay out of the stage histograms.
+    """
+    if version is None and modality in _initialized:
+        # a process worker that already warmed up in its initializer
+        return {**_initialized[modality], "tid": threading.get_native_id()}
+    iters = max(1, int(os.getenv("WARMUP_ITERS", "3")))
+    t0 = time.perf_counter()
+    with untimed():
+        _run_warm_inputs(modality, version, iters)
+    return {**adapters.model_state(modality), "pid": os.getpid(), "tid": threading.get_native_id(),
+            "warm_ms": round((time.perf_counter() - t0) * 1000.0, 1)}
+
+def _run_warm_inputs(modality: str, version: str | None, iters: int):
+    if modality == "text":
+        if version is None:
+            adapters.get_text_meta()
+        for _ in range(iters):
+            for text in WARM_TEXTS:
+                adapters.predict_text(text, "en", version)
+            adapters.predict_text_batch(WARM_TEXTS, ["en"] * len(WARM_TEXTS), version)
+    else:
+        if version is None:
+            adapters.get_audio_meta()
+        sr = int(os.getenv("AUDIO_TARGET_SR") or 16000)
+        clips = [_synthetic_wav(s, sr) for s in WARM_AUDIO_S]
+        for _ in range(iters):
+            for wav in clips:
+                adapters.predict_audio(wav=wav, duration=wav.duration, sample_rate=wav.sample_rate, version=version)
+
+def init_worker(modality: str):
+    # ProcessPoolExecutor initializer: an exception here would break the whole pool
+    try:
+        info = warm_up_worker(modality)
+        if info["real"] or adapters.MODE != "REAL":
+            _initialized[modality] = info  # the warm-up job only reports it; a failed load is retried there
+    except Exception as e:
+        print(f"[warmup] {modality} worker {os.getpid()} warm-up failed: {e}", file=sys.stderr)
+
+class Readiness:
+    """
+    Startup state for the probes: "starting" -> "warming" -> "ready", or
+    "failed" when a REAL model could not be loaded (this worker would only
+    serve mock scores; warm_up retries it), and "draining" once shutdown
+    begins. The model reported per modality is read from the registry on
+    every call, so it follows version switches.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.state = "starting"
+        self.started_at = time.time()
+        self.ready_at = None
+        self.models: dict[str, dict] = {}
+        self.errors: dict[str, str] = {}
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+
+    def set(self, state: str):
+        with self._lock:
+            if self.state == "draining":
+                return  # shutdown wins over a warm-up finishing late
+            self.state = state
+            if state == "ready":
+                self.ready_at = time.time()
+
+    def record(self, modality: str, info: dict | None = None, error: str | None = None):
+        with self._lock:
+            if info is not None:
+                self.models[modality] = info
+            if error:
+                self.errors[modality] = error
+
+    def clear_errors(self, modalities) -> None:
+        with self._lock:
+            for m in modalities:
+                self.errors.pop(m, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            body = {
+                "state": self.state,
+                "ready": self.state == "ready",
+                "uptime_s": round(time.time() - self.started_at, 3),
+                "warm_s": round(self.ready_at - self.started_at, 3) if self.ready_at else None,
+                "models": {m: dict(info) for m, info in self.models.items()},
+                "errors": dict(self.errors),
+            }
+        for m, info in body["models"].items():
+            info["model"] = _serving_meta(m)
+        return body
+
+def _serving_meta(modality: str) -> dict:
+    reg = adapters.REGISTRIES[modality]
+    v = reg.primary()
+    if v is not reg.fallback:
+        return v.meta
+    # nothing loaded in this process (process executor): what the workers load
+    return adapters.peek_text_meta() if modality == "text" else adapters.peek_audio_meta()
+
+readiness = Readiness()
+register_stats("readiness", readiness.stats, labels={("models",): "modality"})
+
+async def _warm_modality(modality: str):
+    # one job per worker, submitted together, so every thread/process gets started;
+    # process workers also warm in their initializer. A fast job can free its
+    # worker for the next one, so count the workers that actually ran one.
+    n = executor.workers[modality]
+    try:
+        results = await asyncio.gather(*(executor.run(modality, warm_up_worker, modality) for _ in range(n)))
+    except Exception as e:
+        readiness.record(modality, error=f"warm-up failed: {e}")
+        return
+    info = {k: v for k, v in results[0].items() if k != "tid"}
+    info.update(workers=n, workers_warmed=len({(r["pid"], r["tid"]) for r in results}),
+                warm_ms=max(r["warm_ms"] for r in results))
+    readiness.record(modality, info)
+    if adapters.MODE == "REAL" and not info["real"]:
+        readiness.record(modality, error=info["error"] or "model not loaded")
+
+async def warm_up():
+    """
+    Loads and warms every modality in the inference workers, then flips
+    readiness. A modality that failed is retried with backoff (WARMUP_RETRY_S),
+    so a transient load error doesn't leave the worker unready until restart.
+    """
+    readiness.set("warming")
+    t0 = time.perf_counter()
+    failed, delay = MODALITIES, RETRY_S
+    while True:
+        await asyncio.gather(*(_warm_modality(m) for m in failed))
+        failed = list(readiness.errors)
+        readiness.set("failed" if failed else "ready")
+        print(f"[warmup] {readiness.state} after {time.perf_counter() - t0:.2f}s"
+              + (f": {readiness.errors}" if failed else "")
+              + (f"; retrying in {delay:g}s" if failed and delay else ""), file=sys.stderr)
+        if not failed or not delay:
+            return
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, RETRY_MAX_S)
+        readiness.clear_errors(failed)
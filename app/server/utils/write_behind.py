@@ -0,0 +1,232 @@
+import os, sys, threading
+from collections import deque
+from concurrent.futures import Future
+from time import monotonic
+
+from sqlalchemy import insert
+
+from utils.db import SessionLocal
+from utils.models import Prediction, Feedback
+from utils.analytics_cache import mark_analytics_dirty
+from utils.metrics import register_stats
+from utils.timing import stage
+
+def insert_feedback_rows(db, rows: list[dict]) -> list[int]:
+    """One multi-row INSERT ... RETURNING; the new ids in row order (no commit)."""
+    # an executemany with ordered RETURNING goes row by row on SQLite; rowids are
+    # handed out in VALUES order, but RETURNING order isn't guaranteed
+    return sorted(db.scalars(insert(Feedback).values(rows).returning(Feedback.id)))
+
+def _first_line(e: Exception) -> str:
+    # SQLAlchemy errors carry the statement and every bound row after the first line
+    return str(e).split("\n", 1)[0][:300]
+
+class WriteBehind:
+    """
+    Optional group-commit writer for Prediction and Feedback rows.
+
+    mode="sync": routes commit their own rows (one transaction per request).
+    mode="behind": routes enqueue rows and return; a background thread commits
+    everything queued in one transaction once max_batch rows are waiting or the
+    oldest has waited flush_ms. Predictions are fire-and-forget; feedback waits
+    for its batch to commit so the response carries the real feedback id.
+
+    Durability trade-off: an acknowledged prediction lives only in memory until
+    its batch commits (at most ~flush_ms). A graceful shutdown drains the queue,
+    a crash or kill -9 loses whatever was still queued. A batch that fails to
+    commit is retried row by row, so one bad row doesn't take the rest with it.
+    """
+
+    def __init__(self, mode: str = "sync", max_batch: int = 256, flush_ms: float = 50.0, max_queue: int = 10000):
+        if mode not in ("sync", "behind"):
+            raise ValueError(f"Unknown write mode: {mode}")
+        self.mode = mode
+        self.max_batch = max(1, int(max_batch))
+        self.flush_s = max(0.0, float(flush_ms)) / 1000.0
+        self.max_queue = max(1, int(max_queue))
+        self._queue: deque = deque()  # ("prediction", row, None) | ("feedback", row, Future)
+        self._pending: dict[str, int] = {}  # prediction_id -> queued/in-flight row count
+        self._oldest = None
+        self._cond = threading.Condition()
+        self._thread = None
+        self._pid = None
+        self._closing = False
+        self._counts = {"batches": 0, "rows": 0, "failed_batches": 0, "lost_rows": 0,
+                        "failed_feedback": 0, "rejected": 0}
+
+    @classmethod
+    def from_env(cls) -> "WriteBehind":
+        return cls(
+            mode=os.getenv("WRITE_MODE", "sync").lower(),
+            max_batch=int(os.getenv("WRITE_BEHIND_MAX_BATCH", "256")),
+            flush_ms=float(os.getenv("WRITE_BEHIND_FLUSH_MS", "50")),
+            max_queue=int(os.getenv("WRITE_BEHIND_MAX_QUEUE", "10000")),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode == "behind"
+
+    def _ensure_thread(self):
+        # caller holds the condition; restart after fork like MicroBatcher
+        if self._thread is None or self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._loop, name="write-behind", daemon=True)
+            self._thread.start()
+
+    def _enqueue(self, items: list) -> bool:
+        with self._cond:
+            if self._closing or len(self._queue) + len(items) > self.max_queue:
+                self._counts["rejected"] += len(items)
+                return False
+            self._ensure_thread()
+            if not self._queue:
+                self._oldest = monotonic()
+            for kind, row, fut in items:
+                if kind == "prediction":
+                    pid = row["prediction_id"]
+                    self._pending[pid] = self._pending.get(pid, 0) + 1
+                self._queue.append((kind, row, fut))
+            self._cond.notify()
+            return True
+
+    def add_predictions(self, rows: list[dict]) -> bool:
+        """Queues Prediction rows (insert() dicts). False if the queue is full: write inline instead."""
+        return self._enqueue([("prediction", row, None) for row in rows])
+
+    def add_feedback(self, row: dict) -> Future | None:
+        """Queues a Feedback row; the future resolves to its id after commit. None if the queue is full."""
+        fut = Future()
+        return fut if self._enqueue([("feedback", row, fut)]) else None
+
+    def add_feedback_many(self, rows: list[dict]) -> list[Future] | None:
+        """Queues Feedback rows together, one future per row. None if they don't all fit."""
+        futs = [Future() for _ in rows]
+        return futs if self._enqueue([("feedback", row, fut) for row, fut in zip(rows, futs)]) else None
+
+    def is_pending(self, prediction_id: str) -> bool:
+        """True while a prediction is accepted but not committed yet."""
+        with self._cond:
+            return prediction_id in self._pending
+
+    def pending_among(self, prediction_ids) -> set[str]:
+        """The given predictions that are accepted but not committed yet."""
+        with self._cond:
+            return {pid for pid in prediction_ids if pid in self._pending}
+
+    def _take(self) -> list | None:
+        with self._cond:
+            while True:
+                if self._queue:
+                    due = self._oldest + self.flush_s
+                    if self._closing or len(self._queue) >= self.max_batch or monotonic() >= due:
+                        break
+                    self._cond.wait(due - monotonic())
+                elif self._closing:
+                    return None
+                else:
+                    self._cond.wait()
+            n = min(self.max_batch, len(self._queue))
+            batch = [self._queue.popleft() for _ in range(n)]
+            self._oldest = monotonic() if self._queue else None
+            return batch
+
+    def _loop(self):
+        while True:
+            batch = self._take()
+            if batch is None:
+                return
+            self._flush(batch)
+
+    def _flush(self, batch: list):
+        preds = [row for kind, row, _ in batch if kind == "prediction"]
+        fbs = [(row, fut) for kind, row, fut in batch if kind == "feedback"]
+        try:
+            with stage("write_behind_commit"), SessionLocal() as db:
+                # predictions first: queued feedback may point at them
+                if preds:
+                    db.execute(insert(Prediction), preds)
+                ids = insert_feedback_rows(db, [row for row, _ in fbs]) if fbs else []
+                db.commit()
+        except Exception as e:
+            print(f"[write_behind] batch of {len(batch)} failed ({_first_line(e)}); retrying row by row",
+                  file=sys.stderr)
+            with self._cond:
+                self._counts["failed_batches"] += 1
+            self._flush_rows(preds, fbs)
+        else:
+            with self._cond:
+                self._counts["batches"] += 1
+                self._counts["rows"] += len(batch)
+            for (_, fut), fb_id in zip(fbs, ids):
+                fut.set_result(fb_id)
+            mark_analytics_dirty()
+        finally:
+            with self._cond:
+                for row in preds:
+                    pid = row["prediction_id"]
+                    self._pending[pid] -= 1
+                    if not self._pending[pid]:
+                        del self._pending[pid]
+
+    def _flush_rows(self, preds: list, fbs: list):
+        # One transaction per row, so a bad row (constraint, bad value) costs only
+        # itself. Slow, but only after a group commit failed. Predictions first again.
+        def write(fn):
+            try:
+                with SessionLocal() as db:
+                    out = fn(db)
+                    db.commit()
+                return out, None
+            except Exception as e:
+                return None, e
+
+        written = dropped = 0
+        for row in preds:
+            _, err = write(lambda db: db.execute(insert(Prediction), [row]))
+            if err is None:
+                written += 1
+            else:
+                dropped += 1
+                print(f"[write_behind] dropped prediction {row.get('prediction_id')}: {_first_line(err)}",
+                      file=sys.stderr)
+        failed_fb = 0
+        for row, fut in fbs:
+            fb_id, err = write(lambda db: insert_feedback_rows(db, [row])[0])
+            if err is None:
+                written += 1
+                fut.set_result(fb_id)
+            else:
+                failed_fb += 1
+                fut.set_exception(err)
+        with self._cond:
+            self._counts["rows"] += written
+            self._counts["lost_rows"] += dropped
+            self._counts["failed_feedback"] += failed_fb
+        if written:
+            mark_analytics_dirty()
+
+    def stop(self, timeout: float = 30.0):
+        """Stops accepting rows and commits everything still queued."""
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None and thread.is_alive():
+            thread.join(timeout=timeout)
+        if self._queue:
+            print(f"[write_behind] {len(self._queue)} rows not flushed at shutdown", file=sys.stderr)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "mode": self.mode,
+                "max_batch": self.max_batch,
+                "flush_ms": self.flush_s * 1000.0,
+                "queued": len(self._queue),
+                "pending_predictions": len(self._pending),
+                **self._counts,
+            }
+
+write_behind = WriteBehind.from_env()
+register_stats("write_behind", write_behind.stats)